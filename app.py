@@ -1,13 +1,19 @@
 
 from fastapi import FastAPI, Form
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
-from engine.swagger import load_swagger
+from engine.swagger import load_swagger, SpecIndex
 from engine.generator import generate_tests
 from engine.llm_generator import generate_tests_with_llm
 from engine.executor import execute_tests
+from engine.async_executor import execute_tests_async
 from engine.report import generate_html_report, generate_junit
+from engine.ratelimit import parse_rate_rules
+from engine.auth import parse_credentials
+from engine.budget import parse_failure_budget
+from engine.incremental import (diff_fingerprints, fingerprint_operations, load_fingerprints, merge_tests,
+                                save_fingerprints, select_tests)
+from engine.testcase import load_suite, save_suite
 from datetime import datetime
-import json
 import os
 
 app = FastAPI(title="API AI Tester V7")
@@ -540,7 +546,7 @@ def home():
                             <input type="text" name="base_url" value="https://petstore3.swagger.io/api/v3" placeholder="https://petstore3.swagger.io/api/v3"/>
                         </div>
                         <div class="form-group">
-                            <label>Swagger/OpenAPI Spec URL</label>
+                            <label>Swagger/OpenAPI Spec URL <span class="label-help">(or file path: .json/.yaml, optionally .gz)</span></label>
                             <input type="text" name="swagger" value="https://petstore3.swagger.io/api/v3/openapi.json" placeholder="https://petstore3.swagger.io/api/v3/openapi.json"/>
                         </div>
                     </div>
@@ -557,6 +563,17 @@ def home():
                             <label>API Key <span class="label-help">(optional - leave empty for public endpoints)</span></label>
                             <input type="text" name="api_key" placeholder="Enter your API key" value="test-api-key-123"/>
                         </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Login Endpoint <span class="label-help">(optional - bearer token shared by all workers)</span></label>
+                                <input type="text" name="login_endpoint" placeholder="/auth/login" value=""/>
+                            </div>
+                            <div class="form-group">
+                                <label>Login Body <span class="label-help">(JSON credentials)</span></label>
+                                <input type="text" name="login_body" placeholder='{"username": "...", "password": "..."}' value=""/>
+                            </div>
+                        </div>
                     </div>
                     
                     <!-- Test Generation Options Section -->
@@ -593,11 +610,150 @@ def home():
                             </label>
                         </div>
                         
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="incremental" value="true" id="incremental"/>
+                            <label for="incremental" class="checkbox-label">
+                                🧬 Incremental: only regenerate tests of operations changed in the spec
+                            </label>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="only_changed" value="true" id="only_changed"/>
+                            <label for="only_changed" class="checkbox-label">
+                                🎯 Only run tests of changed operations
+                            </label>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="compact_suite" value="true" id="compact_suite"/>
+                            <label for="compact_suite" class="checkbox-label">
+                                🗜️ Save tests as a compact suite (shared headers, one row per test)
+                            </label>
+                        </div>
+                        
                         <div class="info-box">
                             ⚡ <strong>Tip:</strong> First run generates and saves tests. Next runs can reuse them for faster execution.
                         </div>
                     </div>
                     
+                    <!-- Execution Options Section -->
+                    <div class="section">
+                        <div class="section-title">Execution Options</div>
+                        
+                        <div class="form-group">
+                            <label>Execution Engine</label>
+                            <select name="engine">
+                                <option value="thread" selected>🧵 Thread pool</option>
+                                <option value="async">⚡ Asyncio (high concurrency)</option>
+                            </select>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="adaptive_concurrency" value="true" id="adaptive_concurrency"/>
+                            <label for="adaptive_concurrency" class="checkbox-label">
+                                📈 Adaptive concurrency (back off on latency, errors and 429s)
+                            </label>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="http2" value="true" id="http2"/>
+                            <label for="http2" class="checkbox-label">
+                                🔀 HTTP/2 transport (thread engine: multiplex all workers over a few connections)
+                            </label>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="stateful" value="true" id="stateful"/>
+                            <label for="stateful" class="checkbox-label">
+                                🔗 Stateful tests (create a resource, then read/update/delete it by its returned id)
+                            </label>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Max Workers <span class="label-help">(thread engine)</span></label>
+                                <input type="text" name="max_workers" value="10"/>
+                            </div>
+                            <div class="form-group">
+                                <label>Min Concurrency <span class="label-help">(adaptive mode)</span></label>
+                                <input type="text" name="min_concurrency" value="1"/>
+                            </div>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Max Concurrency <span class="label-help">(async engine)</span></label>
+                                <input type="text" name="max_concurrency" value="500"/>
+                            </div>
+                            <div class="form-group">
+                                <label>Per-Host Limit <span class="label-help">(async engine)</span></label>
+                                <input type="text" name="per_host_limit" value="100"/>
+                            </div>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Rate Limit <span class="label-help">(requests/sec, 0 = unlimited)</span></label>
+                                <input type="text" name="rate_limit" value="0"/>
+                            </div>
+                            <div class="form-group">
+                                <label>Per-Path Limits <span class="label-help">(e.g. /store=5, api.example.com=20)</span></label>
+                                <input type="text" name="rate_limit_rules" value=""/>
+                            </div>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Circuit Breaker <span class="label-help">(consecutive connection failures, 0 = off)</span></label>
+                                <input type="text" name="circuit_threshold" value="5"/>
+                            </div>
+                            <div class="form-group">
+                                <label>Circuit Reset <span class="label-help">(seconds before a probe)</span></label>
+                                <input type="text" name="circuit_reset" value="30"/>
+                            </div>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Retries <span class="label-help">(transient failures of idempotent tests, 0 = off)</span></label>
+                                <input type="text" name="retries" value="0"/>
+                            </div>
+                            <div class="form-group">
+                                <label>Failure Budget <span class="label-help">(abort after N failures or PCT%, empty = off)</span></label>
+                                <input type="text" name="failure_budget" value="" placeholder="25 or 10%"/>
+                            </div>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="hedge" value="true" id="hedge"/>
+                            <label for="hedge" class="checkbox-label">
+                                ⏱️ Hedge slow GETs (duplicate a request still unanswered after its endpoint's p95)
+                            </label>
+                        </div>
+                        
+                        <div class="checkbox-group">
+                            <input type="checkbox" name="adaptive_timeouts" value="true" id="adaptive_timeouts"/>
+                            <label for="adaptive_timeouts" class="checkbox-label">
+                                ⌛ Adaptive timeouts (3x each endpoint's p99 from previous runs, 1-120s)
+                            </label>
+                        </div>
+                        
+                        <div class="row">
+                            <div class="form-group">
+                                <label>Artifact Format</label>
+                                <select name="artifact_format">
+                                    <option value="jsonl" selected>📦 Single JSONL file per run</option>
+                                    <option value="jsonl.gz">🗜️ Gzipped JSONL file per run</option>
+                                    <option value="files">📁 Per-test request/response files (legacy)</option>
+                                </select>
+                            </div>
+                            <div class="form-group">
+                                <label>Response Capture Limit <span class="label-help">(KB kept per body)</span></label>
+                                <input type="text" name="capture_limit_kb" value="1024"/>
+                            </div>
+                        </div>
+                    </div>
+                    
                     <button type="submit" class="submit-btn">▶ Run Tests</button>
                     
                 </form>
@@ -613,14 +769,46 @@ async def run(
     swagger: str = Form(...),
     api_key: str = Form(""),
     reuse_tests: str = Form(""),
+    incremental: str = Form(""),
+    only_changed: str = Form(""),
+    compact_suite: str = Form(""),
     use_llm: str = Form(""),
-    llm_model: str = Form("llama3.2")
+    llm_model: str = Form("llama3.2"),
+    engine: str = Form("thread"),
+    max_workers: int = Form(10),
+    adaptive_concurrency: str = Form(""),
+    min_concurrency: int = Form(1),
+    max_concurrency: int = Form(500),
+    per_host_limit: int = Form(100),
+    artifact_format: str = Form("jsonl"),
+    rate_limit: float = Form(0),
+    rate_limit_rules: str = Form(""),
+    max_requeues: int = Form(3),
+    stateful: str = Form(""),
+    capture_limit_kb: int = Form(1024),
+    circuit_threshold: int = Form(5),
+    circuit_reset: float = Form(30.0),
+    retries: int = Form(0),
+    hedge: str = Form(""),
+    adaptive_timeouts: str = Form(""),
+    login_endpoint: str = Form(""),
+    login_body: str = Form(""),
+    http2: str = Form(""),
+    failure_budget: str = Form(""),
+    failure_budget_min_sample: int = Form(20)
 ):
     import os
-    import json
     import time
     import sys
     
+    # Reject malformed options before the spec download and test generation
+    try:
+        rules = parse_rate_rules(rate_limit_rules)
+        max_failures, max_failure_rate = parse_failure_budget(failure_budget)
+        login_credentials = parse_credentials(login_body)
+    except (ValueError, OSError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    
     # Track execution timing
     execution_start = time.time()
     timings = {}
@@ -631,11 +819,12 @@ async def run(
     
     tests_file = "test_cases.json"
     
+    spec = None
+    
     # Check if user wants to reuse existing tests
     if reuse_tests == "true" and os.path.exists(tests_file):
         print(f"\n[STEP 1/4] Reusing existing test cases from {tests_file}", flush=True)
-        with open(tests_file, "r") as f:
-            tests = json.load(f)
+        tests = load_suite(tests_file)
         print(f"✓ Loaded {len(tests)} test cases from file", flush=True)
         timings['test_generation'] = 0
         timings['swagger_load'] = 0
@@ -645,30 +834,49 @@ async def run(
         print(f"\n[STEP 1/4] Loading Swagger specification...", flush=True)
         print(f"  Source: {swagger}", flush=True)
         step_start = time.time()
-        spec = load_swagger(swagger)
+        spec = SpecIndex(load_swagger(swagger))
         timings['swagger_load'] = time.time() - step_start
         print(f"✓ Swagger loaded successfully ({timings['swagger_load']:.2f}s)", flush=True)
-        print(f"  Found {len(spec.get('paths', {}))} endpoints", flush=True)
+        print(f"  Found {len(spec.paths)} endpoints", flush=True)
         
         # Step 2: Generate tests
         print(f"\n[STEP 2/4] Generating test cases...", flush=True)
         step_start = time.time()
+        fingerprints = fingerprint_operations(spec)
+        generator = {"llm_model": llm_model if use_llm == "true" else None, "login_endpoint": login_endpoint or None}
+        previous = None
+        if incremental == "true" or only_changed == "true":
+            previous = load_fingerprints(tests_file, generator)
+        diff = diff_fingerprints(previous, fingerprints)
+        operations = diff.changed | diff.added if previous is not None else None
+        if previous is not None:
+            print(f"  Spec diff: {len(diff.changed)} changed, {len(diff.added)} added, "
+                  f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged operations", flush=True)
         if use_llm == "true":
             print(f"  Method: LLM-based generation", flush=True)
             print(f"  Model: {llm_model}", flush=True)
-            tests = generate_tests_with_llm(spec, None, llm_model)
+            tests = (generate_tests_with_llm(spec, login_endpoint or None, llm_model, operations=operations)
+                     if operations != set() else [])
             generation_method = f"LLM-based ({llm_model})"
         else:
             print(f"  Method: Rule-based generation", flush=True)
-            tests = generate_tests(spec, None)
+            tests = generate_tests(spec, login_endpoint or None, operations=operations)
             generation_method = "Rule-based (Swagger)"
         timings['test_generation'] = time.time() - step_start
         print(f"✓ Generated {len(tests)} test cases ({timings['test_generation']:.2f}s)", flush=True)
+        if previous is not None:
+            tests = merge_tests(load_suite(tests_file), tests, diff, spec.paths)
+            generation_method += " (incremental)"
+            print(f"  Merged into {len(tests)} test cases", flush=True)
         
         # Save generated tests for future reuse
-        with open(tests_file, "w") as f:
-            json.dump(tests, f, indent=2)
+        save_suite(tests, tests_file, compact=compact_suite == "true")
+        save_fingerprints(tests_file, fingerprints, generator)
         print(f"  Saved to: {tests_file}", flush=True)
+        
+        if only_changed == "true":
+            tests = select_tests(tests, diff.changed | diff.added, spec.paths)
+            print(f"  Running only the {len(tests)} tests of changed/added operations", flush=True)
 
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     
@@ -676,8 +884,59 @@ async def run(
     print(f"\n[STEP 3/4] Executing {len(tests)} test cases...", flush=True)
     print(f"  Base URL: {base_url}", flush=True)
     print(f"  Run ID: {run_id}", flush=True)
+    print(f"  Engine: {engine}", flush=True)
     step_start = time.time()
-    results = execute_tests(tests, api_key, base_url, run_id)
+    execution_stats = {}
+    if engine == "async":
+        results = await execute_tests_async(
+            tests, api_key, base_url, run_id,
+            max_concurrency=max_concurrency,
+            per_host_limit=per_host_limit,
+            stats=execution_stats,
+            artifact_format=artifact_format,
+            adaptive=adaptive_concurrency == "true",
+            min_concurrency=min_concurrency,
+            rate_limit=rate_limit or None,
+            rate_limit_rules=rules,
+            max_requeues=max_requeues,
+            dependencies=stateful == "true",
+            swagger=spec,
+            capture_limit=capture_limit_kb * 1024,
+            circuit_threshold=circuit_threshold,
+            circuit_reset=circuit_reset,
+            retries=retries,
+            hedge=hedge == "true",
+            adaptive_timeouts=adaptive_timeouts == "true",
+            login_url=login_endpoint or None,
+            login_credentials=login_credentials,
+            max_failures=max_failures,
+            max_failure_rate=max_failure_rate,
+            failure_min_sample=failure_budget_min_sample
+        )
+    else:
+        results = execute_tests(tests, api_key, base_url, run_id,
+                                max_workers=max_workers,
+                                stats=execution_stats,
+                                artifact_format=artifact_format,
+                                adaptive=adaptive_concurrency == "true",
+                                min_workers=min_concurrency,
+                                rate_limit=rate_limit or None,
+                                rate_limit_rules=rules,
+                                max_requeues=max_requeues,
+                                dependencies=stateful == "true",
+                                swagger=spec,
+                                capture_limit=capture_limit_kb * 1024,
+                                circuit_threshold=circuit_threshold,
+                                circuit_reset=circuit_reset,
+                                retries=retries,
+                                hedge=hedge == "true",
+                                adaptive_timeouts=adaptive_timeouts == "true",
+                                login_url=login_endpoint or None,
+                                login_credentials=login_credentials,
+                                http2=http2 == "true",
+                                max_failures=max_failures,
+                                max_failure_rate=max_failure_rate,
+                                failure_min_sample=failure_budget_min_sample)
     timings['test_execution'] = time.time() - step_start
     
     # Step 4: Generate reports
@@ -693,11 +952,13 @@ async def run(
         'generation_method': generation_method,
         'llm_model': llm_model if use_llm == "true" else None,
         'base_url': base_url,
-        'total_tests': len(tests)
+        'total_tests': len(tests),
+        'execution_stats': execution_stats
     }
     
     generate_html_report(results, html_path, metadata)
-    generate_junit(results, junit_path)
+    aborted = execution_stats.get('aborted')
+    generate_junit(results, junit_path, aborted)
     timings['report_generation'] = time.time() - step_start
     
     print(f"✓ Reports generated ({timings['report_generation']:.2f}s)", flush=True)
@@ -705,7 +966,10 @@ async def run(
     print(f"  JUnit Report: {junit_path}", flush=True)
     
     print(f"\n{'='*70}", flush=True)
-    print(f"PIPELINE COMPLETED SUCCESSFULLY", flush=True)
+    if aborted:
+        print(f"PIPELINE ABORTED: {aborted['reason']}", flush=True)
+    else:
+        print(f"PIPELINE COMPLETED SUCCESSFULLY", flush=True)
     print(f"{'='*70}", flush=True)
     print(f"Total Execution Time: {timings['total_execution']:.2f}s", flush=True)
     print(f"  • Swagger Load: {timings['swagger_load']:.2f}s", flush=True)
@@ -715,13 +979,14 @@ async def run(
     print(f"{'='*70}\n", flush=True)
 
     return {
-        "status": "success",
+        "status": "aborted" if aborted else "success",
         "execution_id": run_id,
         "html_report": f"/reports/report_{run_id}.html",
         "junit_report": f"/reports/junit_{run_id}.xml",
         "total_tests": len(results),
         "passed": sum(1 for r in results if r.get("status") == "PASS"),
-        "failed": sum(1 for r in results if r.get("status") == "FAIL")
+        "failed": sum(1 for r in results if r.get("status") == "FAIL"),
+        "aborted": aborted
     }
 
 @app.get("/reports/{filename}")
@@ -0,0 +1,214 @@
+"""
+Benchmark script comparing the thread-pool and asyncio execution engines
+(and, with --http2, the thread engine's HTTP/2 transport against an h2c stub)
+against a local stub server with a fixed per-request latency
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import threading
+import time
+from datetime import datetime
+
+from engine.executor import execute_tests
+from engine.async_executor import execute_tests_async
+from engine.histogram import LatencyHistogram
+
+
+def start_stub_server(port, latency):
+    """Start a keep-alive HTTP/1.1 stub on 127.0.0.1:port that answers every request after `latency` seconds"""
+    body = b'{"status": "ok"}'
+    response = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"\r\n" + body
+    )
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", port, backlog=4096))
+        ready.set()
+        loop.run_until_complete(server.serve_forever())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+
+
+def start_h2_stub_server(port, latency):
+    """Start an HTTP/2 stub (h2c, prior knowledge) on 127.0.0.1:port that answers every stream after `latency` seconds"""
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+
+    body = b'{"status": "ok"}'
+    response_headers = [(":status", "200"), ("content-type", "application/json"),
+                        ("content-length", str(len(body)))]
+
+    async def handle(reader, writer):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        async def respond(stream_id):
+            await asyncio.sleep(latency)
+            try:
+                conn.send_headers(stream_id, response_headers)
+                conn.send_data(stream_id, body, end_stream=True)
+                writer.write(conn.data_to_send())
+            except (h2.exceptions.StreamClosedError, ConnectionError):
+                pass
+
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.DataReceived):
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        asyncio.ensure_future(respond(event.stream_id))
+                writer.write(conn.data_to_send())
+                await writer.drain()
+        except (h2.exceptions.ProtocolError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", port, backlog=4096))
+        ready.set()
+        loop.run_until_complete(server.serve_forever())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+
+
+def make_tests(count):
+    """Synthetic GET test cases against the stub server"""
+    return [
+        {
+            "id": f"test{i:05d}",
+            "test_name": f"GET /items/{i} - Valid Request",
+            "method": "GET",
+            "endpoint": f"/items/{i}",
+            "expected_status": 200,
+            "auth": "valid",
+            "headers": {"accept": "application/json"}
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def run_engine(runner):
+    """Run one engine with its per-test output suppressed; returns (elapsed seconds, results)"""
+    start_time = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = runner()
+    return time.time() - start_time, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thread vs asyncio executor benchmark')
+    parser.add_argument('--tests', type=int, default=2000, help='Number of test cases')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub server latency in seconds')
+    parser.add_argument('--port', type=int, default=18080, help='Stub server port')
+    parser.add_argument('--workers', type=int, default=10, help='Thread engine max_workers')
+    parser.add_argument('--concurrency', type=int, default=500, help='Async engine max_concurrency')
+    parser.add_argument('--http2', action='store_true',
+                        help='Also run the thread engine over HTTP/2 against an h2c stub on --port + 1')
+    args = parser.parse_args()
+
+    start_stub_server(args.port, args.latency)
+    base_url = f"http://127.0.0.1:{args.port}"
+    tests = make_tests(args.tests)
+    if args.http2:
+        start_h2_stub_server(args.port + 1, args.latency)
+        h2_url = f"http://127.0.0.1:{args.port + 1}"
+
+    print("\n" + "="*80)
+    print("EXECUTOR ENGINE BENCHMARK")
+    print(f"Tests: {args.tests}, stub latency: {args.latency*1000:.0f} ms")
+    print("="*80)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    runs = [
+        ("thread", f"{args.workers} workers",
+         lambda stats: execute_tests(tests, "bench", base_url, f"bench_thread_{timestamp}",
+                                     max_workers=args.workers, stats=stats)),
+        ("async", f"{args.concurrency} in flight",
+         lambda stats: asyncio.run(execute_tests_async(tests, "bench", base_url, f"bench_async_{timestamp}",
+                                                       max_concurrency=args.concurrency,
+                                                       per_host_limit=args.concurrency, stats=stats))),
+    ]
+    if args.http2:
+        runs.append(("thread-h2", f"{args.workers} workers",
+                     lambda stats: execute_tests(tests, "bench", h2_url, f"bench_thread_h2_{timestamp}",
+                                                 max_workers=args.workers, stats=stats, http2=True)))
+
+    summary = []
+    for name, concurrency, runner in runs:
+        stats = {}
+        elapsed, results = run_engine(lambda: runner(stats))
+        passed = sum(1 for r in results if r.get("passed"))
+        latency = LatencyHistogram()
+        for r in results:
+            if r.get("elapsed_ms") is not None:
+                latency.record(r["elapsed_ms"])
+        summary.append({
+            "engine": name,
+            "concurrency": concurrency,
+            "total_time": elapsed,
+            "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+            "passed": passed,
+            "total": len(results),
+            "connections_opened": stats["connections"]["connections_opened"],
+            "latency": latency.to_dict()
+        })
+
+    print(f"\n{'Engine':<10} {'Concurrency':<18} {'Time (s)':<12} {'Req/s':<12} {'p50 ms':<10} {'p95 ms':<10} "
+          f"{'Conns':<8} {'Passed':<10}")
+    print("-" * 96)
+    for row in summary:
+        print(f"{row['engine']:<10} {row['concurrency']:<18} {row['total_time']:>8.2f}    "
+              f"{row['throughput_rps']:>8.1f}    {row['latency'].get('p50_ms', 0):>6.1f}    "
+              f"{row['latency'].get('p95_ms', 0):>6.1f}    {row['connections_opened']:>5}   "
+              f"{row['passed']}/{row['total']}")
+
+    results_file = f"benchmark_executor_{timestamp}.json"
+    with open(results_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"\nDetailed results saved to: {results_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Benchmark script for spec handling on synthetic specs:
+- samples: sample request body generation with the memoized, cycle-aware
+  generate_sample_data (plain dict and SpecIndex) against the previous
+  non-memoized recursion, on deeply nested shared components
+- load: load_swagger on a 10k-path spec as JSON, YAML and gzip files,
+  without and with the spec cache
+- suite: memory and file size of a large data-driven suite held as plain
+  test dicts (each with its own headers) and as TestCases, saved as an
+  indented JSON array and as a compact suite
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from engine import swagger as swagger_module
+from engine.generator import generate_tests
+from engine.swagger import SpecIndex, generate_sample_data, get_request_body_schema, load_swagger, merge_schema, resolve_ref
+from engine.testcase import TestCase, load_suite, save_suite
+
+
+def make_spec(components, fanout, operations):
+    """
+    Synthetic OpenAPI spec: component i has `fanout` properties referring to
+    the next components (so deep objects share the same subtrees), an allOf
+    base, and the last components refer back to the first (a reference cycle);
+    each operation POSTs one of the components
+    """
+    schemas = {"Base": {"type": "object", "properties": {"id": {"type": "integer", "example": 1},
+                                                         "createdAt": {"type": "string"}}}}
+    for i in range(components):
+        properties = {"name": {"type": "string", "example": f"c{i}"}, "count": {"type": "integer"},
+                      "enabled": {"type": "boolean"}}
+        for j in range(1, fanout + 1):
+            properties[f"ref{j}"] = {"$ref": f"#/components/schemas/C{(i + j) % components}"}
+        properties["items"] = {"type": "array", "items": {"$ref": f"#/components/schemas/C{(i + 1) % components}"}}
+        schemas[f"C{i}"] = {"allOf": [{"$ref": "#/components/schemas/Base"},
+                                      {"type": "object", "required": ["name"], "properties": properties}]}
+    paths = {}
+    for i in range(operations):
+        body = {"content": {"application/json": {"schema": {"$ref": f"#/components/schemas/C{i % components}"}}}}
+        paths[f"/resource{i}"] = {"post": {"operationId": f"create{i}", "requestBody": body,
+                                           "responses": {"201": {"description": "created"}}}}
+    return {"openapi": "3.0.3", "paths": paths, "components": {"schemas": schemas}}
+
+
+def naive_sample_data(swagger, schema, depth=0, max_depth=3, include_optional=False):
+    """
+    The generator before memoization (with allOf merged, uncached, so both
+    produce the same bodies): every $ref is expanded again and cycles run
+    down to max_depth
+    """
+    if depth > max_depth:
+        return None
+    if '$ref' in schema:
+        resolved = resolve_ref(swagger, schema['$ref'])
+        return naive_sample_data(swagger, resolved, depth + 1, max_depth, include_optional) if resolved else None
+    schema = merge_schema(swagger, schema)
+    schema_type = schema.get('type', 'object')
+    if schema_type == 'object':
+        obj = {}
+        for name, prop in schema.get('properties', {}).items():
+            if include_optional or name in schema.get('required', []) or len(obj) < 5:
+                value = naive_sample_data(swagger, prop, depth + 1, max_depth, include_optional)
+                if value is not None:
+                    obj[name] = value
+        return obj
+    if schema_type == 'array':
+        item = naive_sample_data(swagger, schema.get('items', {}), depth + 1, max_depth, include_optional)
+        return [item] if item is not None else []
+    return schema.get('example', schema.get('default', {"string": "string", "integer": 0, "number": 0.0,
+                                                        "boolean": False}.get(schema_type)))
+
+
+def time_bodies(generate, spec, paths, max_depth, include_optional):
+    """Generate every operation's body; returns (seconds, total JSON bytes)"""
+    start = time.perf_counter()
+    bodies = [generate(spec, get_request_body_schema(spec, path, "post"), max_depth=max_depth,
+                       include_optional=include_optional) for path in paths]
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(len(json.dumps(body)) for body in bodies)
+
+
+def benchmark_samples(args):
+    """Sample generation rows: naive vs memoized vs memoized on a SpecIndex, per max_depth"""
+    spec = make_spec(args.components, args.fanout, args.operations)
+    paths = list(spec["paths"])
+
+    print("\n" + "="*80)
+    print("SAMPLE DATA GENERATION BENCHMARK")
+    print(f"Components: {args.components} (fanout {args.fanout}), operations: {args.operations}, "
+          f"include_optional: {args.include_optional}")
+    print("="*80)
+
+    summary = []
+    for max_depth in (int(d) for d in args.depths.split(",")):
+        index = SpecIndex(spec)
+        runs = [("naive", naive_sample_data, spec), ("memoized", generate_sample_data, spec),
+                ("spec-index", generate_sample_data, index)]
+        for name, generate, source in runs:
+            elapsed, size = time_bodies(generate, source, paths, max_depth, args.include_optional)
+            summary.append({"generator": name, "max_depth": max_depth, "total_time": elapsed,
+                            "bodies_per_s": len(paths) / elapsed if elapsed else 0.0, "json_bytes": size})
+
+    print(f"\n{'Generator':<12} {'max_depth':<10} {'Time (ms)':<12} {'Bodies/s':<12} {'Speedup':<10} {'JSON bytes':<12}")
+    print("-" * 72)
+    baseline = {}
+    for row in summary:
+        baseline.setdefault(row["max_depth"], row["total_time"])
+        row["speedup"] = baseline[row["max_depth"]] / row["total_time"] if row["total_time"] else 0.0
+        print(f"{row['generator']:<12} {row['max_depth']:<10} {row['total_time'] * 1000:>9.1f}   "
+              f"{row['bodies_per_s']:>10.0f}   {row['speedup']:>6.1f}x    {row['json_bytes']:>10}")
+    return summary
+
+
+def write_spec_files(spec, directory):
+    """The spec as .json, .json.gz, .yaml and .yaml.gz files; returns their paths"""
+    import yaml
+    text = {"json": json.dumps(spec).encode("utf-8"),
+            "yaml": yaml.dump(spec, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper)).encode("utf-8")}
+    paths = []
+    for fmt, data in text.items():
+        for suffix, content in (("", data), (".gz", gzip.compress(data, compresslevel=6))):
+            path = os.path.join(directory, f"openapi.{fmt}{suffix}")
+            with open(path, "wb") as f:
+                f.write(content)
+            paths.append(path)
+    return paths
+
+
+def timed_load(path, **kwargs):
+    start = time.perf_counter()
+    load_swagger(path, **kwargs)
+    return time.perf_counter() - start
+
+
+def benchmark_load(args):
+    """load_swagger rows per file format: no cache, first cached load, cached reload"""
+    spec = make_spec(args.components, 2, args.load_paths)
+    directory = tempfile.mkdtemp(prefix="spec_bench_")
+    try:
+        paths = write_spec_files(spec, directory)
+        cache_dir = os.path.join(directory, "cache")
+        print(f"\n{'File':<20} {'Size (MB)':<12} {'No cache (ms)':<16} {'Cold cache (ms)':<18} {'Warm cache (ms)':<16}")
+        print("-" * 84)
+        summary = []
+        for path in paths:
+            row = {
+                "file": os.path.basename(path),
+                "size_mb": os.path.getsize(path) / 1024 ** 2,
+                "no_cache_ms": timed_load(path, cache_dir=None) * 1000,
+                "cold_cache_ms": timed_load(path, cache_dir=cache_dir) * 1000,
+                "warm_cache_ms": timed_load(path, cache_dir=cache_dir) * 1000,
+                "yaml_loader": swagger_module._YamlLoader.__base__.__name__ if swagger_module.yaml else None
+            }
+            summary.append(row)
+            print(f"{row['file']:<20} {row['size_mb']:>9.2f}   {row['no_cache_ms']:>13.0f}   "
+                  f"{row['cold_cache_ms']:>15.0f}   {row['warm_cache_ms']:>13.0f}")
+        return summary
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def data_driven_tests(spec, count):
+    """
+    count test dicts as a data-driven suite would have them: the generated
+    tests repeated with a different body value per row, each test with its
+    own headers dict (as the generator used to build them)
+    """
+    base = generate_tests(spec)
+    tests = []
+    for i in range(count):
+        test = dict(base[i % len(base)], id=f"test{i + 1:06d}", headers=dict(base[i % len(base)]["headers"]))
+        if "body" in test:
+            test["body"] = dict(test["body"], name=f"row{i}")
+        tests.append(test)
+    return tests
+
+
+def traced(build):
+    """(result, bytes allocated by build that are still held)"""
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_suite(args):
+    """Suite rows: in-memory size of dicts vs TestCases, file size and load time per suite format"""
+    spec = make_spec(args.components, 2, 50)
+    tests, dict_bytes = traced(lambda: data_driven_tests(spec, args.suite_tests))
+    compact_tests, compact_bytes = traced(lambda: [TestCase.from_dict(test) for test in tests])
+    print(f"\nIn memory: dicts {dict_bytes / 1024 ** 2:.1f} MB, TestCases {compact_bytes / 1024 ** 2:.1f} MB "
+          f"({dict_bytes / compact_bytes:.1f}x smaller)")
+    summary = {"tests": len(tests), "dict_mb": dict_bytes / 1024 ** 2, "testcase_mb": compact_bytes / 1024 ** 2, "files": []}
+    del compact_tests
+
+    directory = tempfile.mkdtemp(prefix="suite_bench_")
+    try:
+        print(f"\n{'File':<24} {'Size (MB)':<12} {'Save (ms)':<12} {'Load (ms)':<12}")
+        print("-" * 60)
+        for name, compact in (("json", False), ("json.gz", False), ("compact", True), ("compact.gz", True)):
+            path = os.path.join(directory, "test_cases." + name)
+            start = time.perf_counter()
+            save_suite(tests, path, compact=compact)
+            saved = time.perf_counter()
+            load_suite(path)
+            row = {"file": os.path.basename(path), "size_mb": os.path.getsize(path) / 1024 ** 2,
+                   "save_ms": (saved - start) * 1000, "load_ms": (time.perf_counter() - saved) * 1000}
+            summary["files"].append(row)
+            print(f"{row['file']:<24} {row['size_mb']:>9.2f}   {row['save_ms']:>9.0f}   {row['load_ms']:>9.0f}")
+        return summary
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Spec loading and sample data generation benchmark')
+    parser.add_argument('--mode', choices=['all', 'samples', 'load', 'suite'], default='all', help='Benchmarks to run')
+    parser.add_argument('--components', type=int, default=50, help='Number of shared components')
+    parser.add_argument('--fanout', type=int, default=4, help='Component references per component')
+    parser.add_argument('--operations', type=int, default=500, help='Number of POST operations (samples)')
+    parser.add_argument('--depths', default='3,5,7', help='max_depth values to compare (samples)')
+    parser.add_argument('--include-optional', action='store_true',
+                        help='Fill every property (as the payload sweep does), not just the first few (samples)')
+    parser.add_argument('--load-paths', type=int, default=10000, help='Number of paths in the load benchmark spec')
+    parser.add_argument('--suite-tests', type=int, default=500000, help='Number of tests in the suite benchmark')
+    args = parser.parse_args()
+
+    results = {}
+    if args.mode in ('all', 'samples'):
+        results["samples"] = benchmark_samples(args)
+    if args.mode in ('all', 'load'):
+        print("\n" + "="*80)
+        print("SPEC LOAD BENCHMARK")
+        print(f"Paths: {args.load_paths}, YAML loader: "
+              f"{swagger_module._YamlLoader.__base__.__name__ if swagger_module.yaml else 'PyYAML not installed'}")
+        print("="*80)
+        results["load"] = benchmark_load(args)
+    if args.mode in ('all', 'suite'):
+        print("\n" + "="*80)
+        print("TEST SUITE BENCHMARK")
+        print(f"Tests: {args.suite_tests}")
+        print("="*80)
+        results["suite"] = benchmark_suite(args)
+
+    results_file = f"benchmark_spec_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(results_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nDetailed results saved to: {results_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import zlib
+
+# Supported artifact layouts
+ARTIFACT_FORMATS = ("jsonl", "jsonl.gz", "files")
+
+EXCHANGES_FILE = "exchanges.jsonl"
+# A header line ({"format", "file"}) then one [test id, offset...] entry per record
+INDEX_FILE = "exchanges.index.jsonl"
+# Index of runs written before the index was streamed: one JSON object held until close()
+LEGACY_INDEX_FILE = "exchanges.index.json"
+
+
+class ArtifactWriter:
+    """
+    Background writer for request/response artifacts.
+    Workers hand records to a bounded queue; a single writer thread drains it in
+    batches and appends them to one per-run JSONL file (optionally gzip), and each
+    batch's offsets to an index file, so a single test's exchange can be read back
+    with one seek while the writer's memory stays bounded on large suites.
+    The "files" format keeps the old <id>_request.json / <id>_response.json layout.
+    """
+
+    def __init__(self, run_dir, artifact_format="jsonl", queue_size=1000, batch_size=200):
+        if artifact_format not in ARTIFACT_FORMATS:
+            raise ValueError(f"Unknown artifact format '{artifact_format}', expected one of {ARTIFACT_FORMATS}")
+        self.run_dir = run_dir
+        self.artifact_format = artifact_format
+        self.batch_size = batch_size
+        self.records_written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = self._index_file = None
+        if artifact_format != "files":
+            name = EXCHANGES_FILE + (".gz" if artifact_format == "jsonl.gz" else "")
+            self.path = os.path.join(run_dir, name)
+            self._file = open(self.path, "wb")
+            self._index_file = open(os.path.join(run_dir, INDEX_FILE), "w")
+            self._index_file.write(json.dumps({"format": artifact_format, "file": name}) + "\n")
+        else:
+            self.path = run_dir
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, test_id, request_data, response_data, block=True):
+        """Queue one exchange; returns False if the queue is full and block is False"""
+        try:
+            self._queue.put((test_id, request_data, response_data), block=block)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        """Flush all queued records, stop the writer thread and close the files"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._file:
+            self._file.close()
+            self._index_file.close()
+        if self.error:
+            print(f"WARNING: Artifact writer error: {self.error}", flush=True)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            except Exception as e:  # keep draining so producers never block forever
+                self.error = str(e)
+
+    def _write_batch(self, batch):
+        if self.artifact_format == "files":
+            for test_id, request_data, response_data in batch:
+                with open(os.path.join(self.run_dir, f"{test_id}_request.json"), "w") as f:
+                    json.dump(request_data, f, indent=2)
+                with open(os.path.join(self.run_dir, f"{test_id}_response.json"), "w") as f:
+                    json.dump(response_data, f, indent=2)
+            self.records_written += len(batch)
+            return
+
+        lines = []
+        offsets = []
+        position = 0
+        for test_id, request_data, response_data in batch:
+            line = json.dumps({"id": test_id, "request": request_data, "response": response_data},
+                              separators=(",", ":")).encode("utf-8") + b"\n"
+            offsets.append((test_id, position, len(line)))
+            lines.append(line)
+            position += len(line)
+        data = b"".join(lines)
+
+        if self.artifact_format == "jsonl.gz":
+            # Each batch is its own gzip member: the index stores the member's file
+            # offset plus the record's offset inside the decompressed member
+            member_offset = self._file.tell()
+            self._file.write(gzip.compress(data, compresslevel=6))
+            entries = [[test_id, member_offset, offset, length] for test_id, offset, length in offsets]
+        else:
+            base = self._file.tell()
+            self._file.write(data)
+            entries = [[test_id, base + offset, length] for test_id, offset, length in offsets]
+        self._file.flush()
+        # Written after the records, so an entry never points past the end of the file
+        self._index_file.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries))
+        self._index_file.flush()
+        self.records_written += len(batch)
+
+
+# Parsed indexes of recently read runs, keyed by index path: (mtime, size, index)
+_index_cache = {}
+_index_cache_lock = threading.Lock()
+_INDEX_CACHE_SIZE = 8
+
+
+def _load_index(path, legacy):
+    """Parse a run's index into {"format", "file", "records": {test id: entry}}"""
+    with open(path) as f:
+        if legacy:
+            return json.load(f)
+        index = json.loads(f.readline())
+        records = {}
+        for line in f:
+            entry = json.loads(line)
+            records[entry[0]] = entry[1:]  # a test written more than once keeps its last record
+    index["records"] = records
+    return index
+
+
+def _find_index_entry(run_dir, test_id):
+    """
+    {"format", "file", "entry"} of a test from a run's index (entry is None if
+    the test has no record), or None for the per-file layout. Each index is
+    parsed once and cached until the file changes, so reading many exchanges
+    of one run costs one pass over its index rather than one per lookup.
+    """
+    for name, legacy in ((INDEX_FILE, False), (LEGACY_INDEX_FILE, True)):
+        path = os.path.join(run_dir, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        key = (st.st_mtime_ns, st.st_size)
+        with _index_cache_lock:
+            cached = _index_cache.get(path)
+        if cached is None or cached[0] != key:
+            cached = (key, _load_index(path, legacy))
+            with _index_cache_lock:
+                _index_cache.pop(path, None)
+                _index_cache[path] = cached
+                while len(_index_cache) > _INDEX_CACHE_SIZE:
+                    del _index_cache[next(iter(_index_cache))]
+        index = cached[1]
+        return {"format": index["format"], "file": index["file"], "entry": index["records"].get(test_id)}
+    return None
+
+
+def read_exchange(run_dir, test_id):
+    """
+    Look up the request/response exchange of one test in a run directory.
+    Returns {"id", "request", "response"} or None if the test has no artifact.
+    """
+    index = _find_index_entry(run_dir, test_id)
+    if index is None:
+        # Per-file layout
+        request_path = os.path.join(run_dir, f"{test_id}_request.json")
+        if not os.path.exists(request_path):
+            return None
+        with open(request_path) as f:
+            request_data = json.load(f)
+        with open(os.path.join(run_dir, f"{test_id}_response.json")) as f:
+            response_data = json.load(f)
+        return {"id": test_id, "request": request_data, "response": response_data}
+
+    entry = index["entry"]
+    if entry is None:
+        return None
+
+    with open(os.path.join(run_dir, index["file"]), "rb") as f:
+        if index["format"] == "jsonl.gz":
+            member_offset, offset, length = entry
+            f.seek(member_offset)
+            decompressor = zlib.decompressobj(wbits=31)
+            data = b""
+            while len(data) < offset + length and not decompressor.eof:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                data += decompressor.decompress(chunk)
+            line = data[offset:offset + length]
+        else:
+            offset, length = entry
+            f.seek(offset)
+            line = f.read(length)
+    return json.loads(line)
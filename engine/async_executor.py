@@ -0,0 +1,451 @@
+import asyncio
+import os
+import time
+
+from engine.artifacts import ArtifactWriter
+from engine.auth import TokenProvider
+from engine.budget import FailureBudget
+from engine.capture import BodyCapture, CHUNK_SIZE, DEFAULT_CAPTURE_LIMIT
+from engine.circuit import CircuitBreaker, circuit_key
+from engine.concurrency import AdaptiveLimiter
+from engine.ratelimit import RateLimiter, THROTTLE_STATUS_CODES, parse_retry_after, requeue_delay
+from engine.retry import HedgePolicy, RetryPolicy, hedged_call_async
+from engine.scheduler import DependencyScheduler, extract_values
+from engine.streaming import TestFeed
+from engine.timeouts import DEFAULT_LATENCY_HISTORY, TimeoutPolicy, test_timeout
+from engine.executor import (
+    prepare_request,
+    build_result,
+    build_error_result,
+    build_skipped_result,
+    build_timings,
+    login_endpoint_url,
+    print_execution_header,
+    print_progress,
+    print_execution_summary,
+)
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, only needed for the async engine
+    aiohttp = None
+
+
+def _connection_trace():
+    """
+    aiohttp trace hooks that record, per request, whether a new connection was
+    opened and when each phase (DNS, connect, response headers) finished
+    """
+    trace = aiohttp.TraceConfig()
+
+    def mark(name):
+        async def hook(session, ctx, params):
+            ctx.trace_request_ctx[name] = time.perf_counter()
+        return hook
+
+    async def on_connection_create_end(session, ctx, params):
+        ctx.trace_request_ctx["reused"] = False
+        ctx.trace_request_ctx["connection_create_end"] = time.perf_counter()
+
+    async def on_connection_reuseconn(session, ctx, params):
+        ctx.trace_request_ctx["reused"] = True
+
+    trace.on_request_start.append(mark("request_start"))
+    trace.on_dns_resolvehost_start.append(mark("dns_start"))
+    trace.on_dns_resolvehost_end.append(mark("dns_end"))
+    trace.on_connection_create_start.append(mark("connection_create_start"))
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace.on_request_end.append(mark("request_end"))
+    return trace
+
+
+def _trace_phases(trace_ctx):
+    """dns/connect timings (ms) of a newly opened connection; aiohttp's connect includes TLS"""
+    phases = {}
+    if "dns_start" in trace_ctx and "dns_end" in trace_ctx:
+        phases["dns_ms"] = (trace_ctx["dns_end"] - trace_ctx["dns_start"]) * 1000
+    if "connection_create_start" in trace_ctx and "connection_create_end" in trace_ctx:
+        create_ms = (trace_ctx["connection_create_end"] - trace_ctx["connection_create_start"]) * 1000
+        phases.setdefault("dns_ms", 0.0)
+        phases["connect_ms"] = max(0.0, create_ms - phases["dns_ms"])
+        phases["tls_ms"] = None
+    return phases
+
+
+async def send_request_async(session, test, url, headers, body_json, capture_limit=DEFAULT_CAPTURE_LIMIT,
+                             timeout=None):
+    """
+    Send one request and stream its response body into a BodyCapture.
+    timeout is a (connect, read) tuple in seconds, or None for the session's.
+    Returns (status, headers, capture, charset, headers_at, trace_ctx);
+    headers_at is the perf_counter time the response headers arrived.
+    """
+    trace_ctx = {}
+    kwargs = {"headers": headers, "trace_request_ctx": trace_ctx}
+    if body_json is not None:
+        kwargs["json"] = body_json
+    if timeout is not None:
+        kwargs["timeout"] = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+    async with session.request(test["method"], url, **kwargs) as r:
+        headers_at = time.perf_counter()
+        capture = BodyCapture(capture_limit)
+        async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+            capture.feed(chunk)
+        return r.status, dict(r.headers), capture, r.charset, headers_at, trace_ctx
+
+
+async def execute_single_test_async(session, test, api_key, base_url, artifact_writer, counters, rate_limiter=None,
+                                    capture_limit=DEFAULT_CAPTURE_LIMIT, circuit_breaker=None, retry_policy=None,
+                                    hedge_policy=None, timeout_policy=None, auth_provider=None):
+    """Execute a single test case on the event loop; returns the same result dict as execute_single_test"""
+    # The token comes first: a login failure after allow() made this test the
+    # half-open probe would leave the circuit half-open for the rest of the run
+    token = None
+    if auth_provider:
+        try:
+            token = await auth_provider.get_async() if test["auth"] == "valid" else "invalid"
+        except Exception as e:
+            return build_error_result(test, base_url + test["endpoint"], e)
+    endpoint_key = circuit_key(test)
+    if circuit_breaker and not circuit_breaker.allow(endpoint_key):
+        return build_skipped_result(test, base_url + test["endpoint"], "circuit open")
+    url, headers, body_json, request_data = prepare_request(test, api_key, base_url, token)
+
+    # Tests without their own timeout or a policy keep the session's 30s total
+    timeout = timeout_policy.timeout_for(test) if timeout_policy else (
+        test_timeout(test) if "timeout" in test else None)
+    attempt = 0
+    hedged = hedge_won = auth_refreshed = False
+    while True:
+        # Wait for a token before the clock starts so throttling is not counted as latency
+        if rate_limiter:
+            delay = rate_limiter.reserve(url, test["endpoint"])
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        start = time.perf_counter()
+        error = status_code = response_headers = None
+        try:
+            hedge_after = hedge_policy.hedge_after(test) if hedge_policy else None
+            if hedge_after is not None:
+                response, hedged, hedge_won = await hedged_call_async(
+                    lambda: send_request_async(session, test, url, headers, body_json, capture_limit, timeout),
+                    hedge_after)
+            else:
+                response = await send_request_async(session, test, url, headers, body_json, capture_limit, timeout)
+            status_code, response_headers, capture, charset, headers_at, trace_ctx = response
+        except Exception as e:
+            error = e
+        total_s = time.perf_counter() - start
+        if circuit_breaker:
+            circuit_breaker.record(endpoint_key, failure=isinstance(
+                error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)))
+
+        if (status_code == 401 and test["auth"] == "valid" and auth_provider
+                and not auth_refreshed and test.get("expected_status") != 401):
+            # The shared token was rejected: refresh it (once across workers) and resend
+            auth_provider.invalidate(token)
+            auth_refreshed = True
+            try:
+                token = await auth_provider.get_async()
+            except Exception as e:
+                error = e
+                break
+            url, headers, body_json, request_data = prepare_request(test, api_key, base_url, token)
+            continue
+
+        delay = None
+        if retry_policy:
+            delay = retry_policy.backoff(test, attempt, error, status_code,
+                                         response_headers.get("Retry-After") if response_headers else None)
+        if delay is None:
+            break
+        reason = f"ERROR - {error}" if error is not None else status_code
+        print(f"[RETRY] {test['test_name']}: {reason}, retry {attempt + 1} in {delay:.2f}s", flush=True)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+    if error is not None:
+        result = build_error_result(test, url, error)
+        result["elapsed_ms"] = round(total_s * 1000, 3)
+    else:
+        body = capture.text(charset)
+        connection_reused = trace_ctx.get("reused", True)
+        counters["requests"] += 1
+        if connection_reused:
+            counters["reused"] += 1
+
+        response_data = {
+            "status_code": status_code,
+            "headers": response_headers,
+            "body": body,
+            **capture.artifact_fields()
+        }
+        # Only wait (off the loop) when the writer's queue is full
+        if not artifact_writer.write(test["id"], request_data, response_data, block=False):
+            await asyncio.get_running_loop().run_in_executor(
+                None, artifact_writer.write, test["id"], request_data, response_data
+            )
+
+        result = build_result(test, url, status_code)
+        result["timings"] = build_timings(total_s, headers_at - start, _trace_phases(trace_ctx), connection_reused)
+        result["elapsed_ms"] = result["timings"]["total_ms"]
+        result.update(capture.result_fields())
+        result["connection_reused"] = connection_reused
+        if status_code in THROTTLE_STATUS_CODES:
+            result["retry_after"] = parse_retry_after(response_headers.get("Retry-After"))
+        if test.get("extract") and 200 <= status_code < 300:
+            result["extracted"] = extract_values(test["extract"], body, body_json)
+        if hedge_policy:
+            hedge_policy.observe(test, result["elapsed_ms"])
+        if timeout_policy:
+            timeout_policy.observe(test, result["elapsed_ms"])
+
+    if attempt:
+        result["retries"] = attempt
+        retry_policy.record(result)
+    if auth_refreshed:
+        result["auth_refreshed"] = True
+    if hedged:
+        hedge_policy.record(hedge_won)
+        result["hedged"] = True
+        result["hedge_won"] = hedge_won
+    return result
+
+
+async def execute_tests_async(tests, api_key, base_url, run_id, max_concurrency=500, per_host_limit=100, stats=None,
+                              artifact_format="jsonl", adaptive=False, min_concurrency=1,
+                              rate_limit=None, rate_limit_rules=None, max_requeues=3,
+                              dependencies=False, swagger=None, window=None, result_sink=None,
+                              capture_limit=DEFAULT_CAPTURE_LIMIT, circuit_threshold=5, circuit_reset=30.0,
+                              retries=0, hedge=False, adaptive_timeouts=False,
+                              latency_history=DEFAULT_LATENCY_HISTORY, timeout_multiplier=3.0, timeout_floor=1.0,
+                              timeout_ceiling=120.0, login_url=None, login_credentials=None, token_field=None,
+                              auth_provider=None, max_failures=None, max_failure_rate=None, failure_min_sample=20):
+    """
+    Execute tests concurrently on a single asyncio event loop using aiohttp.
+    max_concurrency caps the total in-flight requests; per_host_limit caps the
+    open connections (and therefore in-flight requests) per target host.
+    With adaptive=True the in-flight limit is tuned between min_concurrency
+    and max_concurrency from observed latency and error/429 rates.
+    rate_limit, rate_limit_rules, max_requeues, dependencies, swagger, window,
+    result_sink, capture_limit, circuit_threshold, circuit_reset, retries,
+    hedge, the adaptive timeout options, the login options (or auth_provider)
+    and the failure budget (max_failures, max_failure_rate, failure_min_sample)
+    behave as in execute_tests.
+    Produces the same result dicts and artifacts as execute_tests.
+    """
+    if aiohttp is None:
+        raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)")
+
+    base_url = base_url.rstrip("/")
+    run_dir = os.path.join("artifacts", run_id)
+    os.makedirs(run_dir, exist_ok=True)
+
+    if dependencies and not isinstance(tests, list):
+        # the scheduler has to see every test up front
+        print("WARNING: dependencies need the whole suite; loading the streamed tests into memory", flush=True)
+        tests = list(tests)
+    total = len(tests) if hasattr(tests, "__len__") else None
+    results = []
+    completed_count = 0
+    passed_count = 0
+    failed_count = 0
+    limit_label = f"adaptive {min_concurrency}-{max_concurrency}" if adaptive else max_concurrency
+    api_key = print_execution_header(total, api_key, base_url, run_dir, "Max Concurrency",
+                                     f"{limit_label} (per host: {per_host_limit})")
+
+    start_time = time.time()
+    counters = {"requests": 0, "reused": 0}
+    global_limit = asyncio.Semaphore(max_concurrency)
+    artifact_writer = ArtifactWriter(run_dir, artifact_format)
+    limiter = AdaptiveLimiter(min_concurrency, max_concurrency) if adaptive else None
+    limiter_gate = asyncio.Condition()
+    rate_limiter = RateLimiter(rate_limit, rate_limit_rules)
+    scheduler = DependencyScheduler(tests, swagger) if dependencies else None
+    circuit_breaker = CircuitBreaker(circuit_threshold, circuit_reset) if circuit_threshold else None
+    retry_policy = RetryPolicy(retries) if retries else None
+    hedge_policy = HedgePolicy() if hedge else None
+    timeout_policy = TimeoutPolicy(latency_history, timeout_multiplier, timeout_floor,
+                                   timeout_ceiling) if adaptive_timeouts else None
+    if auth_provider is None and login_url:
+        auth_provider = TokenProvider(login_endpoint_url(login_url, base_url), login_credentials, token_field)
+    budget = None
+    if max_failures is not None or max_failure_rate is not None:
+        budget = FailureBudget(max_failures, max_failure_rate, failure_min_sample)
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_limit)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     trace_configs=[_connection_trace()]) as session:
+
+        async def run_attempt(test):
+            async with global_limit:
+                started.add(asyncio.current_task())
+                if not limiter:
+                    return await execute_single_test_async(session, test, api_key, base_url, artifact_writer,
+                                                           counters, rate_limiter, capture_limit,
+                                                           circuit_breaker, retry_policy, hedge_policy, timeout_policy,
+                                                           auth_provider)
+
+                async with limiter_gate:
+                    await limiter_gate.wait_for(limiter.try_acquire)
+                result = None
+                try:
+                    result = await execute_single_test_async(session, test, api_key, base_url, artifact_writer,
+                                                             counters, rate_limiter, capture_limit,
+                                                             circuit_breaker, retry_policy, hedge_policy,
+                                                             timeout_policy, auth_provider)
+                    return result
+                finally:
+                    # Released even if the test raised, or the limiter would stay short of a slot
+                    elapsed_ms = result.get("elapsed_ms") if result else None
+                    limiter.release(elapsed_ms / 1000 if elapsed_ms is not None else None,
+                                    status_code=result.get("actual") if result else None,
+                                    error=result is None or ("error" in result and not result.get("skipped")))
+                    async with limiter_gate:
+                        limiter_gate.notify_all()
+
+        async def run_one(test):
+            attempts = 0
+            while True:
+                result = await run_attempt(test)
+                delay = requeue_delay(test, result, attempts, max_requeues)
+                if delay is None:
+                    if attempts:
+                        result["requeues"] = attempts
+                    return result
+                # Re-queue outside the concurrency slots; the paused buckets hold it back
+                print(f"[THROTTLED] {test['test_name']}: {result['actual']}, re-queued in {delay:.1f}s", flush=True)
+                rate_limiter.pause(result["url"], test["endpoint"], delay)
+                attempts += 1
+
+        # Finished tasks are pushed here so dependent tests can be started as they unblock
+        completed = asyncio.Queue()
+        # Tasks not yet collected, and those past the concurrency limit (an abort lets them finish)
+        tasks = set()
+        started = set()
+
+        def spawn(test):
+            task = asyncio.ensure_future(run_one(test))
+            tasks.add(task)
+            task.add_done_callback(lambda t: completed.put_nowait((test, t)))
+
+        # Tests not yet started; at most `window` tasks exist at a time
+        pending = iter(scheduler.initial_tests() if scheduler else tests)
+        # A TestFeed is polled (never waited on, which would block the loop) and wakes it up when tests arrive
+        feed = tests if isinstance(tests, TestFeed) else None
+        if feed:
+            loop = asyncio.get_running_loop()
+
+            def wake():
+                try:
+                    loop.call_soon_threadsafe(completed.put_nowait, None)
+                except RuntimeError:
+                    pass  # the run is over and its loop closed
+
+            feed.on_ready(wake)
+        in_flight = 0
+        aborted = False
+
+        def fill():
+            nonlocal in_flight
+            while (window is None or in_flight < window) and not aborted:
+                test = feed.poll() if feed else next(pending, None)
+                if test is None:
+                    return
+                spawn(test)
+                in_flight += 1
+
+        fill()
+        while in_flight or (feed and not feed.exhausted and not aborted):
+            item = await completed.get()
+            if item is None:
+                fill()  # the feed has new tests
+                continue
+            test, task = item
+            tasks.discard(task)
+            started.discard(task)
+            in_flight -= 1
+            if task.cancelled():
+                continue
+            try:
+                result = task.result()
+            except Exception as e:
+                print(f"[{completed_count + 1}/{total or '?'}] ERROR: {test['test_name']}: EXCEPTION - {str(e)}", flush=True)
+                result = {
+                    "id": test["id"],
+                    "name": test["test_name"],
+                    "passed": False,
+                    "error": str(e),
+                    "url": base_url + test["endpoint"]
+                }
+            completed_count += 1
+            if result_sink:
+                result_sink.add(result, test)
+            else:
+                results.append(result)
+            if result.get("passed"):
+                passed_count += 1
+            else:
+                failed_count += 1
+            print_progress(completed_count, total, passed_count, failed_count)
+            if budget and budget.record(result):
+                aborted = True
+                queued = [t for t in tasks if t not in started]
+                for t in queued:
+                    t.cancel()
+                print(f"[ABORTED] Failure budget exceeded: {budget.reason}; cancelled {len(queued)} queued tests, "
+                      f"draining {in_flight - len(queued)} in flight", flush=True)
+            if scheduler and not aborted:
+                for ready in scheduler.complete(test, result):
+                    spawn(ready)
+                    in_flight += 1
+            fill()
+        if feed:
+            feed.on_ready(None)
+
+    await asyncio.get_running_loop().run_in_executor(None, artifact_writer.close)
+    if timeout_policy:
+        timeout_policy.save()
+    elapsed_time = time.time() - start_time
+    sent = counters["requests"]
+    reused = counters["reused"]
+    connection_stats = {
+        "sessions": 1,
+        "requests": sent,
+        "connections_opened": sent - reused,
+        "connections_reused": reused,
+        "reuse_ratio": (reused / sent) if sent else 0.0
+    }
+    if stats is not None:
+        stats["engine"] = "async"
+        stats["connections"] = connection_stats
+        stats["concurrency"] = limiter.stats() if limiter else {"mode": "fixed", "max_limit": max_concurrency}
+        stats["throttling"] = rate_limiter.stats()
+        if scheduler:
+            stats["dependencies"] = scheduler.stats()
+        if circuit_breaker:
+            stats["circuit_breaker"] = circuit_breaker.stats()
+        if retry_policy:
+            stats["retries"] = retry_policy.stats()
+        if hedge_policy:
+            stats["hedging"] = hedge_policy.stats()
+        if timeout_policy:
+            stats["timeouts"] = timeout_policy.stats()
+        if auth_provider:
+            stats["auth"] = auth_provider.stats()
+        if budget:
+            stats["failure_budget"] = budget.stats()
+        if aborted:
+            stats["aborted"] = budget.abort_stats(total)
+    if limiter:
+        print(f"Adaptive concurrency: final limit {limiter.limit} "
+              f"({limiter.increases} increases, {limiter.decreases} decreases)", flush=True)
+
+    print_execution_summary(passed_count, failed_count, elapsed_time, connection_stats)
+    if aborted:
+        print(f"RUN ABORTED: {budget.reason}", flush=True)
+    return results
+
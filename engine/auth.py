@@ -0,0 +1,176 @@
+import asyncio
+import base64
+import json
+import time
+from threading import Condition
+
+import requests
+
+# Response fields tried, in order, when no token_field is configured
+TOKEN_FIELDS = ("access_token", "token", "id_token", "accessToken", "jwt")
+
+
+def _lookup(data, path):
+    """Value at a dotted path ("data.token") in parsed JSON, or None"""
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def parse_credentials(value):
+    """Login request body from a JSON string or "@path/to/file.json" (None if empty)"""
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    if value.startswith("@"):
+        with open(value[1:], "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def jwt_expiry(token):
+    """Seconds until a JWT's exp claim (unverified), or None if the token is not a JWT with exp"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenProvider:
+    """
+    Bearer token shared by all executor workers.
+    The login endpoint is called once (POST with the credentials as JSON) and
+    the token is cached until refresh_margin seconds before it expires
+    (expires_in in the login response, else the JWT exp claim, else
+    default_ttl; no expiry means it is kept until a 401). Refreshes are
+    single-flight: one caller logs in while the others wait, or keep using
+    the current token while it is still valid. After a failed login, callers
+    get the same error for retry_delay seconds instead of retrying the login.
+    """
+
+    def __init__(self, login_url, credentials=None, token_field=None, expires_field="expires_in",
+                 refresh_margin=30.0, default_ttl=None, retry_delay=5.0, timeout=30):
+        self.login_url = login_url
+        self.credentials = credentials or {}
+        self.token_field = token_field
+        self.expires_field = expires_field
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self._cond = Condition()
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._refreshing = False
+        self._error = None
+        self._error_until = 0.0
+        self.logins = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.failures = 0
+
+    def _login(self):
+        """Call the login endpoint; returns (token, ttl seconds or None)"""
+        r = requests.post(self.login_url, json=self.credentials, timeout=self.timeout,
+                          headers={"accept": "application/json"})
+        r.raise_for_status()
+        try:
+            data = r.json()
+        except ValueError:
+            data = None
+        if self.token_field:
+            token = _lookup(data, self.token_field)
+        else:
+            token = next((data[f] for f in TOKEN_FIELDS if isinstance(data, dict) and data.get(f)), None)
+        if not token and not self.token_field and r.text.strip() and data is None:
+            token = r.text.strip()  # plain-text token body
+        if not token:
+            raise RuntimeError(f"Login response from {self.login_url} has no token "
+                               f"(field: {self.token_field or ', '.join(TOKEN_FIELDS)})")
+        ttl = _lookup(data, self.expires_field) if isinstance(data, dict) else None
+        if not isinstance(ttl, (int, float)):
+            ttl = jwt_expiry(str(token))
+        if ttl is None:
+            ttl = self.default_ttl
+        return str(token), ttl
+
+    def get(self):
+        """Current token, logging in (once across all workers) when it is missing or about to expire"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._token and now < self._refresh_at:
+                    return self._token
+                if not self._refreshing:
+                    if self._error and now < self._error_until:
+                        raise self._error
+                    break
+                if self._token and now < self._expires_at:
+                    return self._token  # still valid while another worker refreshes it
+                self._cond.wait()
+            refresh = self._token is not None
+            self._refreshing = True
+
+        try:
+            token, ttl = self._login()
+        except Exception as e:
+            with self._cond:
+                self._refreshing = False
+                self.failures += 1
+                self._error = RuntimeError(f"Login to {self.login_url} failed: {e}")
+                self._error_until = time.monotonic() + self.retry_delay
+                self._cond.notify_all()
+                raise self._error
+
+        with self._cond:
+            now = time.monotonic()
+            self._token = token
+            if ttl is None:
+                self._expires_at = self._refresh_at = float("inf")
+            else:
+                self._expires_at = now + ttl
+                self._refresh_at = self._expires_at - min(self.refresh_margin, ttl / 2)
+            self._refreshing = False
+            self._error = None
+            self.logins += 1
+            if refresh:
+                self.refreshes += 1
+            self._cond.notify_all()
+            return token
+
+    def current(self):
+        """Cached token if it needs no refresh, else None (lets async callers skip the thread hop)"""
+        with self._cond:
+            if self._token and time.monotonic() < self._refresh_at:
+                return self._token
+            return None
+
+    async def get_async(self):
+        """get() for the event loop: a login or refresh runs off the loop, since get() blocks while one is in flight"""
+        token = self.current()
+        if token is None:
+            token = await asyncio.get_running_loop().run_in_executor(None, self.get)
+        return token
+
+    def invalidate(self, token):
+        """Drop a token the server rejected (401); a no-op if it was already replaced"""
+        with self._cond:
+            if token and token == self._token and self._expires_at:
+                self._expires_at = self._refresh_at = 0.0
+                self.invalidations += 1
+
+    def stats(self):
+        """Token statistics for the run metadata"""
+        with self._cond:
+            return {
+                "login_url": self.login_url,
+                "logins": self.logins,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "failures": self.failures
+            }
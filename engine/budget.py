@@ -0,0 +1,74 @@
+import re
+
+_BUDGET = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(%?)\s*$")
+
+
+def parse_failure_budget(spec):
+    """
+    Parse a failure budget: "25" (failed tests) or "10%" (share of completed
+    tests) into (max_failures, max_failure_rate); (None, None) if empty
+    """
+    if spec is None or str(spec).strip() == "":
+        return None, None
+    match = _BUDGET.match(str(spec))
+    if not match:
+        raise ValueError(f"Invalid failure budget '{spec}', expected a count (25) or a percentage (10%)")
+    if match.group(2):
+        return None, float(match.group(1)) / 100
+    return int(float(match.group(1))), None
+
+
+class FailureBudget:
+    """
+    Failure budget of a run: it is exceeded once max_failures tests have
+    failed, or once more than max_failure_rate (0-1) of the completed tests
+    have failed after at least min_sample completions. Tests skipped by an
+    open circuit count as failures, as they do in the run summary.
+    """
+
+    def __init__(self, max_failures=None, max_failure_rate=None, min_sample=20):
+        self.max_failures = max_failures
+        self.max_failure_rate = max_failure_rate
+        self.min_sample = min_sample
+        self.completed = 0
+        self.failed = 0
+        self.reason = None
+
+    @property
+    def exceeded(self):
+        return self.reason is not None
+
+    def record(self, result):
+        """Count a finished test; returns True once, when it exceeds the budget"""
+        self.completed += 1
+        if not result.get("passed"):
+            self.failed += 1
+        if self.reason is not None:
+            return False
+        if self.max_failures is not None and self.failed >= self.max_failures:
+            self.reason = f"{self.failed} failed tests (budget {self.max_failures})"
+        elif (self.max_failure_rate is not None and self.completed >= self.min_sample
+              and self.failed / self.completed > self.max_failure_rate):
+            self.reason = (f"{self.failed}/{self.completed} tests failed "
+                           f"({self.failed / self.completed:.0%} > {self.max_failure_rate:.0%})")
+        return self.reason is not None
+
+    def abort_stats(self, total=None):
+        """Why and where an aborted run stopped; total is the suite size, if known"""
+        return {
+            "reason": f"Failure budget exceeded: {self.reason}",
+            "completed": self.completed,
+            "failed": self.failed,
+            "not_run": total - self.completed if total is not None else None
+        }
+
+    def stats(self):
+        """Budget settings and usage for the run metadata"""
+        return {
+            "max_failures": self.max_failures,
+            "max_failure_rate": self.max_failure_rate,
+            "min_sample": self.min_sample,
+            "completed": self.completed,
+            "failed": self.failed,
+            "exceeded": self.exceeded
+        }
@@ -0,0 +1,57 @@
+import hashlib
+
+# Bytes of each response body kept for artifacts and assertions
+DEFAULT_CAPTURE_LIMIT = 1024 * 1024
+
+# Read size when streaming response bodies
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyCapture:
+    """
+    Incremental response body capture.
+    Chunks are fed as they arrive: the first `limit` bytes are kept, the rest
+    is only counted and hashed, so the byte count and SHA-256 describe the
+    full body while memory stays bounded by the limit.
+    """
+
+    def __init__(self, limit=DEFAULT_CAPTURE_LIMIT):
+        self.limit = max(0, limit)
+        self.total_bytes = 0
+        self._chunks = []
+        self._kept = 0
+        self._sha256 = hashlib.sha256()
+
+    def feed(self, chunk):
+        self.total_bytes += len(chunk)
+        self._sha256.update(chunk)
+        if self._kept < self.limit:
+            keep = chunk[:self.limit - self._kept]
+            self._chunks.append(keep)
+            self._kept += len(keep)
+
+    @property
+    def truncated(self):
+        return self.total_bytes > self._kept
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    def text(self, encoding):
+        """Captured bytes decoded with the response encoding (a cut multi-byte char is replaced)"""
+        return b"".join(self._chunks).decode(encoding or "utf-8", errors="replace")
+
+    def artifact_fields(self):
+        """Full-body size and hash for the response artifact"""
+        fields = {"body_bytes": self.total_bytes, "body_sha256": self.sha256}
+        if self.truncated:
+            fields["body_truncated"] = True
+        return fields
+
+    def result_fields(self):
+        """Full-body size and hash for the test result"""
+        fields = {"response_bytes": self.total_bytes, "response_sha256": self.sha256}
+        if self.truncated:
+            fields["response_truncated"] = True
+        return fields
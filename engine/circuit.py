@@ -0,0 +1,81 @@
+import time
+from threading import Lock
+
+
+def circuit_key(test):
+    """Endpoint a test belongs to for circuit breaking: its path template, else its path"""
+    return test.get("path") or test["endpoint"].split("?", 1)[0]
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker shared by all executor workers.
+    After failure_threshold consecutive connection errors or timeouts on an
+    endpoint its circuit opens and further tests on it are skipped at once
+    instead of waiting out the request timeout. Once reset_timeout seconds
+    have passed a single probe is let through (half-open): a response closes
+    the circuit again, another failure re-opens it for reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = Lock()
+        self._circuits = {}
+        self.trips = 0
+        self.skipped = 0
+
+    def _circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = {"state": "closed", "failures": 0, "opened_at": 0.0,
+                                             "trips": 0, "skipped": 0}
+        return circuit
+
+    def allow(self, key):
+        """True if a test on the endpoint may run now (the caller may be the half-open probe)"""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit["state"] == "closed":
+                return True
+            if circuit["state"] == "open" and time.monotonic() - circuit["opened_at"] >= self.reset_timeout:
+                circuit["state"] = "half_open"
+                print(f"[CIRCUIT HALF-OPEN] {key}: probing", flush=True)
+                return True
+            circuit["skipped"] += 1
+            self.skipped += 1
+            return False
+
+    def record(self, key, failure):
+        """Feed the outcome of a test that ran: failure=True for a connection error or timeout"""
+        with self._lock:
+            circuit = self._circuit(key)
+            if not failure:
+                if circuit["state"] != "closed":
+                    print(f"[CIRCUIT CLOSED] {key}: backend recovered", flush=True)
+                circuit["state"] = "closed"
+                circuit["failures"] = 0
+                return
+            circuit["failures"] += 1
+            if circuit["state"] == "half_open" or (
+                    circuit["state"] == "closed" and circuit["failures"] >= self.failure_threshold):
+                circuit["state"] = "open"
+                circuit["opened_at"] = time.monotonic()
+                circuit["trips"] += 1
+                self.trips += 1
+                print(f"[CIRCUIT OPEN] {key}: {circuit['failures']} consecutive connection failures, "
+                      f"skipping for {self.reset_timeout:g}s", flush=True)
+
+    def stats(self):
+        """Circuit breaker statistics for the run metadata"""
+        with self._lock:
+            return {
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_s": self.reset_timeout,
+                "trips": self.trips,
+                "skipped": self.skipped,
+                "endpoints": {
+                    key: {"state": c["state"], "trips": c["trips"], "skipped": c["skipped"]}
+                    for key, c in sorted(self._circuits.items()) if c["trips"]
+                }
+            }
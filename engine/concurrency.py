@@ -0,0 +1,110 @@
+import math
+import time
+from threading import Condition
+
+# Status codes that signal the target is overloaded
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD (additive increase / multiplicative decrease) limit on in-flight requests.
+    The limit starts small and doubles per window of healthy responses (slow start)
+    until the first sign of overload, then grows by one per window. Errors, 429/503
+    responses, or smoothed latency above latency_tolerance x the best observed
+    latency cut the limit by backoff, at most once per round trip. Every change is appended to
+    timeline so reports can chart the concurrency over the run.
+    """
+
+    def __init__(self, min_limit=1, max_limit=64, initial_limit=None, backoff=0.5, latency_tolerance=2.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        if initial_limit is None:
+            initial_limit = min(self.max_limit, max(self.min_limit, 4))
+        self.limit = initial_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.slow_start = True
+        self.min_latency = None
+        self.smoothed_latency = None
+        self.increases = 0
+        self.decreases = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._start = time.monotonic()
+        self._cond = Condition()
+        self.timeline = [{"t": 0.0, "limit": self.limit}]
+
+    def try_acquire(self):
+        """Take a slot if one is free; returns True on success"""
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block the calling thread until a slot is free"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    def release(self, latency, status_code=None, error=False):
+        """Free a slot and feed the request's outcome into the limit"""
+        with self._cond:
+            self.in_flight -= 1
+            if latency is None and status_code is None and not error:
+                # Nothing was sent (e.g. a skipped test): no signal about the target
+                self._cond.notify_all()
+                return
+            now = time.monotonic()
+            if latency is not None and not error:
+                self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+                self.smoothed_latency = latency if self.smoothed_latency is None else (
+                    0.8 * self.smoothed_latency + 0.2 * latency)
+
+            # Latencies under 5 ms are treated as equal so loopback jitter is not overload
+            overloaded = error or status_code in OVERLOAD_STATUS_CODES or (
+                self.smoothed_latency is not None
+                and self.smoothed_latency > self.latency_tolerance * max(self.min_latency, 0.005))
+
+            if overloaded:
+                # Requests already in flight were sent under the old limit; only
+                # react once per round trip so a burst of bad responses is one cut
+                round_trip = self.smoothed_latency or latency or 0.0
+                if now - self._last_decrease >= round_trip:
+                    self._set_limit(max(self.min_limit, math.floor(self.limit * self.backoff)), now)
+                    self.decreases += 1
+                    self._last_decrease = now
+                    self.slow_start = False
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    new_limit = self.limit * 2 if self.slow_start else self.limit + 1
+                    self._set_limit(min(self.max_limit, new_limit), now)
+                    self.increases += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def _set_limit(self, limit, now):
+        if limit != self.limit:
+            self.limit = limit
+            self.timeline.append({"t": round(now - self._start, 3), "limit": limit})
+
+    def stats(self):
+        """Summary of the limiter for the run metadata"""
+        with self._cond:
+            limits = [point["limit"] for point in self.timeline]
+            timeline = self.timeline + [{"t": round(time.monotonic() - self._start, 3), "limit": self.limit}]
+            return {
+                "mode": "adaptive",
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "final_limit": self.limit,
+                "peak_limit": max(limits),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "timeline": timeline
+            }
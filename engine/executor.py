@@ -1,9 +1,26 @@
 
 import requests, os, json
+import queue
 import time
+import socket
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, local
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from engine.artifacts import ArtifactWriter
+from engine.auth import TokenProvider
+from engine.budget import FailureBudget
+from engine.capture import BodyCapture, CHUNK_SIZE, DEFAULT_CAPTURE_LIMIT
+from engine.circuit import CircuitBreaker, circuit_key
+from engine.concurrency import AdaptiveLimiter
+from engine.http2 import Http2SessionPool, transport_errors
+from engine.ratelimit import RateLimiter, THROTTLE_STATUS_CODES, parse_retry_after, requeue_delay
+from engine.retry import HedgePolicy, RetryPolicy, hedged_call
+from engine.scheduler import DependencyScheduler, extract_values
+from engine.streaming import TestFeed
+from engine.timeouts import DEFAULT_LATENCY_HISTORY, DEFAULT_TIMEOUT, TimeoutPolicy, test_timeout
 
 # Configure stdout to handle encoding errors gracefully on Windows
 if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
@@ -11,11 +28,154 @@ if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, errors='replace')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, errors='replace')
 
-# Thread-safe lock for file writing
+# Thread-safe lock for file writing when no ArtifactWriter is used
 file_lock = Lock()
 
-def execute_single_test(test, api_key, base_url, run_dir):
-    """Execute a single test case"""
+
+# Per-thread record of the connection opened (if any) by the current request
+_connection_state = local()
+
+
+class _ConnectionTimingMixin:
+    """
+    Times DNS resolution, TCP connect and TLS handshake of new connections and
+    stores them on the calling thread, so the request that triggered the
+    connect can report them. A request that opens no socket reused one.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        dns_start = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(host, self.port, type=socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            address = None  # let urllib3 raise its usual resolution error
+        connect_start = time.perf_counter()
+        if address:
+            self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        _connection_state.phases = {
+            "dns_ms": (connect_start - dns_start) * 1000,
+            "connect_ms": (time.perf_counter() - connect_start) * 1000
+        }
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connection_state.opened = True
+        phases = getattr(_connection_state, "phases", None) or {}
+        if isinstance(self, HTTPSConnection):
+            total_ms = (time.perf_counter() - start) * 1000
+            phases["tls_ms"] = max(0.0, total_ms - phases.get("dns_ms", 0.0) - phases.get("connect_ms", 0.0))
+        _connection_state.phases = phases
+
+
+class _TrackedHTTPConnection(_ConnectionTimingMixin, HTTPConnection):
+    pass
+
+
+class _TrackedHTTPSConnection(_ConnectionTimingMixin, HTTPSConnection):
+    pass
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report when a new socket is opened"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool
+        }
+
+
+class SessionPool:
+    """
+    Keep-alive HTTP sessions shared by the executor workers.
+    Each worker thread gets its own requests.Session (Session objects are not
+    thread-safe), mounted with an adapter sized to the worker count so
+    connections are reused across tests instead of reconnecting every time.
+    """
+
+    def __init__(self, max_workers=10):
+        self.max_workers = max_workers
+        self._local = local()
+        self._sessions = []
+        self._lock = Lock()
+        self.requests_sent = 0
+        self.connections_reused = 0
+
+    def get(self):
+        """Return the calling thread's session, creating it on first use"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = PooledHTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def begin(self):
+        """Mark the start of a request on the calling thread"""
+        _connection_state.opened = False
+        _connection_state.phases = {}
+
+    def finish(self):
+        """
+        Record the request started by begin().
+        Returns (reused, phases): whether no new connection was opened, and the
+        dns_ms/connect_ms/tls_ms timings of the connection that was opened.
+        """
+        reused = not getattr(_connection_state, "opened", False)
+        phases = getattr(_connection_state, "phases", None) or {}
+        with self._lock:
+            self.requests_sent += 1
+            if reused:
+                self.connections_reused += 1
+        return reused, phases
+
+    def stats(self):
+        """Connection reuse statistics across all worker sessions"""
+        with self._lock:
+            sent = self.requests_sent
+            reused = self.connections_reused
+        return {
+            "sessions": len(self._sessions),
+            "requests": sent,
+            "connections_opened": sent - reused,
+            "connections_reused": reused,
+            "reuse_ratio": (reused / sent) if sent else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+
+
+def prepare_request(test, api_key, base_url, auth_token=None):
+    """
+    Build the request for a test case.
+    Returns (url, headers, body_json, request_data) where request_data is the
+    artifact record of the request. auth_token, if given, is sent as a
+    Bearer Authorization header (unless the test sets its own).
+    """
     headers = dict(test.get("headers", {}))
     # Ensure required headers are present
     if "accept" not in headers:
@@ -27,6 +187,8 @@ def execute_single_test(test, api_key, base_url, run_dir):
     elif test["auth"] != "valid":
         # For invalid auth tests, use invalid API key
         headers["api_key"] = "invalid"
+    if auth_token and "Authorization" not in headers:
+        headers["Authorization"] = f"Bearer {auth_token}"
 
     url = base_url + test["endpoint"]
 
@@ -43,87 +205,311 @@ def execute_single_test(test, api_key, base_url, run_dir):
         body_json = test["body"]
         request_data["body"] = body_json
 
+    return url, headers, body_json, request_data
+
+
+def login_endpoint_url(login_url, base_url):
+    """Absolute URL of the login endpoint (login_url may be a path on base_url)"""
+    if login_url.startswith(("http://", "https://")):
+        return login_url
+    return base_url.rstrip("/") + "/" + login_url.lstrip("/")
+
+
+def save_artifacts(run_dir, test_id, request_data, response_data):
+    """Write the request/response pair of a test to the run directory (per-file layout)"""
+    # Thread-safe file writing
+    with file_lock:
+        with open(os.path.join(run_dir, f"{test_id}_request.json"), "w") as f:
+            json.dump(request_data, f, indent=2)
+
+        with open(os.path.join(run_dir, f"{test_id}_response.json"), "w") as f:
+            json.dump(response_data, f, indent=2)
+
+
+def build_timings(total_s, headers_s, phases, reused):
+    """
+    Per-phase wall-clock breakdown of one request in milliseconds.
+    total_s is the whole request including the body download, headers_s the time
+    until the response headers arrived (requests' Response.elapsed) and phases the
+    dns/connect/tls timings of a newly opened connection. Phases that did not
+    happen (reused connection, plain HTTP) are 0; unknown ones are None.
+    """
+    total_ms = total_s * 1000
+    headers_ms = headers_s * 1000
+    if reused:
+        phases = {"dns_ms": 0.0, "connect_ms": 0.0, "tls_ms": 0.0}
+    setup_ms = sum(v for v in (phases.get("dns_ms"), phases.get("connect_ms"), phases.get("tls_ms")) if v)
+    return {
+        "dns_ms": _round_ms(phases.get("dns_ms")),
+        "connect_ms": _round_ms(phases.get("connect_ms")),
+        "tls_ms": _round_ms(phases.get("tls_ms", 0.0 if "connect_ms" in phases else None)),
+        "ttfb_ms": _round_ms(max(0.0, headers_ms - setup_ms)),
+        "download_ms": _round_ms(max(0.0, total_ms - headers_ms)),
+        "total_ms": _round_ms(total_ms)
+    }
+
+
+def _round_ms(value):
+    return round(value, 3) if value is not None else None
+
+
+def build_result(test, url, status_code):
+    """Build the result dict of a test that received a response and print its status"""
+    result = {
+        "id": test["id"],
+        "name": test["test_name"],
+        "expected": test["expected_status"],
+        "actual": status_code,
+        "passed": status_code == test["expected_status"],
+        "url": url
+    }
+    
+    # Print progress with safe encoding
+    status = "PASS" if result["passed"] else "FAIL"
     try:
-        # Make request with or without body
-        if body_json is not None:
-            r = requests.request(
-                test["method"],
-                url,
-                headers=headers,
-                json=body_json,
-                timeout=30
-            )
-        else:
-            r = requests.request(
-                test["method"],
-                url,
-                headers=headers,
-                timeout=30
-            )
+        print(f"[{status}] {test['test_name']}: {status_code}", flush=True)
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        # Fallback for Windows console encoding issues
+        safe_name = test['test_name'].encode('ascii', errors='replace').decode('ascii')
+        print(f"[{status}] {safe_name}: {status_code}", flush=True)
+    
+    return result
+
+
+def build_error_result(test, url, error):
+    """Build the result dict of a test whose request raised and print the error"""
+    result = {
+        "id": test["id"],
+        "name": test["test_name"],
+        "passed": False,
+        "error": str(error),
+        "url": url
+    }
+    # Print error with safe encoding
+    try:
+        print(f"[FAIL] {test['test_name']}: ERROR - {str(error)}", flush=True)
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        safe_name = test['test_name'].encode('ascii', errors='replace').decode('ascii')
+        safe_error = str(error).encode('ascii', errors='replace').decode('ascii')
+        print(f"[FAIL] {safe_name}: ERROR - {safe_error}", flush=True)
+    return result
+
 
+def build_skipped_result(test, url, reason):
+    """Build the result dict of a test that was not sent (e.g. its endpoint's circuit is open)"""
+    result = {
+        "id": test["id"],
+        "name": test["test_name"],
+        "expected": test["expected_status"],
+        "passed": False,
+        "skipped": True,
+        "error": f"skipped: {reason}",
+        "url": url
+    }
+    try:
+        print(f"[SKIP] {test['test_name']}: {reason}", flush=True)
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        safe_name = test['test_name'].encode('ascii', errors='replace').decode('ascii')
+        print(f"[SKIP] {safe_name}: {reason}", flush=True)
+    return result
+
+
+def is_connection_error(error):
+    """True for transport failures (refused/reset connections, DNS errors, timeouts) that trip circuits"""
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout) + transport_errors())
+
+
+def send_request(test, url, headers, body_json, session_pool=None, capture_limit=DEFAULT_CAPTURE_LIMIT,
+                 timeout=DEFAULT_TIMEOUT):
+    """
+    Send one request and drain its response body into a BodyCapture.
+    timeout is passed to requests: seconds or a (connect, read) tuple.
+    Returns (response, capture, connection_reused, phases); the body is read
+    on the calling thread so connection timings are attributed to it.
+    An Http2SessionPool sends the request itself, over its shared HTTP/2 client.
+    """
+    if isinstance(session_pool, Http2SessionPool):
+        return session_pool.send(test, url, headers, body_json, capture_limit, timeout)
+
+    # Reuse the worker's pooled session when running under execute_tests
+    http = session_pool.get() if session_pool else requests
+    if session_pool:
+        session_pool.begin()
+
+    # Make request with or without body
+    if body_json is not None:
+        r = http.request(
+            test["method"],
+            url,
+            headers=headers,
+            json=body_json,
+            timeout=timeout,
+            stream=True
+        )
+    else:
+        r = http.request(
+            test["method"],
+            url,
+            headers=headers,
+            timeout=timeout,
+            stream=True
+        )
+
+    # Drain the whole body (so the connection can be reused) but keep only the capture
+    capture = BodyCapture(capture_limit)
+    with r:
+        for chunk in r.iter_content(CHUNK_SIZE):
+            capture.feed(chunk)
+
+    connection_reused = None
+    phases = {}
+    if session_pool:
+        connection_reused, phases = session_pool.finish()
+    return r, capture, connection_reused, phases
+
+
+def execute_single_test(test, api_key, base_url, run_dir, session_pool=None, artifact_writer=None, rate_limiter=None,
+                        capture_limit=DEFAULT_CAPTURE_LIMIT, circuit_breaker=None, retry_policy=None,
+                        hedge_policy=None, hedge_pool=None, timeout_policy=None, auth_provider=None):
+    """
+    Execute a single test case.
+    The response body is streamed: only the first capture_limit bytes are kept,
+    the full body's size and SHA-256 are recorded on the result.
+    With a circuit_breaker, tests on an endpoint whose circuit is open are
+    skipped without sending a request.
+    With a retry_policy, transient failures are retried with backoff (the
+    result records "retries"); with a hedge_policy and hedge_pool, a slow
+    request gets a duplicate sent on hedge_pool (the result records "hedged"
+    and "hedge_won").
+    The request timeout comes from the test's "timeout" setting, else from
+    timeout_policy (per-endpoint latency history), else 30 seconds.
+    With an auth_provider, valid-auth tests send its shared bearer token
+    (invalid-auth tests send "Bearer invalid"); a 401 the test does not
+    expect refreshes the token once and resends ("auth_refreshed").
+    """
+    # The token comes first: a login failure after allow() made this test the
+    # half-open probe would leave the circuit half-open for the rest of the run
+    token = None
+    if auth_provider:
+        try:
+            token = auth_provider.get() if test["auth"] == "valid" else "invalid"
+        except Exception as e:
+            return build_error_result(test, base_url + test["endpoint"], e)
+    endpoint_key = circuit_key(test)
+    if circuit_breaker and not circuit_breaker.allow(endpoint_key):
+        return build_skipped_result(test, base_url + test["endpoint"], "circuit open")
+    url, headers, body_json, request_data = prepare_request(test, api_key, base_url, token)
+
+    timeout = timeout_policy.timeout_for(test) if timeout_policy else test_timeout(test)
+    attempt = 0
+    hedged = hedge_won = auth_refreshed = False
+    while True:
+        # Wait for a token before the clock starts so throttling is not counted as latency
+        if rate_limiter:
+            rate_limiter.acquire(url, test["endpoint"])
+
+        start = time.perf_counter()
+        error = r = None
+        try:
+            hedge_after = hedge_policy.hedge_after(test) if hedge_policy and hedge_pool else None
+            if hedge_after is not None:
+                response, hedged, hedge_won = hedged_call(
+                    lambda: send_request(test, url, headers, body_json, session_pool, capture_limit, timeout),
+                    hedge_after, hedge_pool)
+            else:
+                response = send_request(test, url, headers, body_json, session_pool, capture_limit, timeout)
+            r, capture, connection_reused, phases = response
+        except Exception as e:
+            error = e
+        total_s = time.perf_counter() - start
+        if circuit_breaker:
+            circuit_breaker.record(endpoint_key, failure=error is not None and is_connection_error(error))
+
+        if (r is not None and r.status_code == 401 and test["auth"] == "valid" and auth_provider
+                and not auth_refreshed and test.get("expected_status") != 401):
+            # The shared token was rejected: refresh it (once across workers) and resend
+            auth_provider.invalidate(token)
+            auth_refreshed = True
+            try:
+                token = auth_provider.get()
+            except Exception as e:
+                error, r = e, None
+                break
+            url, headers, body_json, request_data = prepare_request(test, api_key, base_url, token)
+            continue
+
+        delay = None
+        if retry_policy:
+            delay = retry_policy.backoff(test, attempt, error, r.status_code if r is not None else None,
+                                         r.headers.get("Retry-After") if r is not None else None)
+        if delay is None:
+            break
+        reason = f"ERROR - {error}" if error is not None else r.status_code
+        print(f"[RETRY] {test['test_name']}: {reason}, retry {attempt + 1} in {delay:.2f}s", flush=True)
+        time.sleep(delay)
+        attempt += 1
+
+    if error is not None:
+        result = build_error_result(test, url, error)
+        result["elapsed_ms"] = _round_ms(total_s * 1000)
+    else:
+        body = capture.text(r.encoding)
         response_data = {
             "status_code": r.status_code,
             "headers": dict(r.headers),
-            "body": r.text
+            "body": body,
+            **capture.artifact_fields()
         }
+        if artifact_writer:
+            artifact_writer.write(test["id"], request_data, response_data)
+        else:
+            save_artifacts(run_dir, test["id"], request_data, response_data)
 
-        # Thread-safe file writing
-        with file_lock:
-            with open(os.path.join(run_dir, f"{test['id']}_request.json"), "w") as f:
-                json.dump(request_data, f, indent=2)
-
-            with open(os.path.join(run_dir, f"{test['id']}_response.json"), "w") as f:
-                json.dump(response_data, f, indent=2)
-
-        result = {
-            "id": test["id"],
-            "name": test["test_name"],
-            "expected": test["expected_status"],
-            "actual": r.status_code,
-            "passed": r.status_code == test["expected_status"],
-            "url": url
-        }
-        
-        # Print progress with safe encoding
-        status = "PASS" if result["passed"] else "FAIL"
-        try:
-            print(f"[{status}] {test['test_name']}: {r.status_code}", flush=True)
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            # Fallback for Windows console encoding issues
-            safe_name = test['test_name'].encode('ascii', errors='replace').decode('ascii')
-            print(f"[{status}] {safe_name}: {r.status_code}", flush=True)
-        
-        return result
+        result = build_result(test, url, r.status_code)
+        result["timings"] = build_timings(total_s, r.elapsed.total_seconds(), phases, connection_reused)
+        result["elapsed_ms"] = result["timings"]["total_ms"]
+        result.update(capture.result_fields())
+        if connection_reused is not None:
+            result["connection_reused"] = connection_reused
+        if r.status_code in THROTTLE_STATUS_CODES:
+            result["retry_after"] = parse_retry_after(r.headers.get("Retry-After"))
+        if test.get("extract") and 200 <= r.status_code < 300:
+            result["extracted"] = extract_values(test["extract"], body, body_json)
+        if hedge_policy:
+            hedge_policy.observe(test, result["elapsed_ms"])
+        if timeout_policy:
+            timeout_policy.observe(test, result["elapsed_ms"])
 
-    except Exception as e:
-        result = {
-            "id": test["id"],
-            "name": test["test_name"],
-            "passed": False,
-            "error": str(e),
-            "url": url
-        }
-        # Print error with safe encoding
-        try:
-            print(f"[FAIL] {test['test_name']}: ERROR - {str(e)}", flush=True)
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            safe_name = test['test_name'].encode('ascii', errors='replace').decode('ascii')
-            safe_error = str(e).encode('ascii', errors='replace').decode('ascii')
-            print(f"[FAIL] {safe_name}: ERROR - {safe_error}", flush=True)
-        return result
+    if attempt:
+        result["retries"] = attempt
+        retry_policy.record(result)
+    if auth_refreshed:
+        result["auth_refreshed"] = True
+    if hedged:
+        hedge_policy.record(hedge_won)
+        result["hedged"] = True
+        result["hedge_won"] = hedge_won
+    return result
 
 
-def execute_tests(tests, api_key, base_url, run_id, max_workers=10):
-    """Execute tests in parallel using ThreadPoolExecutor"""
-    base_url = base_url.rstrip("/")
-    run_dir = os.path.join("artifacts", run_id)
-    os.makedirs(run_dir, exist_ok=True)
+def execute_with_limiter(limiter, test, *args):
+    """Run execute_single_test inside an AdaptiveLimiter slot and report its outcome"""
+    limiter.acquire()
+    result = None
+    try:
+        result = execute_single_test(test, *args)
+        return result
+    finally:
+        elapsed_ms = result.get("elapsed_ms") if result else None
+        limiter.release(
+            elapsed_ms / 1000 if elapsed_ms is not None else None,
+            status_code=result.get("actual") if result else None,
+            error=result is None or ("error" in result and not result.get("skipped"))
+        )
 
-    results = []
-    completed_count = 0
-    passed_count = 0
-    failed_count = 0
-    
+
+def print_execution_header(total, api_key, base_url, run_dir, workers_label, workers):
+    """Print the API key notice and execution banner; returns the normalised api_key"""
     # Use the provided API key
     if not api_key or api_key.strip() == "":
         print("WARNING: No API key provided. Some endpoints may require authentication.", flush=True)
@@ -131,65 +517,260 @@ def execute_tests(tests, api_key, base_url, run_id, max_workers=10):
     else:
         print(f"Using API key: {api_key[:10] if len(api_key) > 10 else api_key}...", flush=True)
 
-    # Execute all test cases in parallel
     print(f"\n{'='*70}", flush=True)
     print(f"STARTING TEST EXECUTION", flush=True)
     print(f"{'='*70}", flush=True)
-    print(f"Total Tests: {len(tests)}", flush=True)
-    print(f"Parallel Workers: {max_workers}", flush=True)
+    print(f"Total Tests: {total if total is not None else 'streaming'}", flush=True)
+    print(f"{workers_label}: {workers}", flush=True)
     print(f"Base URL: {base_url}", flush=True)
     print(f"Artifacts: {run_dir}", flush=True)
     print(f"{'='*70}\n", flush=True)
+    return api_key
+
+
+def print_progress(completed_count, total, passed_count, failed_count):
+    """Print the running pass/fail counter (total is None when tests are streamed)"""
+    if total is None:
+        print(f"[{completed_count}] - Pass: {passed_count}, Fail: {failed_count}", flush=True)
+        return
+    progress_pct = (completed_count / total) * 100 if total else 100.0
+    print(f"[{completed_count}/{total}] ({progress_pct:.1f}%) - Pass: {passed_count}, Fail: {failed_count}", flush=True)
+
+
+def print_execution_summary(passed_count, failed_count, elapsed_time, connection_stats):
+    """Print the end-of-run summary banner"""
+    completed_count = passed_count + failed_count
+    total = max(completed_count, 1)
+
+    print(f"\n{'='*70}", flush=True)
+    print(f"TEST EXECUTION COMPLETED", flush=True)
+    print(f"{'='*70}", flush=True)
+    print(f"Total Time: {elapsed_time:.2f} seconds", flush=True)
+    print(f"Avg Time per Test: {elapsed_time/total:.2f} seconds", flush=True)
+    print(f"", flush=True)
+    print(f"Results Summary:", flush=True)
+    print(f"  ✓ Passed: {passed_count}/{completed_count} ({passed_count/total*100:.1f}%)", flush=True)
+    print(f"  ✗ Failed: {failed_count}/{completed_count} ({failed_count/total*100:.1f}%)", flush=True)
+    print(f"", flush=True)
+    print(f"Connections: {connection_stats['connections_opened']} opened, "
+          f"{connection_stats['connections_reused']} reused "
+          f"({connection_stats['reuse_ratio']*100:.1f}% reuse)", flush=True)
+    print(f"{'='*70}\n", flush=True)
+
+
+def execute_tests(tests, api_key, base_url, run_id, max_workers=10, stats=None, artifact_format="jsonl",
+                  adaptive=False, min_workers=1, rate_limit=None, rate_limit_rules=None, max_requeues=3,
+                  dependencies=False, swagger=None, window=None, result_sink=None,
+                  capture_limit=DEFAULT_CAPTURE_LIMIT, circuit_threshold=5, circuit_reset=30.0,
+                  retries=0, hedge=False, adaptive_timeouts=False, latency_history=DEFAULT_LATENCY_HISTORY,
+                  timeout_multiplier=3.0, timeout_floor=1.0, timeout_ceiling=120.0,
+                  login_url=None, login_credentials=None, token_field=None, auth_provider=None, http2=False,
+                  max_failures=None, max_failure_rate=None, failure_min_sample=20):
+    """
+    Execute tests in parallel using ThreadPoolExecutor.
+    If a dict is passed as stats, it is filled with run-level statistics
+    (e.g. connection reuse) for the report metadata.
+    artifact_format selects the artifact layout: "jsonl" (default), "jsonl.gz"
+    or "files" for the legacy per-test request/response files.
+    With adaptive=True the number of in-flight requests is tuned between
+    min_workers and max_workers from observed latency and error/429 rates.
+    rate_limit (requests/sec for the whole run) and rate_limit_rules
+    ({host or /path prefix: requests/sec}) throttle requests across all
+    workers. Tests answered with 429 (or 503 + Retry-After) are re-queued
+    after the Retry-After delay up to max_requeues times instead of failing.
+    With dependencies=True, tests on a resource (/pet/{petId}) wait for the
+    POST that creates it and use the id it returns (see DependencyScheduler);
+    swagger, if given, helps match endpoints to their path templates.
+    For very large suites tests may be any iterable (e.g. iter_test_cases(),
+    or a TestFeed to run tests while they are still being generated):
+    window caps how many are submitted at once, and with a result_sink
+    (ResultSink) results are streamed to it instead of being collected, so
+    the returned list is empty and memory stays bounded.
+    capture_limit caps the response bytes kept per test (see execute_single_test).
+    After circuit_threshold consecutive connection errors/timeouts on an endpoint
+    its remaining tests are skipped until a probe after circuit_reset seconds
+    succeeds (see CircuitBreaker); circuit_threshold=0 disables this.
+    retries > 0 retries connection errors/timeouts and unexpected 502/503/504
+    of idempotent tests with exponential backoff (see RetryPolicy); with
+    hedge=True a GET still unanswered after its endpoint's observed p95 gets
+    a duplicate request and the first response wins (see HedgePolicy).
+    With adaptive_timeouts=True each endpoint's timeout is timeout_multiplier x
+    its p99 latency from latency_history (updated with this run), clamped to
+    [timeout_floor, timeout_ceiling] seconds (see TimeoutPolicy).
+    With a login_url (absolute, or a path on base_url), login_credentials are
+    POSTed to it once and the returned bearer token (token_field, a dotted
+    path, or a usual field name) is shared by all workers and refreshed
+    before it expires or on a 401 (see TokenProvider); an auth_provider
+    passed in is used instead, so other runs can share its token.
+    With http2=True requests go over one shared HTTP/2 client (httpx) that
+    multiplexes all workers' tests on a few connections (see Http2SessionPool).
+    Once max_failures tests have failed, or more than max_failure_rate (0-1)
+    of them after failure_min_sample have completed (see FailureBudget), the
+    run is aborted: queued tests are cancelled, in-flight ones are drained and
+    stats["aborted"] records why; the results returned are partial.
+    """
+    base_url = base_url.rstrip("/")
+    run_dir = os.path.join("artifacts", run_id)
+    os.makedirs(run_dir, exist_ok=True)
+
+    if dependencies and not isinstance(tests, list):
+        # the scheduler has to see every test up front
+        print("WARNING: dependencies need the whole suite; loading the streamed tests into memory", flush=True)
+        tests = list(tests)
+    total = len(tests) if hasattr(tests, "__len__") else None
+    results = []
+    completed_count = 0
+    passed_count = 0
+    failed_count = 0
+    workers = f"adaptive {min_workers}-{max_workers}" if adaptive else max_workers
+    api_key = print_execution_header(total, api_key, base_url, run_dir, "Parallel Workers", workers)
     
     start_time = time.time()
+    session_pool = Http2SessionPool(max_workers, base_url) if http2 else SessionPool(max_workers)
+    artifact_writer = ArtifactWriter(run_dir, artifact_format)
+    limiter = AdaptiveLimiter(min_workers, max_workers) if adaptive else None
+    rate_limiter = RateLimiter(rate_limit, rate_limit_rules)
+    scheduler = DependencyScheduler(tests, swagger) if dependencies else None
+    circuit_breaker = CircuitBreaker(circuit_threshold, circuit_reset) if circuit_threshold else None
+    retry_policy = RetryPolicy(retries) if retries else None
+    hedge_policy = HedgePolicy() if hedge else None
+    # Hedged requests run here so the worker can wait on both copies at once
+    hedge_pool = ThreadPoolExecutor(max_workers=2 * max_workers) if hedge else None
+    timeout_policy = TimeoutPolicy(latency_history, timeout_multiplier, timeout_floor,
+                                   timeout_ceiling) if adaptive_timeouts else None
+    if auth_provider is None and login_url:
+        auth_provider = TokenProvider(login_endpoint_url(login_url, base_url), login_credentials, token_field)
+    budget = None
+    if max_failures is not None or max_failure_rate is not None:
+        budget = FailureBudget(max_failures, max_failure_rate, failure_min_sample)
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tests
-        future_to_test = {
-            executor.submit(execute_single_test, test, api_key, base_url, run_dir): test 
-            for test in tests
-        }
+        args = (api_key, base_url, run_dir, session_pool, artifact_writer, rate_limiter, capture_limit,
+                circuit_breaker, retry_policy, hedge_policy, hedge_pool, timeout_policy, auth_provider)
+        # Finished futures are pushed here so throttled tests can be re-submitted
+        completed = queue.Queue()
+        # Submitted futures not yet collected, so an abort can cancel the queued ones
+        futures = set()
+
+        def submit(test, attempts):
+            if limiter:
+                future = executor.submit(execute_with_limiter, limiter, test, *args)
+            else:
+                future = executor.submit(execute_single_test, test, *args)
+            futures.add(future)
+            future.add_done_callback(lambda f: completed.put((f, test, attempts)))
+
+        # Tests not yet submitted (only those without unmet dependencies when scheduling)
+        pending = iter(scheduler.initial_tests() if scheduler else tests)
+        # A TestFeed is polled instead, so results keep being collected while tests are generated
+        feed = tests if isinstance(tests, TestFeed) else None
+        if feed:
+            feed.on_ready(lambda: completed.put(None))
+        in_flight = 0
+        aborted = False
+
+        def fill():
+            # Keep at most `window` tests submitted; the rest stay unread in `pending`
+            nonlocal in_flight
+            while (window is None or in_flight < window) and not aborted:
+                test = feed.poll() if feed else next(pending, None)
+                if test is None:
+                    return
+                submit(test, 0)
+                in_flight += 1
+
+        fill()
         
         # Collect results as they complete
-        for future in as_completed(future_to_test):
+        while in_flight or (feed and not feed.exhausted and not aborted):
+            item = completed.get()
+            if item is None:
+                fill()  # the feed has new tests
+                continue
+            future, test, attempts = item
+            futures.discard(future)
+            if future.cancelled():
+                in_flight -= 1
+                continue
             try:
                 result = future.result()
-                results.append(result)
-                completed_count += 1
-                
-                if result.get("passed"):
-                    passed_count += 1
-                else:
-                    failed_count += 1
-                
-                # Print progress update
-                progress_pct = (completed_count / len(tests)) * 100
-                print(f"[{completed_count}/{len(tests)}] ({progress_pct:.1f}%) - Pass: {passed_count}, Fail: {failed_count}", flush=True)
-                
             except Exception as e:
-                test = future_to_test[future]
-                completed_count += 1
-                failed_count += 1
-                print(f"[{completed_count}/{len(tests)}] ERROR: {test['test_name']}: EXCEPTION - {str(e)}", flush=True)
-                results.append({
+                print(f"[{completed_count + 1}/{total or '?'}] ERROR: {test['test_name']}: EXCEPTION - {str(e)}", flush=True)
+                result = {
                     "id": test["id"],
                     "name": test["test_name"],
                     "passed": False,
                     "error": str(e),
                     "url": base_url + test["endpoint"]
-                })
+                }
+
+            delay = requeue_delay(test, result, attempts, max_requeues)
+            if delay is not None and not aborted:
+                print(f"[THROTTLED] {test['test_name']}: {result['actual']}, re-queued in {delay:.1f}s", flush=True)
+                rate_limiter.pause(result["url"], test["endpoint"], delay)
+                submit(test, attempts + 1)
+                continue
+            if attempts:
+                result["requeues"] = attempts
+
+            in_flight -= 1
+            completed_count += 1
+            if result_sink:
+                result_sink.add(result, test)
+            else:
+                results.append(result)
+            if result.get("passed"):
+                passed_count += 1
+            else:
+                failed_count += 1
+            print_progress(completed_count, total, passed_count, failed_count)
+            if budget and budget.record(result):
+                aborted = True
+                cancelled = sum(1 for f in list(futures) if f.cancel())
+                print(f"[ABORTED] Failure budget exceeded: {budget.reason}; cancelled {cancelled} queued tests, "
+                      f"draining {in_flight - cancelled} in flight", flush=True)
+            if scheduler and not aborted:
+                for ready in scheduler.complete(test, result):
+                    submit(ready, 0)
+                    in_flight += 1
+            fill()
+        if feed:
+            feed.on_ready(None)
     
+    if hedge_pool:
+        hedge_pool.shutdown()
+    if timeout_policy:
+        timeout_policy.save()
+    artifact_writer.close()
     elapsed_time = time.time() - start_time
-    
-    print(f"\n{'='*70}", flush=True)
-    print(f"TEST EXECUTION COMPLETED", flush=True)
-    print(f"{'='*70}", flush=True)
-    print(f"Total Time: {elapsed_time:.2f} seconds", flush=True)
-    print(f"Avg Time per Test: {elapsed_time/len(results):.2f} seconds", flush=True)
-    print(f"", flush=True)
-    print(f"Results Summary:", flush=True)
-    print(f"  ✓ Passed: {passed_count}/{len(results)} ({passed_count/len(results)*100:.1f}%)", flush=True)
-    print(f"  ✗ Failed: {failed_count}/{len(results)} ({failed_count/len(results)*100:.1f}%)", flush=True)
-    print(f"{'='*70}\n", flush=True)
+    connection_stats = session_pool.stats()
+    session_pool.close()
+    if stats is not None:
+        stats["engine"] = "thread"
+        stats["connections"] = connection_stats
+        stats["concurrency"] = limiter.stats() if limiter else {"mode": "fixed", "max_limit": max_workers}
+        stats["throttling"] = rate_limiter.stats()
+        if scheduler:
+            stats["dependencies"] = scheduler.stats()
+        if circuit_breaker:
+            stats["circuit_breaker"] = circuit_breaker.stats()
+        if retry_policy:
+            stats["retries"] = retry_policy.stats()
+        if hedge_policy:
+            stats["hedging"] = hedge_policy.stats()
+        if timeout_policy:
+            stats["timeouts"] = timeout_policy.stats()
+        if auth_provider:
+            stats["auth"] = auth_provider.stats()
+        if budget:
+            stats["failure_budget"] = budget.stats()
+        if aborted:
+            stats["aborted"] = budget.abort_stats(total)
+    if limiter:
+        print(f"Adaptive concurrency: final limit {limiter.limit} "
+              f"({limiter.increases} increases, {limiter.decreases} decreases)", flush=True)
 
+    print_execution_summary(passed_count, failed_count, elapsed_time, connection_stats)
+    if aborted:
+        print(f"RUN ABORTED: {budget.reason}", flush=True)
     return results
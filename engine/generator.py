@@ -1,9 +1,26 @@
-from engine.swagger import get_request_body_schema, generate_sample_data
+from engine.incremental import operation_key
+from engine.swagger import generate_sample_data, spec_index
+from engine.testcase import intern_headers
 
-def generate_tests(swagger: dict, login_endpoint=None):
-    tests = []
+# One read-only instance shared by every generated test (see intern_headers)
+DEFAULT_HEADERS = intern_headers({
+    "accept": "application/json",
+    "Content-Type": "application/json",
+    "Locale": "en_US"
+})
+
+def generate_tests(swagger, login_endpoint=None, operations=None):
+    """
+    Rule-based positive and negative tests per operation; swagger is the spec dict or its SpecIndex.
+    operations limits generation to a set of operation keys ("GET /pet/{petId}").
+    """
+    return list(iter_tests(swagger, login_endpoint, operations))
+
+
+def iter_tests(swagger, login_endpoint=None, operations=None):
+    """generate_tests one test at a time, so the first tests can run while the rest are generated"""
     test_counter = 1
-    paths = swagger.get("paths", {})
+    index = spec_index(swagger)
     
     # Normalize login_endpoint for comparison
     login_path = None
@@ -11,15 +28,18 @@ def generate_tests(swagger: dict, login_endpoint=None):
         # Remove leading slash if present for consistent comparison
         login_path = login_endpoint if not login_endpoint.startswith('/') else login_endpoint[1:]
 
-    for path, methods in paths.items():
+    for path, path_operations in index.paths.items():
         # Skip the login endpoint from test generation
         path_normalized = path if not path.startswith('/') else path[1:]
         if login_path and path_normalized == login_path:
             print(f"Skipping login endpoint from tests: {path}")
             continue
             
-        for method in methods:
-            if method.lower() not in ["get", "post", "put", "delete", "patch"]:
+        for operation in path_operations:
+            method = operation.method
+            if method not in ["get", "post", "put", "delete", "patch"]:
+                continue
+            if operations is not None and operation_key(method, path) not in operations:
                 continue
 
             endpoint = path
@@ -29,10 +49,9 @@ def generate_tests(swagger: dict, login_endpoint=None):
                 endpoint = endpoint[:start] + "1" + endpoint[end+1:]
             
             # Extract query parameters from Swagger spec
-            method_spec = methods[method]
             query_params = []
-            if "parameters" in method_spec:
-                for param in method_spec["parameters"]:
+            if operation.parameters:
+                for param in operation.parameters:
                     if param.get("in") == "query":
                         # Use default value or a reasonable value based on type
                         param_name = param.get("name")
@@ -68,9 +87,9 @@ def generate_tests(swagger: dict, login_endpoint=None):
             # Generate request body for POST/PUT/PATCH methods
             request_body = None
             if method.lower() in ['post', 'put', 'patch']:
-                schema = get_request_body_schema(swagger, path, method)
+                schema = operation.request_schema
                 if schema:
-                    request_body = generate_sample_data(swagger, schema)
+                    request_body = generate_sample_data(index, schema)
 
             # Create positive test
             expected_status = 201 if method.lower() == 'post' else 200
@@ -78,19 +97,16 @@ def generate_tests(swagger: dict, login_endpoint=None):
                 "id": f"test{test_counter:03d}",
                 "test_name": f"{method.upper()} {path} - Valid Request",
                 "method": method.upper(),
+                "path": path,
                 "endpoint": endpoint,
                 "expected_status": expected_status,
                 "auth": "valid",
-                "headers": {
-                    "accept": "application/json",
-                    "Content-Type": "application/json",
-                    "Locale": "en_US"
-                }
+                "headers": DEFAULT_HEADERS
             }
             if request_body:
                 test_case["body"] = request_body
             
-            tests.append(test_case)
+            yield test_case
             test_counter += 1
 
             # Create negative test based on method type
@@ -100,14 +116,11 @@ def generate_tests(swagger: dict, login_endpoint=None):
                     "id": f"test{test_counter:03d}",
                     "test_name": f"{method.upper()} {path} - Unauthorized",
                     "method": method.upper(),
+                    "path": path,
                     "endpoint": endpoint,
                     "expected_status": 401,
                     "auth": "invalid",
-                    "headers": {
-                        "accept": "application/json",
-                        "Content-Type": "application/json",
-                        "Locale": "en_US"
-                    }
+                    "headers": DEFAULT_HEADERS
                 }
             else:
                 # For POST/PUT/DELETE/PATCH: test with invalid/non-existent resource
@@ -124,14 +137,11 @@ def generate_tests(swagger: dict, login_endpoint=None):
                     "id": f"test{test_counter:03d}",
                     "test_name": f"{method.upper()} {path} - Invalid Input",
                     "method": method.upper(),
+                    "path": path,
                     "endpoint": invalid_endpoint,
                     "expected_status": 404 if method.lower() in ['put', 'delete'] else 400,
                     "auth": "valid",
-                    "headers": {
-                        "accept": "application/json",
-                        "Content-Type": "application/json",
-                        "Locale": "en_US"
-                    }
+                    "headers": DEFAULT_HEADERS
                 }
                 
                 # Add invalid body for POST/PUT/PATCH
@@ -146,7 +156,5 @@ def generate_tests(swagger: dict, login_endpoint=None):
                             invalid_body['name'] = ""  # Empty name (often invalid)
                     negative_test["body"] = invalid_body
             
-            tests.append(negative_test)
+            yield negative_test
             test_counter += 1
-
-    return tests
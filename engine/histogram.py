@@ -0,0 +1,100 @@
+import math
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with logarithmic buckets (HdrHistogram style).
+    Each bucket is `precision` (1% by default) wider than the previous one, so
+    percentiles keep that relative accuracy no matter how many samples are
+    recorded, while memory only depends on the range of values seen
+    (about 2,000 buckets from 1 microsecond to one hour).
+    """
+
+    def __init__(self, precision=0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value_ms):
+        """Add one sample (milliseconds)"""
+        value_ms = max(float(value_ms), 0.001)
+        bucket = math.ceil(math.log(value_ms) / self._log_base)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def merge(self, other):
+        """Add all samples of another histogram with the same precision"""
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Value at the given percentile (nearest rank, upper bucket edge), or None if empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Clamp to the exact extremes so p0/p100 are not bucket edges
+                return min(max((1 + self.precision) ** bucket, self.min), self.max)
+        return self.max
+
+    def to_state(self):
+        """Raw buckets and totals, for persisting the histogram as JSON"""
+        return {
+            "precision": self.precision,
+            "buckets": {str(bucket): count for bucket, count in self.buckets.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a histogram saved with to_state()"""
+        histogram = cls(state.get("precision", 0.01))
+        histogram.buckets = {int(bucket): count for bucket, count in state.get("buckets", {}).items()}
+        histogram.count = state.get("count", sum(histogram.buckets.values()))
+        histogram.total = state.get("total", 0.0)
+        histogram.min = state.get("min")
+        histogram.max = state.get("max")
+        return histogram
+
+    def scale(self, factor):
+        """Multiply every bucket count by factor (< 1 ages out old samples); empty buckets are dropped"""
+        if factor >= 1 or not self.count:
+            return
+        self.buckets = {b: round(c * factor) for b, c in self.buckets.items() if round(c * factor)}
+        self.total *= factor
+        self.count = sum(self.buckets.values())
+        if not self.count:
+            self.total = 0.0
+            self.min = self.max = None
+
+    def to_dict(self):
+        """Summary for JSON output: count, min/mean/max and the usual percentiles in ms"""
+        if not self.count:
+            return {"count": 0}
+        summary = {
+            "count": self.count,
+            "min_ms": round(self.min, 2),
+            "mean_ms": round(self.total / self.count, 2),
+            "max_ms": round(self.max, 2)
+        }
+        for pct in (50, 90, 95, 99, 99.9):
+            summary[f"p{pct:g}_ms".replace(".", "_")] = round(self.percentile(pct), 2)
+        return summary
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import namedtuple
+from datetime import timedelta
+from threading import Lock, Thread
+
+from requests.utils import get_encoding_from_headers
+
+from engine.capture import BodyCapture, CHUNK_SIZE, DEFAULT_CAPTURE_LIMIT
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx needs it for http2=True
+except ImportError:  # optional dependency, only needed for the HTTP/2 transport
+    httpx = None
+
+# The parts of a response execute_single_test reads, shaped like a requests.Response
+Http2Response = namedtuple("Http2Response", ["status_code", "headers", "encoding", "elapsed"])
+
+
+def transport_errors():
+    """httpx exceptions that count as connection errors/timeouts for the circuit breaker"""
+    if httpx is None:
+        return ()
+    return (httpx.TransportError,)
+
+
+class Http2SessionPool:
+    """
+    Drop-in replacement for SessionPool that multiplexes every worker's
+    requests as HTTP/2 streams over a few connections (one per origin)
+    instead of one socket per worker. https URLs negotiate HTTP/2 with ALPN
+    (falling back to HTTP/1.1); plain http URLs use prior knowledge (h2c).
+
+    The connections belong to an httpx.AsyncClient on a private event loop
+    thread: workers hand their request to it and block on the result. (The
+    synchronous httpx client is not safe here - threads sharing one HTTP/2
+    connection can send stream ids out of order, which servers reject.)
+    """
+
+    def __init__(self, max_workers=10, base_url=""):
+        if httpx is None:
+            raise RuntimeError("The HTTP/2 transport requires httpx and h2 (pip install 'httpx[http2]')")
+        self.max_workers = max_workers
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, name="http2-transport", daemon=True)
+        self._thread.start()
+        self.client = self._call(self._make_client(base_url.startswith("https://"), max_workers))
+        self._lock = Lock()
+        self.requests_sent = 0
+        self.connections_reused = 0
+        self.http_versions = {}
+
+    def _call(self, coro):
+        """Run a coroutine on the transport loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    @staticmethod
+    async def _make_client(http1, max_connections):
+        return httpx.AsyncClient(
+            http1=http1,
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _send(self, test, url, headers, body_json, capture_limit, timeout):
+        trace = {}
+
+        async def on_trace(event, info):
+            trace[event] = time.perf_counter()
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        capture = BodyCapture(capture_limit)
+        start = time.perf_counter()
+        async with self.client.stream(test["method"], url, headers=headers, json=body_json,
+                                      timeout=httpx.Timeout(read, connect=connect),
+                                      extensions={"trace": on_trace}) as r:
+            # stream() returns once the headers are in; httpx's own elapsed includes the body
+            elapsed = timedelta(seconds=time.perf_counter() - start)
+            async for chunk in r.aiter_bytes(CHUNK_SIZE):
+                capture.feed(chunk)
+        return r, capture, elapsed, trace
+
+    def send(self, test, url, headers, body_json, capture_limit=DEFAULT_CAPTURE_LIMIT, timeout=30):
+        """
+        Send one request and drain its body; returns the same
+        (response, capture, connection_reused, phases) as send_request.
+        """
+        r, capture, elapsed, trace = self._call(
+            self._send(test, url, headers, body_json, capture_limit, timeout))
+
+        phases = {}
+        reused = "connection.connect_tcp.started" not in trace
+        if not reused and "connection.connect_tcp.complete" in trace:
+            # httpcore resolves the host inside connect_tcp, so DNS is part of connect_ms
+            phases["dns_ms"] = 0.0
+            phases["connect_ms"] = (trace["connection.connect_tcp.complete"]
+                                    - trace["connection.connect_tcp.started"]) * 1000
+            if "connection.start_tls.complete" in trace:
+                phases["tls_ms"] = (trace["connection.start_tls.complete"]
+                                    - trace["connection.start_tls.started"]) * 1000
+        with self._lock:
+            self.requests_sent += 1
+            if reused:
+                self.connections_reused += 1
+            self.http_versions[r.http_version] = self.http_versions.get(r.http_version, 0) + 1
+
+        response = Http2Response(r.status_code, r.headers, get_encoding_from_headers(r.headers), elapsed)
+        return response, capture, reused, phases
+
+    def stats(self):
+        """Connection reuse statistics, in the same shape as SessionPool.stats()"""
+        with self._lock:
+            sent = self.requests_sent
+            reused = self.connections_reused
+            versions = dict(self.http_versions)
+        return {
+            "sessions": 1,
+            "requests": sent,
+            "connections_opened": sent - reused,
+            "connections_reused": reused,
+            "reuse_ratio": (reused / sent) if sent else 0.0,
+            "http_versions": versions
+        }
+
+    def close(self):
+        self._call(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
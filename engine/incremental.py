@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from engine.scheduler import match_template
+from engine.swagger import spec_index
+
+FINGERPRINT_VERSION = 1
+
+# Operation keys ("GET /pet/{petId}") by how they changed between two fingerprint sets
+SpecDiff = namedtuple("SpecDiff", ["changed", "added", "removed", "unchanged"])
+
+
+def operation_key(method, path):
+    """Key of an operation in fingerprints and test selection: "GET /pet/{petId}" """
+    return f"{method.upper()} {path}"
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Fingerprinter:
+    """
+    Canonical form of an operation's parameters and schemas, with each $ref
+    replaced by the digest of its (recursively canonical) target, so an
+    operation's fingerprint changes with any schema it reaches. A $ref back
+    into a schema being digested is kept by name; digests that depend on such
+    a cut are not memoized, since they differ by where the cycle was entered.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.digests = {}
+        self.stack = []
+
+    def canonical(self, node):
+        """(canonical value, lowest stack position a cycle cut refers to or None)"""
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                return self._ref(ref)
+            low = None
+            value = {}
+            for key, child in node.items():
+                value[key], child_low = self.canonical(child)
+                low = child_low if low is None or (child_low is not None and child_low < low) else low
+            return value, low
+        if isinstance(node, list):
+            low = None
+            value = []
+            for child in node:
+                child_value, child_low = self.canonical(child)
+                value.append(child_value)
+                low = child_low if low is None or (child_low is not None and child_low < low) else low
+            return value, low
+        return node, None
+
+    def _ref(self, ref):
+        if ref in self.digests:
+            return {"$ref": self.digests[ref]}, None
+        if ref in self.stack:
+            return {"$ref": ref}, self.stack.index(ref)
+        target = self.index.resolve(ref)
+        if target is None:
+            return {"$ref": ref}, None  # unresolvable: only the name can change
+        position = len(self.stack)
+        self.stack.append(ref)
+        value, low = self.canonical(target)
+        self.stack.pop()
+        digest = _digest(value)
+        if low is not None and low >= position:
+            low = None  # only cut at this schema itself
+        if low is None:
+            self.digests[ref] = digest
+        return {"$ref": digest}, low
+
+
+def fingerprint_operations(swagger):
+    """
+    {operation key: SHA-256} of every operation in a spec (dict or SpecIndex),
+    hashing its path, method, parameters and resolved request/response schemas
+    """
+    index = spec_index(swagger)
+    fingerprinter = _Fingerprinter(index)
+    fingerprints = {}
+    for operation in index.operations():
+        value, _ = fingerprinter.canonical({
+            "path": operation.path,
+            "method": operation.method,
+            "parameters": operation.parameters,
+            "request_schema": operation.request_schema,
+            "response_schemas": operation.response_schemas
+        })
+        fingerprints[operation_key(operation.method, operation.path)] = _digest(value)
+    return fingerprints
+
+
+def fingerprints_path(tests_file):
+    """Fingerprint file stored next to a test suite: test_cases.json -> test_cases.fingerprints.json"""
+    return os.path.splitext(tests_file)[0] + ".fingerprints.json"
+
+
+def save_fingerprints(tests_file, fingerprints, generator):
+    """Store the fingerprints of the operations a suite was generated from, and the generator settings used"""
+    with open(fingerprints_path(tests_file), "w", encoding="utf-8") as f:
+        json.dump({"version": FINGERPRINT_VERSION, "generator": generator, "operations": fingerprints}, f, indent=2)
+
+
+def load_fingerprints(tests_file, generator):
+    """
+    Fingerprints a suite was generated from, or None if the suite or its
+    fingerprints are missing or were generated with other settings
+    """
+    path = fingerprints_path(tests_file)
+    if not os.path.exists(tests_file) or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != FINGERPRINT_VERSION or data.get("generator") != generator:
+        return None
+    return data.get("operations")
+
+
+def diff_fingerprints(old, new):
+    """SpecDiff of two {operation key: fingerprint} sets; old may be None (everything is added)"""
+    old = old or {}
+    return SpecDiff(
+        changed={key for key in new if key in old and old[key] != new[key]},
+        added={key for key in new if key not in old},
+        removed={key for key in old if key not in new},
+        unchanged={key for key in new if old.get(key) == new[key]}
+    )
+
+
+def test_operation(test, templates):
+    """Operation key a test exercises, matching its endpoint to a path template if it has no path; or None"""
+    path = test.get("path") or match_template(test["endpoint"].split("?", 1)[0], templates)
+    return operation_key(test["method"], path) if path else None
+
+
+def _id_number(test):
+    digits = "".join(ch for ch in str(test.get("id", "")) if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def merge_tests(old_tests, new_tests, diff, templates):
+    """
+    Suite from a previous one and the tests regenerated for the changed and
+    added operations: previous tests of changed or removed operations are
+    dropped, the rest keep their ids, and the new tests are appended with
+    ids after the highest previous one
+    """
+    return list(iter_merged_tests(old_tests, new_tests, diff, templates))
+
+
+def iter_merged_tests(old_tests, new_tests, diff, templates):
+    """merge_tests yielding the kept tests, then each new test as new_tests (any iterable) produces it"""
+    stale = diff.changed | diff.removed
+    kept = [t for t in old_tests if test_operation(t, templates) not in stale]
+    next_id = max((_id_number(t) for t in kept), default=0) + 1
+    yield from kept
+    for test in new_tests:
+        yield dict(test, id=f"test{next_id:03d}")
+        next_id += 1
+
+
+def select_tests(tests, operations, templates):
+    """Tests exercising one of the given operation keys"""
+    return [t for t in tests if test_operation(t, templates) in operations]
@@ -4,9 +4,11 @@ import sys
 import ollama
 import time
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
-from engine.swagger import get_request_body_schema, generate_sample_data
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from engine.generator import DEFAULT_HEADERS
+from engine.incremental import operation_key
+from engine.swagger import HTTP_METHODS, get_request_body_schema, generate_sample_data, spec_index
+from engine.testcase import intern_headers
 
 # Configure stdout to handle encoding errors gracefully on Windows
 if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
@@ -51,25 +53,47 @@ def fix_json_format(json_str):
     
     return json_str
 
-def generate_tests_with_llm(swagger: dict, login_endpoint=None, model="llama3.2"):
+
+# Seconds to wait for one batch's LLM answer before moving on without it
+BATCH_TIMEOUT = 300
+
+
+def generate_tests_with_llm(swagger, login_endpoint=None, model="llama3.2", operations=None):
     """
     Generate API test cases using a local Ollama LLM model.
-    The LLM analyzes the Swagger spec and creates intelligent test scenarios.
+    The LLM analyzes the Swagger spec (a dict or its SpecIndex) and creates
+    intelligent test scenarios.
+    operations limits generation to a set of operation keys ("GET /pet/{petId}").
+    """
+    return list(iter_tests_with_llm(swagger, login_endpoint, model, operations))
+
+
+def iter_tests_with_llm(swagger, login_endpoint=None, model="llama3.2", operations=None):
+    """
+    generate_tests_with_llm yielding each batch's tests as soon as the LLM
+    has answered it and every batch before it, so they can run while the
+    remaining batches are generated. Tests get sequential ids in batch order.
     """
     
     # Get all paths from Swagger
-    paths = swagger.get("paths", {})
+    index = spec_index(swagger)
+    paths = index.spec.get("paths", {})
+    if operations is not None:
+        # Only the selected operations of each path go into the prompts
+        paths = {path: {key: value for key, value in index.spec["paths"][path].items()
+                        if key.lower() not in HTTP_METHODS or operation_key(key, path) in operations}
+                 for path, path_operations in index.paths.items()
+                 if any(operation_key(o.method, path) in operations for o in path_operations)}
     test_counter = 1
     
     # Normalize login_endpoint for exclusion
     login_path = login_endpoint.strip() if login_endpoint else None
     
     # Calculate expected test count (2 tests per endpoint per method)
-    expected_test_count = 0
-    for path, methods in paths.items():
-        for method in methods:
-            if method.lower() in ["get", "post", "put", "delete", "patch"]:
-                expected_test_count += 2  # positive + unauthorized
+    expected_test_count = 2 * sum(1 for operation in index.operations()
+                                  if operation.method in ["get", "post", "put", "delete", "patch"]
+                                  and (operations is None
+                                       or operation_key(operation.method, operation.path) in operations))  # positive + unauthorized
     
     print(f"\n[LLM] Using {model} to generate tests for {len(paths)} endpoints...", flush=True)
     print(f"Expected ~{expected_test_count} test cases", flush=True)
@@ -79,7 +103,6 @@ def generate_tests_with_llm(swagger: dict, login_endpoint=None, model="llama3.2"
     
     # Process endpoints one at a time for maximum reliability
     batch_size = 1  # 1 endpoint at a time = guaranteed completion
-    all_tests = []
     path_items = list(paths.items())
     total_batches = (len(path_items) + batch_size - 1) // batch_size
     
@@ -87,66 +110,70 @@ def generate_tests_with_llm(swagger: dict, login_endpoint=None, model="llama3.2"
     print(f"Running 2 batches in parallel for faster processing...\n", flush=True)
     
     # Process with 2 parallel batches at a time
-    lock = Lock()
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = []
     
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        futures = []
-        
-        for i in range(0, len(path_items), batch_size):
-            batch_paths = dict(path_items[i:i + batch_size])
-            batch_num = (i // batch_size) + 1
-            
-            future = executor.submit(
-                generate_batch_with_llm,
-                batch_paths,
-                swagger,
-                login_path,
-                model,
-                batch_num,
-                total_batches,
-                test_counter
-            )
-            futures.append((future, batch_num))
+    for i in range(0, len(path_items), batch_size):
+        batch_paths = dict(path_items[i:i + batch_size])
+        batch_num = (i // batch_size) + 1
         
-        # Collect results as they complete
+        future = executor.submit(
+            generate_batch_with_llm,
+            batch_paths,
+            index,
+            login_path,
+            model,
+            batch_num,
+            total_batches,
+            test_counter
+        )
+        futures.append((future, batch_num))
+    
+    # Hand out results in submission order, so the same spec always gets the same ids
+    generated = 0
+    try:
         for future, batch_num in futures:
             try:
-                batch_tests, test_counter = future.result(timeout=300)
-                
-                if batch_tests:
-                    with lock:
-                        all_tests.extend(batch_tests)
-                    print(f"  ✓ Batch {batch_num}: Added {len(batch_tests)} tests (Total so far: {len(all_tests)})\n", flush=True)
-                else:
-                    print(f"  ✗ Batch {batch_num}: Generated 0 tests (skipping)\n", flush=True)
+                batch_tests, _ = future.result(timeout=BATCH_TIMEOUT)
+            except FutureTimeoutError:
+                print(f"  ✗ Batch {batch_num}: ERROR - no answer after {BATCH_TIMEOUT}s (skipping)\n", flush=True)
+                continue
             except Exception as e:
                 print(f"  ✗ Batch {batch_num}: ERROR - {e}\n", flush=True)
+                continue
+            if not batch_tests:
+                print(f"  ✗ Batch {batch_num}: Generated 0 tests (skipping)\n", flush=True)
+                continue
+            print(f"  ✓ Batch {batch_num}: Added {len(batch_tests)} tests (Total so far: {generated + len(batch_tests)})\n", flush=True)
+            for test in batch_tests:
+                # Sequential test IDs without gaps from failed batches
+                generated += 1
+                test['id'] = f"test{generated:03d}"
+                yield test
+    finally:
+        # Drop batches not started yet (e.g. an aborted run) and don't wait on a batch that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
     
     # Calculate elapsed time
     elapsed_time = time.time() - start_time
     
-    # Re-number test IDs sequentially to avoid gaps from parallel processing
-    for idx, test in enumerate(all_tests, 1):
-        test['id'] = f"test{idx:03d}"
-    
     # Report results (no fallback - use LLM results only)
-    if not all_tests:
+    if not generated:
         print(f"\nERROR: LLM generation failed to produce any valid tests (took {elapsed_time:.1f}s)", flush=True)
         print("TIP: Check if Ollama is running and the model is available", flush=True)
-        return []
+        return
     
-    if len(all_tests) < expected_test_count:
-        print(f"\nWARNING: LLM generated {len(all_tests)}/{expected_test_count} expected tests (took {elapsed_time:.1f}s)", flush=True)
+    if generated < expected_test_count:
+        print(f"\nWARNING: LLM generated {generated}/{expected_test_count} expected tests (took {elapsed_time:.1f}s)", flush=True)
         print("TIP: Increase num_predict tokens or use a larger model for better coverage", flush=True)
     else:
-        print(f"\nSUCCESS: LLM generated {len(all_tests)} test cases in {elapsed_time:.1f} seconds", flush=True)
-    
-    return all_tests
+        print(f"\nSUCCESS: LLM generated {generated} test cases in {elapsed_time:.1f} seconds", flush=True)
 
 
-def generate_batch_with_llm(paths_batch: dict, swagger: dict, login_endpoint: str, model: str, batch_num: int, total_batches: int, test_counter: int):
+def generate_batch_with_llm(paths_batch: dict, swagger, login_endpoint: str, model: str, batch_num: int, total_batches: int, test_counter: int):
     """
     Generate test cases for a batch of endpoints using LLM.
+    swagger is the spec's SpecIndex (or the spec dict).
     """
     
     # Create simplified spec for this batch with schema information
@@ -311,12 +338,10 @@ Generate {expected_tests} tests (2 per endpoint, no exceptions):"""
                     "endpoint": endpoint,
                     "expected_status": int(test["expected_status"]) if isinstance(test["expected_status"], str) else test["expected_status"],
                     "auth": test.get("auth", "valid"),
-                    "headers": test.get("headers", {
-                        "accept": "application/json",
-                        "Content-Type": "application/json",
-                        "Locale": "en_US"
-                    })
+                    "headers": intern_headers(test["headers"]) if isinstance(test.get("headers"), dict) else DEFAULT_HEADERS
                 }
+                if len(paths_batch) == 1:
+                    validated_test["path"] = next(iter(paths_batch))  # lets --only-changed map it to its operation
                 # Add body if present and not empty
                 if "body" in test and test["body"]:
                     validated_test["body"] = test["body"]
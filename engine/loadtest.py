@@ -0,0 +1,182 @@
+import asyncio
+import math
+import random
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, only needed for load tests
+    aiohttp = None
+
+from engine.capture import CHUNK_SIZE
+from engine.executor import prepare_request
+from engine.histogram import LatencyHistogram
+
+
+def arrival_time(n, rate, ramp_up):
+    """
+    Intended start (seconds from the beginning) of the n-th request (0-based)
+    when the arrival rate grows linearly from 0 to `rate` over ramp_up seconds
+    and then stays at `rate`.
+    """
+    ramp_requests = rate * ramp_up / 2
+    if n < ramp_requests:
+        return math.sqrt(2 * ramp_up * n / rate)
+    return ramp_up + (n - ramp_requests) / rate
+
+
+def _endpoint_key(test):
+    return f"{test['method']} {test.get('path') or test['endpoint'].split('?', 1)[0]}"
+
+
+async def run_load_test(tests, api_key, base_url, rate, duration, ramp_up=0.0, max_in_flight=1000,
+                        timeout=30, seed=None, auth_provider=None):
+    """
+    Replay the suite as a traffic mix in an open model: requests start at the
+    target arrival rate (after a linear ramp-up) whether or not earlier ones
+    have finished, for ramp_up + duration seconds. The mix is the valid-auth
+    tests (all tests if there are none), picked at random.
+
+    Latency is measured from each request's intended start, so a slow target
+    shows up in the percentiles instead of silently lowering the load
+    (coordinated omission); service_time is measured from the actual send.
+    Arrivals that find max_in_flight requests outstanding are dropped and
+    counted. Steady-state samples go into per-endpoint LatencyHistograms.
+    With an auth_provider (TokenProvider), valid-auth tests send its shared
+    bearer token; a failed login counts as an error of that request.
+    Returns a summary dict for generate_load_report.
+    """
+    if aiohttp is None:
+        raise RuntimeError("Load tests require aiohttp (pip install aiohttp)")
+    if rate <= 0 or duration <= 0:
+        raise ValueError("Load test rate and duration must be positive")
+
+    base_url = base_url.rstrip("/")
+    mix = [t for t in tests if t.get("auth") == "valid"] or list(tests)
+    if not mix:
+        raise ValueError("Load test needs at least one test case")
+    rng = random.Random(seed)
+    total_time = ramp_up + duration
+
+    endpoints = {}
+    latency = LatencyHistogram()
+    service_time = LatencyHistogram()
+    throughput = {}
+    counts = {"sent": 0, "completed": 0, "dropped": 0, "errors": 0, "steady_completed": 0}
+
+    print(f"\n{'='*70}", flush=True)
+    print(f"LOAD TEST: {rate:g} req/s for {duration:g}s (ramp-up {ramp_up:g}s), "
+          f"{len(mix)} tests in the mix", flush=True)
+    print(f"{'='*70}", flush=True)
+
+    connector = aiohttp.TCPConnector(limit=max_in_flight, limit_per_host=max_in_flight)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        def record(test, intended, sent_at, status, error):
+            done = loop.time()
+            key = _endpoint_key(test)
+            entry = endpoints.get(key)
+            if entry is None:
+                entry = endpoints[key] = {"requests": 0, "passed": 0, "errors": 0, "status_codes": {},
+                                          "latency": LatencyHistogram(), "steady": 0}
+            entry["requests"] += 1
+            counts["completed"] += 1
+            if error:
+                entry["errors"] += 1
+                counts["errors"] += 1
+            else:
+                entry["status_codes"][str(status)] = entry["status_codes"].get(str(status), 0) + 1
+                if status == test.get("expected_status"):
+                    entry["passed"] += 1
+            second = int(done - start)
+            throughput[second] = throughput.get(second, 0) + 1
+            if intended >= ramp_up and not error:
+                latency_ms = (done - start - intended) * 1000
+                entry["latency"].record(latency_ms)
+                entry["steady"] += 1
+                latency.record(latency_ms)
+                service_time.record((done - sent_at) * 1000)
+                counts["steady_completed"] += 1
+
+        async def send(test, intended):
+            sent_at = loop.time()
+            try:
+                token = None
+                if auth_provider:
+                    token = await auth_provider.get_async() if test["auth"] == "valid" else "invalid"
+                url, headers, body_json, _ = prepare_request(test, api_key, base_url, token)
+                kwargs = {"headers": headers}
+                if body_json is not None:
+                    kwargs["json"] = body_json
+                sent_at = loop.time()  # service time starts at the send, not at the login
+                async with session.request(test["method"], url, **kwargs) as r:
+                    async for _ in r.content.iter_chunked(CHUNK_SIZE):
+                        pass
+                    status = r.status
+                if status == 401 and auth_provider and test["auth"] == "valid":
+                    auth_provider.invalidate(token)  # the next request logs in again
+                record(test, intended, sent_at, status, None)
+            except Exception as e:
+                record(test, intended, sent_at, None, type(e).__name__)
+
+        tasks = set()
+        n = 0
+        next_progress = 5.0
+        while True:
+            intended = arrival_time(n, rate, ramp_up)
+            if intended >= total_time:
+                break
+            delay = start + intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            n += 1
+            if intended >= next_progress:
+                print(f"[{intended:.0f}s] sent {counts['sent']}, completed {counts['completed']}, "
+                      f"in flight {len(tasks)}, dropped {counts['dropped']}", flush=True)
+                next_progress += 5.0
+            test = rng.choice(mix)
+            if len(tasks) >= max_in_flight:
+                counts["dropped"] += 1
+                continue
+            counts["sent"] += 1
+            task = asyncio.ensure_future(send(test, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+
+    summary = {
+        "target_rate": rate,
+        "ramp_up_s": ramp_up,
+        "duration_s": duration,
+        "max_in_flight": max_in_flight,
+        "elapsed_s": round(elapsed, 3),
+        "sent": counts["sent"],
+        "completed": counts["completed"],
+        "dropped": counts["dropped"],
+        "errors": counts["errors"],
+        "achieved_rps": round(counts["steady_completed"] / duration, 2),
+        "latency": latency.to_dict(),
+        "service_time": service_time.to_dict(),
+        "endpoints": {
+            key: {
+                "requests": e["requests"],
+                "passed": e["passed"],
+                "errors": e["errors"],
+                "status_codes": e["status_codes"],
+                "rps": round(e["steady"] / duration, 2),
+                "latency": e["latency"].to_dict()
+            }
+            for key, e in sorted(endpoints.items())
+        },
+        "throughput": [{"t": second, "rps": throughput.get(second, 0)}
+                       for second in range(int(elapsed) + 1)]
+    }
+    print(f"Load test finished: {summary['completed']} completed, {summary['errors']} errors, "
+          f"{summary['dropped']} dropped, {summary['achieved_rps']} req/s steady state, "
+          f"p99 {summary['latency'].get('p99_ms')} ms", flush=True)
+    return summary
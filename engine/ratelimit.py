@@ -0,0 +1,162 @@
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from threading import Lock
+from urllib.parse import urlsplit
+
+# Status codes whose Retry-After header means "come back later", not "failed"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """
+    Token bucket with reservation semantics: reserve() always takes a token,
+    letting the balance go negative, and returns how long the caller has to
+    wait before its token is actually available. pause() blocks the bucket
+    until a point in time (e.g. from a Retry-After header).
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now):
+        delay = max(0.0, self.blocked_until - now)
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                delay = max(delay, -self.tokens / self.rate)
+        return delay
+
+    def pause(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class RateLimiter:
+    """
+    Request-rate limiter shared by all executor workers.
+    global_rate caps the requests/sec of the whole run; rules map a host
+    ("api.example.com"), a path prefix ("/store") or both ("api.example.com/store")
+    to their own requests/sec. A request takes a token from the global bucket and
+    from every rule it matches, and waits for the slowest of them.
+    """
+
+    def __init__(self, global_rate=None, rules=None, burst=None):
+        self._lock = Lock()
+        self.global_bucket = TokenBucket(global_rate, burst)
+        self.rules = []
+        for key, rate in (rules or {}).items():
+            host, _, prefix = key.partition("/") if not key.startswith("/") else ("", "", key[1:])
+            self.rules.append((key, host, "/" + prefix if prefix else "", TokenBucket(rate, burst)))
+        self.throttled_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttle_responses = 0
+        self.requeued = 0
+        self.rule_hits = {key: 0 for key, _, _, _ in self.rules}
+
+    def _buckets(self, url, endpoint, count=False):
+        host = urlsplit(url).netloc
+        path = endpoint.split("?", 1)[0]
+        buckets = [self.global_bucket]
+        for key, rule_host, prefix, bucket in self.rules:
+            if (not rule_host or rule_host == host) and (not prefix or path.startswith(prefix)):
+                buckets.append(bucket)
+                if count:
+                    self.rule_hits[key] += 1
+        return buckets
+
+    def reserve(self, url, endpoint):
+        """Take a token for the request and return how many seconds to wait before sending it"""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(bucket.reserve(now) for bucket in self._buckets(url, endpoint, count=True))
+            if delay > 0:
+                self.throttled_requests += 1
+                self.total_wait += delay
+                self.max_wait = max(self.max_wait, delay)
+            return delay
+
+    def acquire(self, url, endpoint):
+        """Block the calling thread until the request may be sent"""
+        delay = self.reserve(url, endpoint)
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, url, endpoint, seconds):
+        """Hold back every bucket the request maps to for `seconds` (Retry-After)"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self.throttle_responses += 1
+            self.requeued += 1
+            for bucket in self._buckets(url, endpoint):
+                bucket.pause(until)
+
+    def stats(self):
+        """Throttling statistics for the run metadata"""
+        with self._lock:
+            return {
+                "global_rate": self.global_bucket.rate,
+                "rules": {key: bucket.rate for key, _, _, bucket in self.rules},
+                "rule_hits": dict(self.rule_hits),
+                "throttled_requests": self.throttled_requests,
+                "total_wait_s": round(self.total_wait, 3),
+                "max_wait_s": round(self.max_wait, 3),
+                "throttle_responses": self.throttle_responses,
+                "requeued": self.requeued
+            }
+
+
+def parse_rate_rules(spec):
+    """Parse "prefix=rate,host/prefix=rate" (or a list of such items) into a rules dict"""
+    items = spec if isinstance(spec, (list, tuple)) else (spec or "").split(",")
+    rules = {}
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        key, _, rate = item.rpartition("=")
+        if not key:
+            raise ValueError(f"Invalid rate limit rule '{item}', expected <host or /path>=<requests per second>")
+        rules[key.strip()] = float(rate)
+    return rules
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date); None if unparseable"""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def requeue_delay(test, result, attempts, max_requeues=3, default_delay=1.0, max_delay=60.0):
+    """
+    Seconds to wait before re-queuing a throttled test, or None if the result is final.
+    A 429 is always treated as throttling; a 503 only when it carries Retry-After.
+    Tests that expect the throttling status are never re-queued.
+    """
+    status = result.get("actual")
+    if attempts >= max_requeues or status not in THROTTLE_STATUS_CODES or status == test.get("expected_status"):
+        return None
+    delay = result.get("retry_after")
+    if delay is None:
+        if status != 429:
+            return None
+        delay = default_delay
+    return min(delay, max_delay)
@@ -5,6 +5,54 @@ import os
 from collections import defaultdict
 import re
 
+from engine.histogram import LatencyHistogram
+
+def latency_percentiles(tests):
+    """
+    p50/p95/p99 of elapsed_ms over the tests that recorded a timing, from a
+    LatencyHistogram so they match the streaming summary and load reports
+    """
+    histogram = LatencyHistogram()
+    for t in tests:
+        if t.get('elapsed_ms') is not None:
+            histogram.record(t['elapsed_ms'])
+    return {
+        'p50': histogram.percentile(50),
+        'p95': histogram.percentile(95),
+        'p99': histogram.percentile(99)
+    }
+
+def concurrency_chart_points(timeline, width=800, height=180):
+    """
+    Convert a concurrency timeline [{"t", "limit"}, ...] into SVG polyline points
+    drawn as a step chart. Returns (points, max_time, max_limit).
+    """
+    if not timeline:
+        return "", 0, 0
+    max_time = max(point["t"] for point in timeline) or 1
+    max_limit = max(point["limit"] for point in timeline) or 1
+    points = []
+    previous_y = None
+    for point in timeline:
+        x = point["t"] / max_time * width
+        y = height - point["limit"] / max_limit * height
+        if previous_y is not None:
+            points.append(f"{x:.1f},{previous_y:.1f}")
+        points.append(f"{x:.1f},{y:.1f}")
+        previous_y = y
+    return " ".join(points), max_time, max_limit
+
+def sweep_chart_points(values, max_value, width=800, height=180):
+    """
+    SVG polyline points for one series of a sweep chart: levels are spaced
+    evenly along x (they are usually powers of two), y is scaled to max_value.
+    """
+    if not values:
+        return ""
+    step = width / max(len(values) - 1, 1)
+    max_value = max_value or 1
+    return " ".join(f"{i * step:.1f},{height - (v or 0) / max_value * height:.1f}" for i, v in enumerate(values))
+
 def generate_html_report(results, path, metadata=None):
     """Generate HTML report at the specified path"""
     # Ensure directory exists
@@ -23,6 +71,22 @@ def generate_html_report(results, path, metadata=None):
     llm_model = metadata.get('llm_model')
     base_url = metadata.get('base_url', 'N/A')
     total_tests_generated = metadata.get('total_tests', len(results))
+    execution_stats = metadata.get('execution_stats', {})
+    connection_stats = execution_stats.get('connections')
+    concurrency_stats = execution_stats.get('concurrency')
+    throttling_stats = execution_stats.get('throttling')
+    dependency_stats = execution_stats.get('dependencies')
+    circuit_stats = execution_stats.get('circuit_breaker')
+    retry_stats = execution_stats.get('retries')
+    hedge_stats = execution_stats.get('hedging')
+    timeout_stats = execution_stats.get('timeouts')
+    auth_stats = execution_stats.get('auth')
+    budget_stats = execution_stats.get('failure_budget')
+    aborted = execution_stats.get('aborted')
+    concurrency_chart = None
+    if concurrency_stats and concurrency_stats.get('timeline'):
+        points, max_time, max_limit = concurrency_chart_points(concurrency_stats['timeline'])
+        concurrency_chart = {'points': points, 'max_time': max_time, 'max_limit': max_limit}
 
     # Group results by endpoint
     endpoint_groups = defaultdict(list)
@@ -51,6 +115,7 @@ def generate_html_report(results, path, metadata=None):
             'total': len(tests),
             'passed': passed,
             'failed': failed,
+            'latency': latency_percentiles(tests),
             'tests': tests
         }
 
@@ -97,6 +162,7 @@ def generate_html_report(results, path, metadata=None):
             .endpoint-stats .total { background: #e3f2fd; color: #1976d2; }
             .endpoint-stats .pass { background: #e8f5e9; color: #388e3c; }
             .endpoint-stats .fail { background: #ffebee; color: #d32f2f; }
+            .endpoint-stats .latency { background: #fff3e0; color: #e65100; }
             
             table { width: 100%; border-collapse: collapse; }
             th { background: #667eea; color: white; padding: 12px; text-align: left; font-weight: 600; }
@@ -106,11 +172,22 @@ def generate_html_report(results, path, metadata=None):
             .passed-false { color: #d32f2f; font-weight: bold; }
             .test-id { font-family: monospace; background: #f5f5f5; padding: 4px 8px; border-radius: 4px; }
             .error-cell { color: #d32f2f; font-size: 12px; }
+            .aborted-banner { background: #ffebee; color: #b71c1c; border-left: 4px solid #d32f2f; padding: 15px 20px; border-radius: 4px; margin: 20px 0; font-size: 16px; }
+            
+            .chart-section { background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #667eea; }
+            .chart-section h3 { margin-top: 0; color: #667eea; }
+            .chart-section svg { background: white; border: 1px solid #e0e0e0; border-radius: 4px; }
+            .chart-caption { font-size: 12px; color: #666; margin-top: 8px; }
         </style>
     </head>
     <body>
         <div class="container">
             <h1>API AI Tester Report - {{run_id}}</h1>
+            {% if aborted %}
+            <div class="aborted-banner">
+                <strong>RUN ABORTED - PARTIAL RESULTS.</strong> {{aborted.reason}}; {{aborted.completed}} tests completed{% if aborted.not_run is not none %}, {{aborted.not_run}} not run{% endif %}.
+            </div>
+            {% endif %}
             
             {% if timings %}
             <div class="timing-section">
@@ -128,6 +205,12 @@ def generate_html_report(results, path, metadata=None):
                         <div class="time">{{\"%.2f\"|format(timings.test_generation)}}<span class="unit">sec</span></div>
                     </div>
                     {% endif %}
+                    {% if timings.first_test %}
+                    <div class="timing-card">
+                        <label>FIRST TEST (OVERLAPPED)</label>
+                        <div class="time">{{\"%.2f\"|format(timings.first_test)}}<span class="unit">sec</span></div>
+                    </div>
+                    {% endif %}
                     <div class="timing-card">
                         <label>TEST EXECUTION</label>
                         <div class="time">{{\"%.2f\"|format(timings.test_execution)}}<span class="unit">sec</span></div>
@@ -167,9 +250,81 @@ def generate_html_report(results, path, metadata=None):
                         <label>Tests Generated</label>
                         <value>{{total_tests_generated}}</value>
                     </div>
+                    {% if connection_stats %}
+                    <div class="info-item">
+                        <label>Connections Opened / Reused</label>
+                        <value>{{connection_stats.connections_opened}} / {{connection_stats.connections_reused}} ({{\"%.1f\"|format(connection_stats.reuse_ratio * 100)}}% reuse)</value>
+                    </div>
+                    {% endif %}
+                    {% if throttling_stats and (throttling_stats.global_rate or throttling_stats.rules or throttling_stats.throttle_responses) %}
+                    <div class="info-item">
+                        <label>Rate Limit</label>
+                        <value>{{throttling_stats.global_rate or "unlimited"}} req/s{% for key, rate in throttling_stats.rules.items() %}, {{key}}: {{rate}} req/s ({{throttling_stats.rule_hits[key]}} requests){% endfor %}</value>
+                    </div>
+                    <div class="info-item">
+                        <label>Throttling</label>
+                        <value>{{throttling_stats.throttled_requests}} delayed ({{\"%.1f\"|format(throttling_stats.total_wait_s)}}s total, max {{\"%.2f\"|format(throttling_stats.max_wait_s)}}s), {{throttling_stats.throttle_responses}} 429/503 responses, {{throttling_stats.requeued}} re-queued</value>
+                    </div>
+                    {% endif %}
+                    {% if circuit_stats and circuit_stats.trips %}
+                    <div class="info-item">
+                        <label>Circuit Breaker</label>
+                        <value>{{circuit_stats.trips}} trips, {{circuit_stats.skipped}} tests skipped ({% for key, c in circuit_stats.endpoints.items() %}{{key}}: {{c.state}}{% if not loop.last %}, {% endif %}{% endfor %})</value>
+                    </div>
+                    {% endif %}
+                    {% if retry_stats %}
+                    <div class="info-item">
+                        <label>Retries</label>
+                        <value>{{retry_stats.retries}} retries of {{retry_stats.retried_tests}} tests (max {{retry_stats.max_retries}}), {{retry_stats.recovered}} recovered, {{retry_stats.exhausted}} still failing</value>
+                    </div>
+                    {% endif %}
+                    {% if hedge_stats %}
+                    <div class="info-item">
+                        <label>Hedged Requests</label>
+                        <value>{{hedge_stats.hedged}} hedged after p{{hedge_stats.percentile}}, duplicate answered first {{hedge_stats.hedge_wins}} times</value>
+                    </div>
+                    {% endif %}
+                    {% if timeout_stats %}
+                    <div class="info-item">
+                        <label>Adaptive Timeouts</label>
+                        <value>{{timeout_stats.multiplier}}x p99, {{timeout_stats.floor_s}}-{{timeout_stats.ceiling_s}}s{% for key, t in timeout_stats.read_timeouts_s.items() %}, {{key}}: {{t}}s{% endfor %}</value>
+                    </div>
+                    {% endif %}
+                    {% if auth_stats %}
+                    <div class="info-item">
+                        <label>Bearer Token</label>
+                        <value>{{auth_stats.logins}} logins ({{auth_stats.refreshes}} refreshes, {{auth_stats.invalidations}} after 401, {{auth_stats.failures}} failed) via {{auth_stats.login_url}}</value>
+                    </div>
+                    {% endif %}
+                    {% if budget_stats %}
+                    <div class="info-item">
+                        <label>Failure Budget</label>
+                        <value>{{budget_stats.failed}} of {{budget_stats.completed}} failed (limit: {% if budget_stats.max_failures is not none %}{{budget_stats.max_failures}} tests{% else %}{{"%.0f"|format(budget_stats.max_failure_rate * 100)}}% after {{budget_stats.min_sample}}{% endif %}){% if budget_stats.exceeded %} - exceeded{% endif %}</value>
+                    </div>
+                    {% endif %}
+                    {% if dependency_stats %}
+                    <div class="info-item">
+                        <label>Stateful Chains</label>
+                        <value>{{dependency_stats.chains}} chains ({{dependency_stats.chained_tests}} tests), {{dependency_stats.resolved_chains}} with a created id</value>
+                    </div>
+                    {% endif %}
                 </div>
             </div>
             
+            {% if concurrency_chart %}
+            <div class="chart-section">
+                <h3>Adaptive Concurrency</h3>
+                <svg width="820" height="200" viewBox="-10 -10 820 200">
+                    <polyline points="{{concurrency_chart.points}}" fill="none" stroke="#667eea" stroke-width="2"/>
+                </svg>
+                <div class="chart-caption">
+                    In-flight limit over {{\"%.1f\"|format(concurrency_chart.max_time)}}s (peak {{concurrency_chart.max_limit}},
+                    range {{concurrency_stats.min_limit}}-{{concurrency_stats.max_limit}}, final {{concurrency_stats.final_limit}},
+                    {{concurrency_stats.increases}} increases, {{concurrency_stats.decreases}} decreases)
+                </div>
+            </div>
+            {% endif %}
+            
             <h2>Test Results Summary</h2>
             <div class="summary">
                 <div class="stat-card endpoints">
@@ -200,6 +355,9 @@ def generate_html_report(results, path, metadata=None):
                         <span class="total">{{stats.total}} tests</span>
                         <span class="pass">✓ {{stats.passed}} passed</span>
                         <span class="fail">✗ {{stats.failed}} failed</span>
+                        {% if stats.latency.p50 is not none %}
+                        <span class="latency">p50 {{\"%.1f\"|format(stats.latency.p50)}} / p95 {{\"%.1f\"|format(stats.latency.p95)}} / p99 {{\"%.1f\"|format(stats.latency.p99)}} ms</span>
+                        {% endif %}
                     </div>
                 </div>
                 <table>
@@ -210,6 +368,7 @@ def generate_html_report(results, path, metadata=None):
                         <th>Expected</th>
                         <th>Actual</th>
                         <th>Status</th>
+                        <th>Time (ms)</th>
                         <th>Error</th>
                     </tr>
                     {% for test in stats.tests %}
@@ -220,8 +379,9 @@ def generate_html_report(results, path, metadata=None):
                         <td>{{test.expected if test.expected is defined else "-"}}</td>
                         <td>{{test.actual if test.actual is defined else "-"}}</td>
                         <td class="{% if test.passed %}passed-true{% else %}passed-false{% endif %}">
-                            {% if test.passed %}✅ PASS{% else %}❌ FAIL{% endif %}
+                            {% if test.passed %}✅ PASS{% elif test.skipped %}⏭️ SKIP{% else %}❌ FAIL{% endif %}
                         </td>
+                        <td title="{% if test.timings is defined %}DNS {{test.timings.dns_ms}} / connect {{test.timings.connect_ms}} / TLS {{test.timings.tls_ms}} / TTFB {{test.timings.ttfb_ms}} / download {{test.timings.download_ms}} ms, {{test.response_bytes}} bytes{% if test.response_truncated %} (truncated in artifact){% endif %}{% if test.connection_reused %}, reused connection{% endif %}{% endif %}">{{\"%.1f\"|format(test.elapsed_ms) if test.elapsed_ms is defined and test.elapsed_ms is not none else "-"}}</td>
                         <td class="error-cell">{{test.error if test.error is defined else ""}}</td>
                     </tr>
                     {% endfor %}
@@ -246,11 +406,27 @@ def generate_html_report(results, path, metadata=None):
             generation_method=generation_method,
             llm_model=llm_model,
             base_url=base_url,
-            total_tests_generated=total_tests_generated
+            total_tests_generated=total_tests_generated,
+            connection_stats=connection_stats,
+            concurrency_stats=concurrency_stats,
+            concurrency_chart=concurrency_chart,
+            throttling_stats=throttling_stats,
+            dependency_stats=dependency_stats,
+            circuit_stats=circuit_stats,
+            retry_stats=retry_stats,
+            hedge_stats=hedge_stats,
+            timeout_stats=timeout_stats,
+            auth_stats=auth_stats,
+            budget_stats=budget_stats,
+            aborted=aborted
         ))
 
-def generate_junit(results, path):
-    """Generate JUnit XML report at the specified path"""
+def generate_junit(results, path, aborted=None):
+    """
+    Generate JUnit XML report at the specified path.
+    For an aborted run (aborted: stats["aborted"]) a failing "Run aborted"
+    test case is added so CI marks the partial report as failed.
+    """
     # Ensure directory exists
     dir_path = os.path.dirname(path)
     if dir_path:  # Only create if there's a directory component
@@ -261,13 +437,241 @@ def generate_junit(results, path):
     
     cases = []
     for r in results:
-        tc = TestCase(r["name"])
-        if not r.get("passed", False):
+        elapsed_ms = r.get("elapsed_ms")
+        tc = TestCase(r["name"], elapsed_sec=elapsed_ms / 1000 if elapsed_ms is not None else None)
+        if r.get("skipped"):
+            tc.add_skipped_info(message=r.get("error", "skipped"))
+        elif not r.get("passed", False):
             tc.add_failure_info(
                 message=f"Expected {r.get('expected')} got {r.get('actual')}",
                 output=r.get("error", "")
             )
         cases.append(tc)
+    if aborted:
+        tc = TestCase("Run aborted")
+        tc.add_error_info(message=aborted["reason"],
+                          output=f"{aborted['completed']} tests completed, "
+                                 f"{aborted['not_run'] if aborted['not_run'] is not None else 'unknown number of'} not run")
+        cases.append(tc)
     suite = TestSuite(f"API-AI-Tester-{run_id}", cases)
     with open(path, "w", encoding="utf-8") as f:
         TestSuite.to_file(f, [suite])
+
+def generate_load_report(summary, path):
+    """Generate the load test throughput/percentile HTML report (summary from run_load_test)"""
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+
+    run_id = os.path.basename(path).replace('load_', '').replace('.html', '')
+    timeline = [{"t": point["t"], "limit": point["rps"]} for point in summary.get("throughput", [])]
+    points, max_time, max_rps = concurrency_chart_points(timeline)
+    percentile_keys = [('p50_ms', 'p50'), ('p90_ms', 'p90'), ('p95_ms', 'p95'), ('p99_ms', 'p99'),
+                       ('p99_9_ms', 'p99.9'), ('max_ms', 'max')]
+
+    tpl = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Load Test Report - {{run_id}}</title>
+        <style>
+            body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+            .container { max-width: 1400px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+            h1 { color: #333; border-bottom: 3px solid #667eea; padding-bottom: 10px; }
+            h2 { color: #333; margin-top: 40px; border-left: 4px solid #667eea; padding-left: 15px; }
+            .summary { display: grid; grid-template-columns: repeat(4, 1fr); gap: 20px; margin: 30px 0; }
+            .stat-card { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px; text-align: center; }
+            .stat-card h3 { margin: 0; font-size: 14px; opacity: 0.9; }
+            .stat-card .number { font-size: 36px; font-weight: bold; margin: 10px 0; }
+            .stat-card.success { background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); }
+            .stat-card.failed { background: linear-gradient(135deg, #eb3349 0%, #f45c43 100%); }
+            .stat-card.endpoints { background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); }
+            table { width: 100%; border-collapse: collapse; }
+            th { background: #667eea; color: white; padding: 12px; text-align: left; font-weight: 600; }
+            td { padding: 10px 12px; border-bottom: 1px solid #eee; }
+            tr:hover { background: #f8f9fa; }
+            .chart-section { background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #667eea; }
+            .chart-section h3 { margin-top: 0; color: #667eea; }
+            .chart-section svg { background: white; border: 1px solid #e0e0e0; border-radius: 4px; }
+            .chart-caption { font-size: 12px; color: #666; margin-top: 8px; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>Load Test Report - {{run_id}}</h1>
+            <p>Target {{summary.target_rate}} req/s for {{summary.duration_s}}s after a {{summary.ramp_up_s}}s ramp-up
+               (open model, max {{summary.max_in_flight}} in flight). Latency is measured from each request's
+               intended start; percentiles cover the steady state only.</p>
+
+            <div class="summary">
+                <div class="stat-card endpoints">
+                    <h3>ACHIEVED REQ/S</h3>
+                    <div class="number">{{summary.achieved_rps}}</div>
+                </div>
+                <div class="stat-card">
+                    <h3>REQUESTS SENT</h3>
+                    <div class="number">{{summary.sent}}</div>
+                </div>
+                <div class="stat-card success">
+                    <h3>P99 LATENCY (MS)</h3>
+                    <div class="number">{{summary.latency.p99_ms if summary.latency.count else "-"}}</div>
+                </div>
+                <div class="stat-card failed">
+                    <h3>ERRORS / DROPPED</h3>
+                    <div class="number">{{summary.errors}} / {{summary.dropped}}</div>
+                </div>
+            </div>
+
+            {% if points %}
+            <div class="chart-section">
+                <h3>Throughput</h3>
+                <svg width="820" height="200" viewBox="-10 -10 820 200">
+                    <polyline points="{{points}}" fill="none" stroke="#667eea" stroke-width="2"/>
+                </svg>
+                <div class="chart-caption">Completed requests per second over {{max_time}}s (peak {{max_rps}} req/s)</div>
+            </div>
+            {% endif %}
+
+            <h2>Latency Percentiles (ms)</h2>
+            <table>
+                <tr>
+                    <th>Endpoint</th><th>Requests</th><th>Req/s</th><th>Passed</th><th>Errors</th><th>Status Codes</th>
+                    {% for key, label in percentile_keys %}<th>{{label}}</th>{% endfor %}
+                </tr>
+                <tr style="font-weight: bold;">
+                    <td>All endpoints</td><td>{{summary.completed}}</td><td>{{summary.achieved_rps}}</td><td></td><td>{{summary.errors}}</td><td></td>
+                    {% for key, label in percentile_keys %}<td>{{summary.latency[key] if summary.latency.count else "-"}}</td>{% endfor %}
+                </tr>
+                <tr>
+                    <td>Service time (from send)</td><td></td><td></td><td></td><td></td><td></td>
+                    {% for key, label in percentile_keys %}<td>{{summary.service_time[key] if summary.service_time.count else "-"}}</td>{% endfor %}
+                </tr>
+                {% for endpoint, stats in summary.endpoints.items() %}
+                <tr>
+                    <td>{{endpoint}}</td><td>{{stats.requests}}</td><td>{{stats.rps}}</td><td>{{stats.passed}}</td><td>{{stats.errors}}</td>
+                    <td>{% for code, count in stats.status_codes.items() %}{{code}}: {{count}}{% if not loop.last %}, {% endif %}{% endfor %}</td>
+                    {% for key, label in percentile_keys %}<td>{{stats.latency[key] if stats.latency.count else "-"}}</td>{% endfor %}
+                </tr>
+                {% endfor %}
+            </table>
+        </div>
+    </body>
+    </html>
+    """)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(tpl.render(
+            run_id=run_id,
+            summary=summary,
+            points=points,
+            max_time=max_time,
+            max_rps=max_rps,
+            percentile_keys=percentile_keys
+        ))
+
+
+def generate_sweep_report(summary, path):
+    """Generate the HTML report of a concurrency or payload-size sweep (summary from engine/sweep.py)"""
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+
+    run_id = re.sub(r'^(payload_)?sweep_', '', os.path.basename(path)).replace('.html', '')
+    levels = summary.get("levels", [])
+    throughputs = [level["throughput_rps"] for level in levels]
+    percentile_series = {
+        label: [level["latency"].get(key) for level in levels]
+        for key, label in (("p50_ms", "p50"), ("p95_ms", "p95"), ("p99_ms", "p99"))
+    }
+    max_latency = max([v for series in percentile_series.values() for v in series if v is not None] or [1])
+    step = 800 / max(len(levels) - 1, 1)
+    charts = {
+        "throughput": sweep_chart_points(throughputs, max(throughputs or [1])),
+        "latency": {label: sweep_chart_points(series, max_latency) for label, series in percentile_series.items()},
+        "labels": [(i * step, level.get("value_label", level["value"])) for i, level in enumerate(levels)],
+        "knee_x": next((i * step for i, level in enumerate(levels) if level["value"] == summary.get("knee")), None),
+        "max_throughput": max(throughputs or [0]),
+        "max_latency": max_latency
+    }
+    colors = {"p50": "#11998e", "p95": "#667eea", "p99": "#eb3349"}
+
+    tpl = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Sweep Report - {{run_id}}</title>
+        <style>
+            body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+            .container { max-width: 1400px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+            h1 { color: #333; border-bottom: 3px solid #667eea; padding-bottom: 10px; }
+            h2 { color: #333; margin-top: 40px; border-left: 4px solid #667eea; padding-left: 15px; }
+            table { width: 100%; border-collapse: collapse; }
+            th { background: #667eea; color: white; padding: 12px; text-align: left; font-weight: 600; }
+            td { padding: 10px 12px; border-bottom: 1px solid #eee; }
+            tr:hover { background: #f8f9fa; }
+            tr.knee { background: #fff3e0; }
+            .chart-section { background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #667eea; }
+            .chart-section h3 { margin-top: 0; color: #667eea; }
+            .chart-section svg { background: white; border: 1px solid #e0e0e0; border-radius: 4px; }
+            .chart-caption { font-size: 12px; color: #666; margin-top: 8px; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>{{summary.parameter|replace("_", " ")|title}} Sweep - {{run_id}}</h1>
+            <p>{{summary.tests}} tests per level{% if summary.engine %}, {{summary.engine}} engine{% endif %}.
+               {% if summary.knee is not none %}Throughput knee at <b>{{summary.knee}}</b>{% endif %}
+               {% if summary.latency_climb is not none %}; p95 latency climbs from <b>{{summary.latency_climb_label or summary.latency_climb}}</b>{% endif %}.</p>
+
+            <div class="chart-section">
+                <h3>Throughput (req/s)</h3>
+                <svg width="820" height="220" viewBox="-10 -10 820 220">
+                    {% if charts.knee_x is not none %}<line x1="{{charts.knee_x}}" y1="0" x2="{{charts.knee_x}}" y2="180" stroke="#e65100" stroke-dasharray="4"/>{% endif %}
+                    <polyline points="{{charts.throughput}}" fill="none" stroke="#667eea" stroke-width="2"/>
+                    {% for x, label in charts.labels %}<text x="{{x}}" y="200" font-size="11" text-anchor="middle">{{label}}</text>{% endfor %}
+                </svg>
+                <div class="chart-caption">Peak {{charts.max_throughput}} req/s; the dashed line marks the knee</div>
+            </div>
+
+            <div class="chart-section">
+                <h3>Latency (ms)</h3>
+                <svg width="820" height="220" viewBox="-10 -10 820 220">
+                    {% for label, points in charts.latency.items() %}<polyline points="{{points}}" fill="none" stroke="{{colors[label]}}" stroke-width="2"/>{% endfor %}
+                    {% for x, label in charts.labels %}<text x="{{x}}" y="200" font-size="11" text-anchor="middle">{{label}}</text>{% endfor %}
+                </svg>
+                <div class="chart-caption">{% for label, color in colors.items() %}<span style="color: {{color}}">■ {{label}}</span> {% endfor %}(max {{charts.max_latency}} ms)</div>
+            </div>
+
+            <h2>Levels</h2>
+            <table>
+                <tr><th>{{summary.parameter|replace("_", " ")|title}}</th><th>Tests</th><th>Passed</th><th>Errors</th><th>Time (s)</th><th>Req/s</th>{% if has_mbps %}<th>MB/s</th>{% endif %}<th>p50</th><th>p95</th><th>p99</th><th>max</th></tr>
+                {% for level in summary.levels %}
+                <tr{% if level.value == summary.knee %} class="knee"{% endif %}>
+                    <td>{{level.value_label or level.value}}</td><td>{{level.tests}}</td><td>{{level.passed}}</td><td>{{level.errors}}</td>
+                    <td>{{level.elapsed_s}}</td><td>{{level.throughput_rps}}</td>{% if has_mbps %}<td>{{level.throughput_mbps}}</td>{% endif %}
+                    <td>{{level.latency.p50_ms or "-"}}</td><td>{{level.latency.p95_ms or "-"}}</td><td>{{level.latency.p99_ms or "-"}}</td><td>{{level.latency.max_ms or "-"}}</td>
+                </tr>
+                {% endfor %}
+            </table>
+
+            {% if summary.endpoints %}
+            <h2>Endpoints</h2>
+            <table>
+                <tr><th>Endpoint</th><th>Size</th><th>Body Bytes</th><th>Status Codes</th><th>p50</th><th>p95</th><th>max</th></tr>
+                {% for endpoint, rows in summary.endpoints.items() %}
+                {% for row in rows %}
+                <tr>
+                    <td>{{endpoint if loop.first else ""}}</td><td>{{row.size_label}}</td><td>{{row.body_bytes}}</td>
+                    <td>{% for code, count in row.status_codes.items() %}{{code}}: {{count}}{% if not loop.last %}, {% endif %}{% endfor %}</td>
+                    <td>{{row.latency.p50_ms or "-"}}</td><td>{{row.latency.p95_ms or "-"}}</td><td>{{row.latency.max_ms or "-"}}</td>
+                </tr>
+                {% endfor %}
+                {% endfor %}
+            </table>
+            {% endif %}
+        </div>
+    </body>
+    </html>
+    """)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(tpl.render(run_id=run_id, summary=summary, charts=charts, colors=colors,
+                           has_mbps=any("throughput_mbps" in level for level in levels)))
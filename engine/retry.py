@@ -0,0 +1,213 @@
+import asyncio
+import random
+from concurrent.futures import FIRST_COMPLETED, wait
+from threading import Lock
+
+import requests
+
+from engine.circuit import circuit_key
+from engine.histogram import LatencyHistogram
+from engine.http2 import transport_errors
+
+try:
+    import aiohttp
+except ImportError:  # only the async engine needs it
+    aiohttp = None
+
+# Methods a server must treat as idempotent (RFC 9110), so repeating them is safe
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Gateway errors worth another attempt when the test does not expect them
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+def is_transient_error(error):
+    """True for connection errors and timeouts of either engine's HTTP client; anything else is not retried"""
+    transient = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                 asyncio.TimeoutError) + transport_errors()
+    if aiohttp is not None:
+        transient += (aiohttp.ClientConnectionError,)
+    return isinstance(error, transient)
+
+
+class RetryPolicy:
+    """
+    Retry policy for transient failures, shared by all executor workers.
+    A test is retried after a connection error/timeout or a 502/503/504 it
+    does not expect, up to max_retries times, waiting a random time between 0
+    and base_delay * 2^attempt (capped at max_delay) - exponential backoff
+    with full jitter. Only idempotent methods are retried unless the test case
+    opts in with "retry": true; "retry": false opts any test out. A 503 with
+    Retry-After is left to the throttling re-queue instead.
+    """
+
+    def __init__(self, max_retries=2, base_delay=0.2, max_delay=5.0, retry_statuses=RETRY_STATUS_CODES, seed=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = tuple(retry_statuses)
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self.retries = 0
+        self.retried_tests = 0
+        self.recovered = 0
+        self.exhausted = 0
+
+    def retryable(self, test):
+        """True if the test may be sent more than once"""
+        opt_in = test.get("retry")
+        if opt_in is not None:
+            return bool(opt_in)
+        return test["method"].upper() in IDEMPOTENT_METHODS
+
+    def backoff(self, test, attempt, error=None, status=None, retry_after=None):
+        """
+        Seconds to wait before retrying a test whose attempt-th retry (0 for the
+        first send) ended in error or status, or None if the outcome is final
+        """
+        if error is not None:
+            if not is_transient_error(error):
+                return None
+        elif (status not in self.retry_statuses or status == test.get("expected_status")
+                or retry_after is not None):
+            return None
+        if not self.retryable(test):
+            return None
+        if attempt >= self.max_retries:
+            if attempt:
+                with self._lock:
+                    self.exhausted += 1
+            return None
+        with self._lock:
+            self.retries += 1
+            if attempt == 0:
+                self.retried_tests += 1
+            return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def record(self, result):
+        """Count a retried test's final result: it recovered only if its last attempt passed"""
+        if result.get("passed"):
+            with self._lock:
+                self.recovered += 1
+
+    def stats(self):
+        """Retry statistics for the run metadata"""
+        with self._lock:
+            return {
+                "max_retries": self.max_retries,
+                "retries": self.retries,
+                "retried_tests": self.retried_tests,
+                "recovered": self.recovered,
+                "exhausted": self.exhausted
+            }
+
+
+class HedgePolicy:
+    """
+    Hedged requests for slow responses, shared by all executor workers.
+    Response latency is tracked per endpoint; once an endpoint has min_samples
+    responses, a request to it (GET only, by default) that has not been
+    answered after the endpoint's observed p<percentile> gets a duplicate, and
+    whichever answers first is used. Hedges do not take rate limiter tokens.
+    """
+
+    def __init__(self, percentile=95, min_samples=20, methods=("GET",)):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.methods = tuple(m.upper() for m in methods)
+        self._lock = Lock()
+        self._latency = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_after(self, test):
+        """Seconds to wait for the first response before hedging, or None to never hedge"""
+        if test["method"].upper() not in self.methods:
+            return None
+        with self._lock:
+            histogram = self._latency.get(circuit_key(test))
+            if histogram is None or histogram.count < self.min_samples:
+                return None
+            return histogram.percentile(self.percentile) / 1000
+
+    def observe(self, test, elapsed_ms):
+        """Record the latency of a response from the test's endpoint"""
+        key = circuit_key(test)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = LatencyHistogram()
+            histogram.record(elapsed_ms)
+
+    def record(self, hedge_won):
+        """Count a request that was hedged and whether the duplicate answered first"""
+        with self._lock:
+            self.hedged += 1
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def record(self, result):
+        """Count a retried test's final result: it recovered only if its last attempt passed"""
+        if result.get("passed"):
+            with self._lock:
+                self.recovered += 1
+
+    def stats(self):
+        """Hedging statistics for the run metadata"""
+        with self._lock:
+            return {
+                "percentile": self.percentile,
+                "min_samples": self.min_samples,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins
+            }
+
+
+def _first_success(done):
+    """The first finished future that did not raise, if any"""
+    for future in done:
+        if future.exception() is None:
+            return future
+    return None
+
+
+def hedged_call(send, hedge_after, pool):
+    """
+    Run send() on pool; if it has not returned after hedge_after seconds, run
+    a second send() and return whichever succeeds first.
+    Returns (value, hedged, hedge_won); raises the primary's error if both fail.
+    The losing request is left to finish in the background.
+    """
+    primary = pool.submit(send)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        return primary.result(), False, False
+    backup = pool.submit(send)
+    pending = {primary, backup}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = _first_success(done)
+        if winner is not None:
+            return winner.result(), True, winner is backup
+    return primary.result(), True, False
+
+
+async def hedged_call_async(send, hedge_after):
+    """hedged_call for coroutines: the loser is cancelled once a winner returns"""
+    primary = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result(), False, False
+    backup = asyncio.ensure_future(send())
+    pending = {primary, backup}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = _first_success(done)
+            if winner is not None:
+                return winner.result(), True, winner is backup
+        return primary.result(), True, False
+    finally:
+        for task in (primary, backup):
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,203 @@
+import json
+import re
+
+from engine.swagger import spec_index
+
+_PARAM = re.compile(r"\{([^}]+)\}")
+
+
+def template_regex(template):
+    """Regex matching concrete endpoints of a path template like /pet/{petId}"""
+    pattern = "".join(
+        "([^/?]+)" if part.startswith("{") else re.escape(part)
+        for part in re.split(r"(\{[^}]+\})", template) if part
+    )
+    return re.compile("^" + pattern + r"(?:\?.*)?$")
+
+
+def match_template(endpoint, templates):
+    """Most specific path template (fewest parameters) matching a concrete endpoint, or None"""
+    matches = [t for t in templates if template_regex(t).match(endpoint)]
+    if not matches:
+        return None
+    return min(matches, key=lambda t: (len(_PARAM.findall(t)), -len(t)))
+
+
+def collection_path(template):
+    """Split /store/order/{orderId}/items into ("/store/order", "orderId"); None if no parameter"""
+    match = _PARAM.search(template)
+    if not match:
+        return None
+    return template[:match.start()].rstrip("/"), match.group(1)
+
+
+def extract_values(extract, response_text, request_body=None):
+    """
+    Pull values out of a producer's response for later requests.
+    extract maps a variable name to candidate top-level fields, e.g.
+    {"petId": ["petId", "id"]}; the response JSON is tried first, then the
+    request body (for APIs that echo nothing back).
+    """
+    try:
+        response_json = json.loads(response_text) if response_text else None
+    except ValueError:
+        response_json = None
+    values = {}
+    for name, fields in extract.items():
+        for source in (response_json, request_body):
+            if not isinstance(source, dict):
+                continue
+            found = next((source[f] for f in fields if source.get(f) not in (None, "")), None)
+            if found is not None:
+                values[name] = found
+                break
+    return values
+
+
+def bind(test, context):
+    """Copy of a consumer test with extracted values filled into its endpoint and body"""
+    bound = dict(test)
+    template = test.get("endpoint_template")
+    if template:
+        missing = [p for p in _PARAM.findall(template) if p not in context]
+        if not missing:
+            bound["endpoint"] = _PARAM.sub(lambda m: str(context[m.group(1)]), template)
+    body_field = test.get("bind_body")
+    if body_field and isinstance(test.get("body"), dict) and body_field[0] in context:
+        bound["body"] = dict(test["body"])
+        bound["body"][body_field[1]] = context[body_field[0]]
+    return bound
+
+
+class DependencyScheduler:
+    """
+    Orders stateful tests so they hit real resources.
+    For every parameterised path like /pet/{petId} whose collection /pet has a
+    valid POST test, the POST becomes a producer: its response "petId" (or "id")
+    is extracted and substituted into the valid GET/PUT/POST/PATCH tests on the
+    item path (and into the body "id" of PUT/PATCH on the collection), which run
+    in parallel once it finishes; DELETE tests on the item run last. All other
+    tests, and every chain, are independent and run fully in parallel.
+    """
+
+    def __init__(self, tests, swagger=None):
+        templates = {t["path"] for t in tests if t.get("path")}
+        if swagger:
+            templates.update(spec_index(swagger).paths)
+        self.templates = templates
+        self._stages = {}       # chain index -> list of stages (lists of tests)
+        self._position = {}     # test id -> (chain index, stage index)
+        self._remaining = {}    # chain index -> tests left in the current stage
+        self._context = {}      # chain index -> extracted values
+        self._initial = []
+        self.resolved_chains = 0
+        self._build(tests)
+
+    def _build(self, tests):
+        by_template = {}
+        for test in tests:
+            template = test.get("path") or match_template(test["endpoint"].split("?", 1)[0], self.templates)
+            by_template.setdefault(template, []).append(test)
+
+        chained = set()
+        chains = []
+        for template in sorted(t for t in by_template if t):
+            split = collection_path(template)
+            if not split:
+                continue
+            collection, param = split
+            producer = next((t for t in by_template.get(collection, [])
+                             if t["method"] == "POST" and _is_positive(t) and id(t) not in chained), None)
+            if producer is None:
+                continue
+            item_tests = [t for tpl, group in by_template.items()
+                          if tpl and tpl.startswith(template) and tpl[len(template):len(template) + 1] in ("", "/")
+                          for t in group if _is_positive(t) and id(t) not in chained]
+            if not item_tests:
+                continue
+            body_tests = [t for t in by_template.get(collection, [])
+                          if t["method"] in ("PUT", "PATCH") and _is_positive(t)
+                          and isinstance(t.get("body"), dict) and "id" in t["body"] and id(t) not in chained]
+
+            producer = dict(producer, extract={param: [param, "id"]})
+            consumers = []
+            for t in body_tests:
+                consumers.append(dict(t, bind_body=(param, "id")))
+            for t in item_tests:
+                endpoint_template = _endpoint_template(t, template)
+                consumers.append(dict(t, endpoint_template=endpoint_template) if endpoint_template else t)
+            middle = [t for t in consumers if t["method"] != "DELETE"]
+            last = [t for t in consumers if t["method"] == "DELETE"]
+            stages = [s for s in ([producer], middle, last) if s]
+
+            for original in [p for p in by_template[collection] if p["id"] == producer["id"]] + body_tests + item_tests:
+                chained.add(id(original))
+            chains.append(stages)
+
+        chained_ids = set()
+        for index, stages in enumerate(chains):
+            self._stages[index] = stages
+            self._context[index] = {}
+            for stage_index, stage in enumerate(stages):
+                for t in stage:
+                    self._position[t["id"]] = (index, stage_index)
+                    chained_ids.add(t["id"])
+            self._remaining[index] = len(stages[0])
+            self._initial.extend(stages[0])
+
+        self._initial.extend(t for t in tests if t["id"] not in chained_ids)
+
+    def initial_tests(self):
+        """Tests that can start immediately: independent tests and the producer of every chain"""
+        return list(self._initial)
+
+    def complete(self, test, result):
+        """Record a finished test; returns the tests (bound to extracted values) that are now ready"""
+        position = self._position.get(test["id"])
+        if position is None:
+            return []
+        index, stage_index = position
+        if result.get("extracted"):
+            if not self._context[index]:
+                self.resolved_chains += 1
+            self._context[index].update(result["extracted"])
+        self._remaining[index] -= 1
+        if self._remaining[index]:
+            return []
+        stages = self._stages[index]
+        if stage_index + 1 >= len(stages):
+            return []
+        next_stage = stages[stage_index + 1]
+        self._remaining[index] = len(next_stage)
+        return [bind(t, self._context[index]) for t in next_stage]
+
+    def stats(self):
+        """Chain statistics for the run metadata"""
+        return {
+            "chains": len(self._stages),
+            "chained_tests": len(self._position),
+            "resolved_chains": self.resolved_chains
+        }
+
+
+def _is_positive(test):
+    """Valid-auth test expecting success: the ones that should operate on a real resource"""
+    status = test.get("expected_status")
+    return test.get("auth") == "valid" and isinstance(status, int) and 200 <= status < 300
+
+
+def _endpoint_template(test, template):
+    """
+    Turn a concrete endpoint back into a template for the chain's parameter,
+    keeping every other path segment and the query string as generated.
+    """
+    endpoint, _, query = test["endpoint"].partition("?")
+    test_template = test.get("path") or template
+    concrete = endpoint.split("/")
+    parts = test_template.split("/")
+    if len(concrete) != len(parts):
+        return None
+    chain_params = set(_PARAM.findall(template))
+    rebuilt = [part if _PARAM.fullmatch(part) and _PARAM.fullmatch(part).group(1) in chain_params else value
+               for part, value in zip(parts, concrete)]
+    return "/".join(rebuilt) + ("?" + query if query else "")
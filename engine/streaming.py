@@ -0,0 +1,260 @@
+import json
+import os
+import queue
+import re
+import textwrap
+import time
+from threading import Lock, Thread
+
+from engine.histogram import LatencyHistogram
+from engine.testcase import CompactSuiteWriter, as_dict, is_compact_header, iter_compact_suite
+
+# Whitespace and commas between the items of a JSON array
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_test_cases(path, chunk_size=1 << 20):
+    """
+    Lazily yield test cases from a JSON array file (test_cases.json), a
+    JSON Lines file or a compact suite (as TestCases), reading chunk_size
+    characters at a time so only one chunk plus the current test is held in
+    memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        pos = _SEPARATORS.match(buffer).end()
+        if buffer[pos:pos + 1] != "[":
+            # JSON Lines: one test per line, or a compact suite (see save_suite)
+            f.seek(0)
+            first = f.readline()
+            if is_compact_header(first):
+                yield from iter_compact_suite(f)
+                return
+            if first.strip():
+                yield json.loads(first)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        pos += 1
+        eof = False
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if buffer[pos:pos + 1] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"Truncated or invalid test case file: {path}")
+                # Item spans the chunk boundary: drop what was consumed and read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+
+
+def write_test_cases(tests, path, compact=False):
+    """
+    Pass tests through while writing them to a JSON array file, laid out as
+    json.dump(tests, f, indent=2) would, or as a compact suite (see
+    save_suite); the file is replaced once the last test has been written,
+    so an interrupted run keeps the previous suite
+    """
+    tmp = path + ".tmp"
+    complete = False
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            if compact:
+                writer = CompactSuiteWriter(f)
+                for test in tests:
+                    writer.write(test)
+                    yield test
+            else:
+                f.write("[")
+                separator = "\n"
+                for test in tests:
+                    f.write(separator + textwrap.indent(json.dumps(as_dict(test), indent=2), "  "))
+                    separator = ",\n"
+                    yield test
+                f.write("\n]" if separator != "\n" else "]")
+        complete = True
+    finally:
+        if complete:
+            os.replace(tmp, path)
+        elif os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class TestFeed:
+    """
+    Runs a test case generator on a background thread and hands its tests to
+    the executor through a bounded queue, so tests are executed while the
+    rest are still being generated and a slow executor holds the generator
+    back instead of buffering the whole suite.
+
+    Iterating blocks for the next test. The executors instead poll() it and
+    register on_ready() to be woken when tests arrive, so they keep collecting
+    results while the generator works. An exception raised by the generator
+    is re-raised to the consumer at the end of the feed.
+    """
+
+    _DONE = object()
+
+    def __init__(self, tests, maxsize=1000):
+        self._queue = queue.Queue(maxsize)
+        self._lock = Lock()
+        self._listener = None
+        self._closed = False
+        self.error = None
+        self.exhausted = False
+        self.produced = 0
+        self.started_at = time.perf_counter()
+        self.first_test_s = None
+        self.generation_s = None
+        self._thread = Thread(target=self._run, args=(tests,), name="test-feed", daemon=True)
+        self._thread.start()
+
+    def _run(self, tests):
+        try:
+            for test in tests:
+                if self._closed:
+                    if hasattr(tests, "close"):
+                        tests.close()  # lets generators clean up (see write_test_cases)
+                    return
+                if self.first_test_s is None:
+                    self.first_test_s = time.perf_counter() - self.started_at
+                self._put(test)
+                self.produced += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self.generation_s = time.perf_counter() - self.started_at
+            self._put(self._DONE)
+
+    def _put(self, item):
+        self._queue.put(item)
+        with self._lock:
+            listener = self._listener
+        if listener:
+            listener()
+
+    def on_ready(self, listener):
+        """Call listener() (from the generator thread) whenever a test or the end of the feed is queued"""
+        with self._lock:
+            self._listener = listener
+
+    def _take(self, item):
+        if item is self._DONE:
+            self.exhausted = True
+            if self.error is not None:
+                raise self.error
+            return None
+        return item
+
+    def poll(self):
+        """Next test if one is ready, else None (check exhausted to tell a pause from the end)"""
+        if self.exhausted:
+            return None
+        try:
+            return self._take(self._queue.get_nowait())
+        except queue.Empty:
+            return None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.exhausted:
+            raise StopIteration
+        test = self._take(self._queue.get())
+        if test is None:
+            raise StopIteration
+        return test
+
+    def close(self):
+        """Stop the generator after its current test (e.g. after an aborted run) and drop the queued tests"""
+        self._closed = True
+        while True:  # frees a generator blocked on a full queue
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        """Generation timing for the run metadata"""
+        return {
+            "produced": self.produced,
+            "first_test_s": self.first_test_s,
+            "generation_s": self.generation_s
+        }
+
+
+class ResultSink:
+    """
+    Streams results to a JSON Lines file instead of keeping them in memory.
+    Only running aggregates are kept: pass/fail counts, a fixed-memory latency
+    histogram for the run and for each endpoint, and the ids of the first
+    max_failures failed tests.
+    """
+
+    def __init__(self, path, max_failures=100):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_failures = max_failures
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.endpoints = {}
+        self.failures = []
+        self._file = open(path, "w", encoding="utf-8")
+
+    def add(self, result, test):
+        """Write one result and fold it into the aggregates"""
+        self._file.write(json.dumps(result, separators=(",", ":")) + "\n")
+        self.total += 1
+        # Group by path template so data-driven tests do not create one entry per id
+        key = f"{test['method']} {test.get('path') or test['endpoint'].split('?', 1)[0]}"
+        endpoint = self.endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.endpoints[key] = {"total": 0, "passed": 0, "failed": 0, "latency": LatencyHistogram()}
+        endpoint["total"] += 1
+        if result.get("passed"):
+            self.passed += 1
+            endpoint["passed"] += 1
+        else:
+            self.failed += 1
+            endpoint["failed"] += 1
+            if len(self.failures) < self.max_failures:
+                self.failures.append(result["id"])
+        if "error" in result:
+            self.errors += 1
+        if result.get("elapsed_ms") is not None:
+            self.latency.record(result["elapsed_ms"])
+            endpoint["latency"].record(result["elapsed_ms"])
+
+    def close(self):
+        self._file.close()
+
+    def summary(self):
+        """Aggregates for the run summary file"""
+        return {
+            "results_file": self.path,
+            "total": self.total,
+            "passed": self.passed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "latency": self.latency.to_dict(),
+            "endpoints": {
+                key: {"total": e["total"], "passed": e["passed"], "failed": e["failed"],
+                      "latency": e["latency"].to_dict()}
+                for key, e in sorted(self.endpoints.items())
+            },
+            "first_failures": self.failures
+        }
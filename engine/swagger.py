@@ -1,19 +1,442 @@
 
+import contextlib
+import copy
+import gc
+import glob
+import gzip
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlparse
+from urllib.request import url2pathname
+
 import requests
 
-def load_swagger(swagger_input: str) -> dict:
-    resp = requests.get(swagger_input, timeout=20)
-    resp.raise_for_status()
-    return resp.json()
+try:
+    import yaml
+
+    class _YamlLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):  # libyaml when available
+        """Safe loader that keeps timestamps (example: 2020-01-01) as strings, as they would be in JSON"""
+
+    _YamlLoader.yaml_implicit_resolvers = {
+        first: [(tag, regexp) for tag, regexp in resolvers if tag != "tag:yaml.org,2002:timestamp"]
+        for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+    }
+except ImportError:  # optional dependency, only needed for YAML specs
+    yaml = None
+
+# Where downloaded specs are cached between runs (see load_swagger)
+DEFAULT_SPEC_CACHE = os.path.join("artifacts", "spec_cache")
+
+# marshal's format is only stable within one Python version
+_MARSHAL_SUFFIX = f".py{sys.version_info[0]}{sys.version_info[1]}.marshal"
+
+# Local spec files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def parse_spec(data, name=""):
+    """
+    Parse a spec from bytes (or any buffer, e.g. a memory map). name is the
+    file name or URL path: .gz (or gzip data) is decompressed first, .yaml and
+    .yml are parsed as YAML, anything else as JSON - or as YAML if it does
+    not look like JSON.
+    """
+    if name.endswith(".gz") or data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+        name = name[:-3] if name.endswith(".gz") else name
+    text = str(data, "utf-8-sig")
+    if not name.endswith((".yaml", ".yml")) and (name.endswith(".json") or text.lstrip()[:1] in ("{", "[")):
+        return json.loads(text)
+    if yaml is None:
+        raise RuntimeError("YAML specs require PyYAML (pip install pyyaml)")
+    return yaml.load(text, Loader=_YamlLoader)
+
+
+@contextlib.contextmanager
+def _file_data(path):
+    """The content of a file; memory-mapped when it is large"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            yield f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+
+def spec_path(swagger_input):
+    """Local file path of a spec given as a path or file:// URL, or None for an http(s) URL"""
+    if swagger_input.startswith(("http://", "https://")):
+        return None
+    if swagger_input.startswith("file://"):
+        return url2pathname(urlparse(swagger_input).path)
+    return swagger_input
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class SpecCache:
+    """
+    On-disk cache of downloaded specs.
+    Specs are stored by the SHA-256 of their content, parsed, as marshal data
+    (<sha>.pyXY.marshal), which loads several times faster than the JSON. A
+    small <sha of url>.meta.json per URL records the content hash, its
+    ETag/Last-Modified for conditional GETs and when it was last validated.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_SPEC_CACHE):
+        self.cache_dir = cache_dir
+
+    def _meta_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".meta.json")
+
+    def _spec_path(self, sha):
+        return os.path.join(self.cache_dir, sha + _MARSHAL_SUFFIX)
+
+    def meta(self, url):
+        """Cache entry of a URL, or None if it has none (or its spec file is gone)"""
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(self._spec_path(meta.get("sha256", ""))) else None
+
+    def load(self, sha):
+        """Parsed spec with a content hash, or None"""
+        try:
+            with open(self._spec_path(sha), "rb") as f:
+                data = f.read()  # marshal.load() on the file reads it in small pieces
+        except OSError:
+            return None
+        # Building millions of containers would trigger the cyclic GC over and over; none are garbage
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def store(self, sha, spec):
+        """Keep a parsed spec under its content hash (a no-op if already kept)"""
+        path = self._spec_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _write_atomic(path, marshal.dumps(spec))
+
+    def update(self, url, meta):
+        """Record a URL's cache entry; specs it no longer uses are removed unless another entry uses them"""
+        previous = _read_json(self._meta_path(url))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _write_atomic(self._meta_path(url), json.dumps(meta).encode("utf-8"))
+        stale = _cached_shas(previous) - _cached_shas(meta) if previous else set()
+        if stale:
+            for meta_path in glob.glob(os.path.join(self.cache_dir, "*.meta.json")):
+                stale -= _cached_shas(_read_json(meta_path))
+        for sha in stale:
+            for path in glob.glob(os.path.join(self.cache_dir, sha + ".*")):
+                os.remove(path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cached_shas(meta):
+    """Specs a cache entry uses: the spec itself and its bundle with external $refs resolved"""
+    if not meta:
+        return set()
+    return {meta.get("sha256"), (meta.get("bundle") or {}).get("sha256")} - {None}
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _load_file(path, cache, meta):
+    """
+    (spec, sha256, cache fields) of a local spec file; with a cache, a file
+    whose mtime and size match meta, or whose content is cached, is not parsed
+    """
+    version = _file_version(path)
+    if cache and meta and meta.get("file_version") == version:
+        spec = cache.load(meta["sha256"])
+        if spec is not None:
+            return spec, meta["sha256"], {"file_version": version}
+    with _file_data(path) as data:
+        sha = hashlib.sha256(data).hexdigest()
+        spec = cache.load(sha) if cache else None  # e.g. a fresh checkout of an unchanged file
+        if spec is None:
+            spec = parse_spec(data, path)
+            if cache:
+                cache.store(sha, spec)
+    return spec, sha, {"file_version": version}
+
+
+def _download(url, cache, meta, offline_ttl):
+    """
+    (spec, sha256, cache fields) of a spec URL; with a cache the download is
+    a conditional GET, or skipped within offline_ttl of the last validation
+    """
+    name = urlparse(url).path
+    if not cache:
+        resp = requests.get(url, timeout=20)
+        resp.raise_for_status()
+        return parse_spec(resp.content, name), hashlib.sha256(resp.content).hexdigest(), {}
+
+    if meta and offline_ttl is not None and time.time() - meta["validated_at"] < offline_ttl:
+        spec = cache.load(meta["sha256"])
+        if spec is not None:
+            fields = {key: meta.get(key) for key in ("etag", "last_modified", "validated_at")}
+            return spec, meta["sha256"], fields
+
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    resp = requests.get(url, timeout=20, headers=headers)
+    spec = None
+    if resp.status_code == 304 and meta:
+        sha = meta["sha256"]
+        spec = cache.load(sha)
+    if spec is None:
+        if resp.status_code == 304:
+            # The cached copy vanished under us: fetch the spec unconditionally
+            resp = requests.get(url, timeout=20)
+        resp.raise_for_status()
+        sha = hashlib.sha256(resp.content).hexdigest()
+        spec = cache.load(sha)
+        if spec is None:
+            spec = parse_spec(resp.content, name)
+            cache.store(sha, spec)
+    # A 304 may leave out the validators; the cached ones still apply then
+    previous = meta if resp.status_code == 304 else {}
+    return spec, sha, {
+        "etag": resp.headers.get("ETag") or previous.get("etag"),
+        "last_modified": resp.headers.get("Last-Modified") or previous.get("last_modified")
+    }
+
+
+def _is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def _ref_source(base, document):
+    """Absolute path or URL of the document part of a $ref ("schemas/order.yaml") made in base"""
+    if _is_url(document):
+        return document
+    if document.startswith("file://"):
+        return os.path.abspath(url2pathname(urlparse(document).path))
+    if _is_url(base):
+        return urljoin(base, document)
+    return os.path.normpath(os.path.join(os.path.dirname(base), url2pathname(document)))
+
+
+def _refs(document):
+    """Every dict holding a string $ref in a parsed document (each shared YAML node once)"""
+    seen = set()
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            if isinstance(node.get("$ref"), str):
+                yield node
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+
+
+def _external_sources(document, source):
+    """Documents referenced by $refs in a document"""
+    sources = set()
+    for node in _refs(document):
+        ref_document = node["$ref"].partition("#")[0]
+        if ref_document:
+            sources.add(_ref_source(source, ref_document))
+    return sources
+
+
+def _fetch_document(source):
+    """(parsed document, version) of an externally referenced file or URL"""
+    if _is_url(source):
+        resp = requests.get(source, timeout=20)
+        resp.raise_for_status()
+        version = resp.headers.get("ETag") or hashlib.sha256(resp.content).hexdigest()
+        return parse_spec(resp.content, urlparse(source).path), version
+    with _file_data(source) as data:
+        return parse_spec(data, source), _file_version(source)
+
+
+def _find_cycles(edges):
+    """Cycles in the document reference graph, each as a list of sources"""
+    cycles = []
+    state = {}  # source -> "active" while on the DFS path, "done" after
+
+    def visit(source, path):
+        state[source] = "active"
+        path.append(source)
+        for target in sorted(edges.get(source, ())):
+            if state.get(target) == "active":
+                cycles.append(path[path.index(target):] + [target])
+            elif target not in state:
+                visit(target, path)
+        path.pop()
+        state[source] = "done"
+
+    for source in edges:
+        if source not in state:
+            visit(source, [])
+    return cycles
+
+
+def bundle_external_refs(spec, source, max_workers=8):
+    """
+    Resolve the $refs of a spec that point into other files or URLs
+    ("./schemas/order.yaml#/Order"). Referenced documents are loaded in
+    parallel, wave by wave as they reference further documents, each once,
+    and embedded under spec["x-bundled"]; every $ref is rewritten to point
+    inside the spec (#/x-bundled/order.yaml/Order), so the rest of the engine
+    only ever sees local references. Cross-file reference cycles are kept as
+    references (the sample generator stops at them) and reported.
+    source is the spec's absolute path or URL; the spec is modified in place.
+    Returns (spec, {document source: version}) - no sources if it has no
+    external $refs. Documents that cannot be loaded leave their $refs unresolved.
+    """
+    documents = {source: spec}
+    versions = {}
+    edges = {source: _external_sources(spec, source)}
+    pending = set(edges[source])
+    if not pending:
+        return spec, versions
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending:
+            futures = {src: pool.submit(_fetch_document, src) for src in sorted(pending)}
+            pending = set()
+            for src, future in futures.items():
+                try:
+                    documents[src], versions[src] = future.result()
+                except Exception as e:
+                    print(f"[SPEC] Could not load $ref target {src}: {e}", flush=True)
+                    continue
+                edges[src] = _external_sources(documents[src], src)
+                pending.update(target for target in edges[src] if target not in documents and target not in futures)
+
+    for cycle in _find_cycles(edges):
+        print(f"[SPEC] $ref cycle across files: {' -> '.join(os.path.basename(s) or s for s in cycle)}", flush=True)
+
+    keys = {}
+    for src in documents:
+        if src != source:
+            key = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(urlparse(src).path) or "document")
+            while key in keys.values():
+                key = f"_{key}"
+            keys[src] = key
+    for src, document in documents.items():
+        for node in _refs(document):
+            ref_document, _, pointer = node["$ref"].partition("#")
+            target = _ref_source(src, ref_document) if ref_document else src
+            if target == source:
+                node["$ref"] = "#" + pointer
+            elif target in keys:
+                node["$ref"] = f"#/x-bundled/{keys[target]}{pointer}"
+    spec["x-bundled"] = {keys[src]: document for src, document in documents.items() if src != source}
+    return spec, versions
+
+
+def _bundle_current(bundle):
+    """True if the external documents of a cached bundle are unchanged (remote ones are assumed to be)"""
+    for src, version in bundle["sources"].items():
+        if not _is_url(src):
+            try:
+                if _file_version(src) != version:
+                    return False
+            except OSError:
+                return False
+    return True
+
+
+def load_swagger(swagger_input: str, cache_dir=DEFAULT_SPEC_CACHE, offline_ttl=None) -> dict:
+    """
+    Load and parse a Swagger/OpenAPI spec from an http(s) URL, a file:// URL
+    or a file path; JSON or YAML, optionally gzipped (see parse_spec).
+    $refs into other files or URLs are resolved (see bundle_external_refs).
+    With a cache_dir (see SpecCache) files are only parsed again when their
+    mtime or size changes, and downloads are conditional
+    (If-None-Match/If-Modified-Since): a 304, or a body whose hash is already
+    cached, loads the parsed spec from the cache instead of parsing it again.
+    The spec with its external $refs resolved is cached too, and reused while
+    the spec and its local referenced files are unchanged (remote ones are
+    only fetched again when the spec changes).
+    With offline_ttl, a spec validated less than offline_ttl seconds ago is
+    used without contacting the server at all. cache_dir=None disables caching.
+    """
+    path = spec_path(swagger_input)
+    source = os.path.abspath(path) if path is not None else swagger_input
+    cache = SpecCache(cache_dir) if cache_dir else None
+    meta = cache.meta(source) if cache else None
+    if path is not None:
+        spec, sha, fields = _load_file(path, cache, meta)
+    else:
+        spec, sha, fields = _download(swagger_input, cache, meta, offline_ttl)
+
+    # "bundle" is None once the spec is known to have no external $refs
+    bundle = meta.get("bundle", False) if meta and meta["sha256"] == sha else False
+    bundled = None
+    if bundle and _bundle_current(bundle):
+        bundled = cache.load(bundle["sha256"])
+    if bundle is None:
+        bundled = spec
+    if bundled is None:
+        bundled, sources = bundle_external_refs(spec, source)
+        bundle = None
+        if sources and cache:
+            data = marshal.dumps(bundled)
+            bundle = {"sha256": hashlib.sha256(data).hexdigest(), "sources": sources}
+            cache.store(bundle["sha256"], bundled)
+
+    if cache:
+        cache.update(source, dict({"url": source, "sha256": sha, "bundle": bundle, "validated_at": time.time()},
+                                  **fields))
+    return bundled
 
 def resolve_ref(swagger: dict, ref_path: str):
     """
     Resolve a $ref path like '#/components/schemas/Pet' to the actual schema object.
+    swagger may also be a SpecIndex, which memoizes the lookups.
+    Refs into other files are resolved when the spec is loaded (see
+    bundle_external_refs); any left here resolve to None.
     """
+    if isinstance(swagger, SpecIndex):
+        return swagger.resolve(ref_path)
     if not ref_path or not ref_path.startswith('#/'):
         return None
     
-    parts = ref_path[2:].split('/')  # Remove '#/' and split by '/'
+    # Remove '#/' and split by '/'; a pointer escapes '/' as ~1 and '~' as ~0 (RFC 6901)
+    parts = [unquote(part).replace('~1', '/').replace('~0', '~') for part in ref_path[2:].split('/')]
     current = swagger
     
     for part in parts:
@@ -24,86 +447,373 @@ def resolve_ref(swagger: dict, ref_path: str):
     
     return current
 
-def generate_sample_data(swagger: dict, schema: dict, depth=0, max_depth=3):
+# Keys of a path item that are operations (the rest are summary, parameters, servers, ...)
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# An operation with its parameters and schemas resolved, as kept by SpecIndex
+Operation = namedtuple("Operation", ["path", "method", "spec", "operation_id", "tags", "parameters",
+                                     "request_schema", "response_schemas"])
+
+
+def _content_schema(content):
+    """Schema of a requestBody/response content map, preferring JSON, then XML, then the first type"""
+    if not content:
+        return None
+    for media_type in ('application/json', 'application/xml'):
+        if media_type in content:
+            return content[media_type].get('schema', {})
+    return next(iter(content.values())).get('schema', {})
+
+
+class SpecIndex:
     """
-    Generate sample data based on a JSON schema.
-    Handles types: object, array, string, integer, number, boolean
-    Resolves $ref references.
+    Operations of a Swagger/OpenAPI spec, indexed once so the generators and
+    executors do not walk the raw dict on every lookup.
+    Operations are looked up by (path, method), operationId or tag; each
+    carries its parameters (path-level ones merged in, $refs resolved) and
+    its request and response schemas. $ref targets are resolved once and
+    memoized. The raw spec stays available as .spec.
+    """
+
+    def __init__(self, swagger: dict):
+        self.spec = swagger
+        self._refs = {}
+        self._sample_cache = _new_sample_cache()
+        self.paths = {}          # path template -> [Operation] in spec order
+        self._operations = {}    # (path, method) -> Operation
+        self._by_id = {}
+        self._by_tag = {}
+        for path, path_item in (swagger.get('paths') or {}).items():
+            path_item = self._deref(path_item)
+            if not isinstance(path_item, dict):
+                continue
+            shared = path_item.get('parameters', [])
+            operations = self.paths[path] = []
+            for method, spec in path_item.items():
+                if method.lower() not in HTTP_METHODS or not isinstance(spec, dict):
+                    continue
+                operation = self._build(path, method.lower(), spec, shared)
+                operations.append(operation)
+                self._operations[(path, operation.method)] = operation
+                if operation.operation_id:
+                    self._by_id[operation.operation_id] = operation
+                for tag in operation.tags:
+                    self._by_tag.setdefault(tag, []).append(operation)
+
+    def _deref(self, obj):
+        if isinstance(obj, dict) and '$ref' in obj:
+            return self.resolve(obj['$ref']) or {}
+        return obj
+
+    def _build(self, path, method, spec, shared):
+        # Operation-level parameters override path-level ones with the same name and location
+        parameters = {}
+        for param in list(shared) + list(spec.get('parameters', [])):
+            param = self._deref(param)
+            parameters[(param.get('name'), param.get('in'))] = param
+        request_body = self._deref(spec.get('requestBody') or {})
+        responses = {}
+        for status, response in (spec.get('responses') or {}).items():
+            schema = _content_schema(self._deref(response).get('content'))
+            if schema is not None:
+                responses[str(status)] = schema
+        return Operation(path, method, spec, spec.get('operationId'), tuple(spec.get('tags', [])),
+                         list(parameters.values()), _content_schema(request_body.get('content')), responses)
+
+    def resolve(self, ref_path):
+        """Memoized resolve_ref"""
+        try:
+            return self._refs[ref_path]
+        except KeyError:
+            target = self._refs[ref_path] = resolve_ref(self.spec, ref_path)
+            return target
+
+    def operation(self, path, method):
+        """Operation at a path template and method, or None"""
+        return self._operations.get((path, method.lower()))
+
+    def by_operation_id(self, operation_id):
+        """Operation with an operationId, or None"""
+        return self._by_id.get(operation_id)
+
+    def by_tag(self, tag):
+        """Operations tagged with tag, in spec order"""
+        return list(self._by_tag.get(tag, ()))
+
+    def operations(self):
+        """Every operation in spec order"""
+        for operations in self.paths.values():
+            yield from operations
+
+    def __len__(self):
+        return len(self._operations)
+
+
+def spec_index(swagger):
+    """SpecIndex of a spec; an index passed in is returned as is"""
+    if swagger is None or isinstance(swagger, SpecIndex):
+        return swagger
+    return SpecIndex(swagger)
+
+
+# Schema keywords combining several schemas (see merge_schema)
+COMPOSITION_KEYS = ("allOf", "oneOf", "anyOf")
+
+
+def _new_sample_cache():
+    return {"samples": {}, "merged": {}}
+
+
+def _sample_cache(swagger):
+    """Sample/merge cache of a spec: kept on a SpecIndex across calls, per call for a plain dict"""
+    if isinstance(swagger, SpecIndex):
+        return swagger._sample_cache
+    return _new_sample_cache()
+
+
+def _merge(swagger, schema, seen):
+    if '$ref' in schema:
+        ref = schema['$ref']
+        resolved = resolve_ref(swagger, ref) if ref not in seen else None
+        return _merge(swagger, resolved, seen | {ref}) if resolved else {}
+    if not any(key in schema for key in COMPOSITION_KEYS):
+        return schema
+    merged = {k: v for k, v in schema.items() if k not in COMPOSITION_KEYS}
+    properties = dict(merged.get('properties', {}))
+    required = list(merged.get('required', []))
+    parts = list(schema.get('allOf', []))
+    for key in ('oneOf', 'anyOf'):
+        options = [option for option in schema.get(key, []) if option.get('type') != 'null']
+        if options:
+            parts.append(options[0])
+    for part in parts:
+        for k, v in _merge(swagger, part, seen).items():
+            if k == 'properties':
+                properties.update(v)
+            elif k == 'required':
+                required.extend(name for name in v if name not in required)
+            else:
+                merged.setdefault(k, v)
+    if properties:
+        merged['properties'] = properties
+        merged.setdefault('type', 'object')
+    if required:
+        merged['required'] = required
+    return merged
+
+
+def merge_schema(swagger, schema, cache=None):
+    """
+    Flatten a schema's allOf into one schema (properties and required merged,
+    $refs resolved) and replace oneOf/anyOf by their first non-null option.
+    Merged schemas are cached per schema object in cache (see _sample_cache).
+    """
+    if not any(key in schema for key in COMPOSITION_KEYS):
+        return schema
+    merged_cache = (cache or _sample_cache(swagger))["merged"]
+    cached = merged_cache.get(id(schema))
+    if cached is None or cached[0] is not schema:
+        # The schema is kept with its merge so its id cannot be reused while cached
+        cached = merged_cache[id(schema)] = (schema, _merge(swagger, schema, frozenset()))
+    return cached[1]
+
+
+def _sample(swagger, schema, depth, max_depth, include_optional, cache, stack):
+    """
+    generate_sample_data's recursion; returns (value, cut) where cut is the
+    position in stack of the outermost $ref whose cycle was cut below this
+    schema, or None if the value does not depend on the $refs being expanded
     """
     # Prevent infinite recursion
     if depth > max_depth:
-        return None
-    
-    # Handle $ref
+        return None, None
+
+    # Handle $ref: each (ref, depth) is generated once; a $ref already being expanded is a cycle
     if '$ref' in schema:
-        resolved_schema = resolve_ref(swagger, schema['$ref'])
-        if resolved_schema:
-            return generate_sample_data(swagger, resolved_schema, depth + 1, max_depth)
-        return None
-    
+        ref = schema['$ref']
+        if ref in stack:
+            return None, stack.index(ref)
+        key = (ref, depth, max_depth, include_optional)
+        if key in cache["samples"]:
+            return cache["samples"][key], None
+        resolved_schema = resolve_ref(swagger, ref)
+        if not resolved_schema:
+            return None, None
+        stack.append(ref)
+        value, cut = _sample(swagger, resolved_schema, depth + 1, max_depth, include_optional, cache, stack)
+        stack.pop()
+        if cut is not None and cut >= len(stack):
+            cut = None  # the cycle closes on this $ref, so the value is the same wherever it appears
+        if cut is None:
+            cache["samples"][key] = value
+        return value, cut
+
+    if 'allOf' not in schema:
+        # oneOf/anyOf: sample the first option itself, so a $ref in it is memoized and cycle-checked
+        for key in ('oneOf', 'anyOf'):
+            option = next((o for o in schema.get(key, []) if o.get('type') != 'null'), None)
+            if option is not None:
+                return _sample(swagger, option, depth, max_depth, include_optional, cache, stack)
+    schema = merge_schema(swagger, schema, cache)
     schema_type = schema.get('type', 'object')
     
     # Handle different types
     if schema_type == 'object':
         obj = {}
+        cut = None
         properties = schema.get('properties', {})
         required_fields = schema.get('required', [])
         
         for prop_name, prop_schema in properties.items():
             # Only include required fields or first few properties
-            if prop_name in required_fields or len(obj) < 5:
-                value = generate_sample_data(swagger, prop_schema, depth + 1, max_depth)
+            if include_optional or prop_name in required_fields or len(obj) < 5:
+                value, prop_cut = _sample(swagger, prop_schema, depth + 1, max_depth, include_optional, cache, stack)
+                if prop_cut is not None:
+                    cut = prop_cut if cut is None else min(cut, prop_cut)
                 if value is not None:
                     obj[prop_name] = value
         
-        return obj if obj else {}
+        return obj if obj else {}, cut
     
     elif schema_type == 'array':
         items_schema = schema.get('items', {})
         # Generate one sample item
-        sample_item = generate_sample_data(swagger, items_schema, depth + 1, max_depth)
-        return [sample_item] if sample_item is not None else []
+        sample_item, cut = _sample(swagger, items_schema, depth + 1, max_depth, include_optional, cache, stack)
+        return [sample_item] if sample_item is not None else [], cut
     
     elif schema_type == 'string':
         # Use example, default, or enum values if available
         if 'example' in schema:
-            return schema['example']
+            return schema['example'], None
         elif 'default' in schema:
-            return schema['default']
+            return schema['default'], None
         elif 'enum' in schema and schema['enum']:
-            return schema['enum'][0]
+            return schema['enum'][0], None
         else:
-            return "string"
+            return "string", None
     
     elif schema_type == 'integer':
         if 'example' in schema:
-            return schema['example']
+            return schema['example'], None
         elif 'default' in schema:
-            return schema['default']
+            return schema['default'], None
         else:
-            return 0
+            return 0, None
     
     elif schema_type == 'number':
         if 'example' in schema:
-            return schema['example']
+            return schema['example'], None
         elif 'default' in schema:
-            return schema['default']
+            return schema['default'], None
         else:
-            return 0.0
+            return 0.0, None
     
     elif schema_type == 'boolean':
         if 'default' in schema:
-            return schema['default']
+            return schema['default'], None
         else:
-            return False
+            return False, None
     
-    return None
+    return None, None
+
+
+def generate_sample_data(swagger, schema: dict, depth=0, max_depth=3, include_optional=False):
+    """
+    Generate sample data based on a JSON schema.
+    Handles types: object, array, string, integer, number, boolean
+    Resolves $ref references; allOf is merged and oneOf/anyOf use their first
+    option (see merge_schema). A $ref met again inside its own expansion (a
+    reference cycle) is left out instead of being expanded down to max_depth.
+    With include_optional=True every property is filled, not just the
+    required ones and the first few.
+    The sample of each $ref at each depth is generated once and reused -
+    across calls when swagger is a SpecIndex - so nested values may be shared
+    between samples: copy them before modifying them in place.
+    """
+    value, _ = _sample(swagger, schema, depth, max_depth, include_optional, _sample_cache(swagger), [])
+    # A fresh top-level container, so callers may set fields on it
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+def _json_size(data):
+    return len(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+# String constraints a padded value would violate, turning a payload measurement into a 400
+_CONSTRAINED_STRING_KEYS = ("enum", "const", "format", "pattern", "maxLength")
+
+
+def _resolved_schema(swagger, schema):
+    """A schema with its $refs followed and allOf/oneOf/anyOf merged (see merge_schema); {} if unresolvable"""
+    seen = set()
+    while isinstance(schema, dict) and '$ref' in schema and schema['$ref'] not in seen:
+        seen.add(schema['$ref'])
+        schema = resolve_ref(swagger, schema['$ref'])
+    return merge_schema(swagger, schema) if isinstance(schema, dict) else {}
+
+
+def scale_sample_data(swagger, schema, data, target_bytes):
+    """
+    Grow sample data generated from schema towards target_bytes of compact JSON.
+    Arrays outside other arrays are lengthened by repeating their sample item
+    (the same object, so large bodies are not built item by item); the
+    remainder pads a free-form string property (type string without enum,
+    format, pattern or maxLength) that is not inside an array, so the body
+    stays valid. The sample is copied, not modified, and only serialized at
+    its original size: the size of the result is worked out from the lengths
+    added. Returns (data, size_in_bytes).
+    """
+    holder = {"root": copy.deepcopy(data)}
+    size = _json_size(holder["root"])
+    if size >= target_bytes:
+        return holder["root"], size
+
+    arrays = []
+    strings = []
+
+    def collect(parent, key, value_schema):
+        value = parent[key]
+        if isinstance(value, list):
+            if value:
+                arrays.append((parent, key))
+        elif isinstance(value, dict):
+            properties = _resolved_schema(swagger, value_schema).get("properties", {})
+            for child in value:
+                collect(value, child, properties.get(child, {}))
+        elif isinstance(value, str):
+            value_schema = _resolved_schema(swagger, value_schema)
+            if value_schema.get("type") == "string" and not any(k in value_schema for k in _CONSTRAINED_STRING_KEYS):
+                strings.append((parent, key))
+
+    collect(holder, "root", schema)
+
+    if arrays:
+        share = (target_bytes - size) / len(arrays)
+        for parent, key in arrays:
+            item = parent[key][0]
+            item_size = _json_size(item) + 1  # item plus separating comma
+            count = int(share // item_size)
+            parent[key] = parent[key] + [item] * count
+            size += count * item_size
+
+    if strings and size < target_bytes:
+        parent, key = strings[0]
+        parent[key] = parent[key] + "x" * (target_bytes - size)
+        size = target_bytes
+
+    return holder["root"], size
 
 def get_request_body_schema(swagger: dict, path: str, method: str):
     """
     Extract the request body schema for a given path and method.
     Returns the schema object or None if no request body.
+    swagger may also be a SpecIndex, which has the schemas resolved up front.
     """
+    if isinstance(swagger, SpecIndex):
+        operation = swagger.operation(path, method)
+        return operation.request_schema if operation else None
     try:
         paths = swagger.get('paths', {})
         if path not in paths:
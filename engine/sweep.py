@@ -0,0 +1,250 @@
+import asyncio
+import contextlib
+import io
+import json
+import re
+import time
+
+import requests
+
+from engine.executor import execute_tests, prepare_request
+from engine.async_executor import execute_tests_async
+from engine.histogram import LatencyHistogram
+from engine.scheduler import match_template
+from engine.swagger import generate_sample_data, scale_sample_data, spec_index
+
+DEFAULT_CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+DEFAULT_PAYLOAD_SIZES = "1KB,10KB,100KB,1MB,10MB"
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_levels(spec):
+    """Parse "1,2,4,8" into [1, 2, 4, 8]; "1-256" expands to the powers of two in that range"""
+    if not spec:
+        return list(DEFAULT_CONCURRENCY_LEVELS)
+    spec = spec.strip()
+    if "-" in spec and "," not in spec:
+        low, high = (int(part) for part in spec.split("-", 1))
+        levels = []
+        level = max(1, low)
+        while level <= high:
+            levels.append(level)
+            level *= 2
+        return levels
+    return sorted({int(part) for part in spec.split(",") if part.strip()})
+
+
+def parse_sizes(spec):
+    """Parse "1KB,10KB,1MB" (B/KB/MB/GB, binary multiples) into sorted byte counts"""
+    sizes = set()
+    for part in (spec or DEFAULT_PAYLOAD_SIZES).split(","):
+        if not part.strip():
+            continue
+        match = _SIZE.match(part)
+        if not match:
+            raise ValueError(f"Invalid payload size '{part}', expected e.g. 512B, 10KB or 1MB")
+        sizes.add(int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]))
+    return sorted(sizes)
+
+
+def format_size(size):
+    """Human readable byte count: 1 KB, 10 MB"""
+    for unit, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor:
+            return f"{size / factor:g} {unit}"
+    return f"{size} B"
+
+
+def summarize_level(value, results, elapsed):
+    """Throughput and latency percentiles of one sweep level"""
+    histogram = LatencyHistogram()
+    for r in results:
+        if r.get("elapsed_ms") is not None:
+            histogram.record(r["elapsed_ms"])
+    return {
+        "value": value,
+        "tests": len(results),
+        "passed": sum(1 for r in results if r.get("passed")),
+        "errors": sum(1 for r in results if "error" in r),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "latency": histogram.to_dict()
+    }
+
+
+def find_knee(levels, throughput_share=0.9, latency_factor=1.5):
+    """
+    Locate the knee of a sweep curve.
+    knee: the smallest level reaching throughput_share of the peak throughput
+    (adding more beyond it buys little); latency_climb: the first level whose
+    p95 is latency_factor x the p95 of the first level.
+    """
+    if not levels:
+        return None, None
+    peak = max(level["throughput_rps"] for level in levels)
+    knee = next(level["value"] for level in levels if level["throughput_rps"] >= throughput_share * peak)
+    baseline = levels[0]["latency"].get("p95_ms")
+    latency_climb = None
+    if baseline:
+        latency_climb = next((level["value"] for level in levels
+                              if (level["latency"].get("p95_ms") or 0) > latency_factor * baseline), None)
+    return knee, latency_climb
+
+
+def run_concurrency_sweep(tests, api_key, base_url, run_id, levels=DEFAULT_CONCURRENCY_LEVELS, engine="thread",
+                          **execute_kwargs):
+    """
+    Run the whole suite once per concurrency level (max_workers for the thread
+    engine, max_concurrency for the async engine) and record throughput and
+    latency percentiles at each. Per-test output is suppressed; artifacts go
+    to artifacts/<run_id>_c<level>. Returns a summary for generate_sweep_report.
+    """
+    tests = list(tests)
+    results_by_level = []
+    print(f"\n{'='*70}", flush=True)
+    print(f"CONCURRENCY SWEEP: {len(tests)} tests at levels {', '.join(str(l) for l in levels)} ({engine} engine)",
+          flush=True)
+    print(f"{'='*70}", flush=True)
+
+    for level in levels:
+        level_run_id = f"{run_id}_c{level}"
+        start_time = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if engine == "async":
+                results = asyncio.run(execute_tests_async(tests, api_key, base_url, level_run_id,
+                                                          max_concurrency=level, per_host_limit=level,
+                                                          **execute_kwargs))
+            else:
+                results = execute_tests(tests, api_key, base_url, level_run_id, max_workers=level,
+                                        **execute_kwargs)
+        summary = summarize_level(level, results, time.time() - start_time)
+        results_by_level.append(summary)
+        print(f"  concurrency {level:>4}: {summary['throughput_rps']:>8.1f} req/s, "
+              f"p50 {summary['latency'].get('p50_ms')} ms, p95 {summary['latency'].get('p95_ms')} ms, "
+              f"p99 {summary['latency'].get('p99_ms')} ms", flush=True)
+
+    knee, latency_climb = find_knee(results_by_level)
+    print(f"Throughput knee at concurrency {knee}"
+          + (f", latency climbs from {latency_climb}" if latency_climb else ""), flush=True)
+    return {
+        "parameter": "concurrency",
+        "engine": engine,
+        "tests": len(tests),
+        "levels": results_by_level,
+        "knee": knee,
+        "latency_climb": latency_climb
+    }
+
+
+def payload_targets(tests, swagger):
+    """One valid-auth, success-expecting body test per (method, path) with a request body schema"""
+    index = spec_index(swagger)
+    templates = list(index.paths)
+    targets = {}
+    for test in tests:
+        status = test.get("expected_status")
+        if (test["method"] not in ("POST", "PUT", "PATCH") or test.get("auth") != "valid"
+                or "body" not in test or not isinstance(status, int) or not 200 <= status < 300):
+            continue
+        path = test.get("path") or match_template(test["endpoint"].split("?", 1)[0], templates)
+        operation = index.operation(path, test["method"]) if path else None
+        schema = operation.request_schema if operation else None
+        if schema is not None:
+            targets.setdefault((test["method"], path), (test, schema))
+    return targets
+
+
+def run_payload_sweep(tests, swagger, api_key, base_url, sizes, repeat=5, timeout=60, auth_provider=None):
+    """
+    Send each POST/PUT/PATCH endpoint's body scaled to every target size (see
+    scale_sample_data; all optional properties filled in) `repeat` times on one
+    keep-alive session and record latency and throughput against body size.
+    Each body is generated and serialized once per size and endpoint, and
+    bodies are not written to artifacts. With an auth_provider (TokenProvider),
+    valid-auth tests send its shared bearer token. Returns a summary for
+    generate_sweep_report.
+    """
+    base_url = base_url.rstrip("/")
+    swagger = spec_index(swagger)
+    targets = payload_targets(tests, swagger)
+    print(f"\n{'='*70}", flush=True)
+    print(f"PAYLOAD SWEEP: {len(targets)} endpoints at {', '.join(format_size(s) for s in sizes)}, "
+          f"{repeat} requests each", flush=True)
+    print(f"{'='*70}", flush=True)
+
+    endpoints = {}
+    levels = []
+    with requests.Session() as session:
+        samples = {key: generate_sample_data(swagger, schema, include_optional=True)
+                   for key, (test, schema) in targets.items()}
+        for size in sizes:
+            histogram = LatencyHistogram()
+            sent = passed = errors = 0
+            sent_bytes = 0
+            busy_s = 0.0
+            for (method, path), (test, schema) in targets.items():
+                body, actual_size = scale_sample_data(swagger, schema, samples[(method, path)], size)
+                payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+                del body
+                token = None
+                if auth_provider:
+                    try:
+                        token = auth_provider.get() if test["auth"] == "valid" else "invalid"
+                    except Exception as e:
+                        print(f"WARNING: {e}; sending {method} {path} without a token", flush=True)
+                url, headers, _, _ = prepare_request(test, api_key, base_url, token)
+                headers = dict(headers, **{"Content-Type": "application/json"})
+                endpoint_histogram = LatencyHistogram()
+                status_codes = {}
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    try:
+                        r = session.request(method, url, headers=headers, data=payload, timeout=timeout)
+                        r.content  # include the response download in the timing
+                        status_codes[str(r.status_code)] = status_codes.get(str(r.status_code), 0) + 1
+                        if r.status_code == test["expected_status"]:
+                            passed += 1
+                    except requests.RequestException as e:
+                        status_codes[type(e).__name__] = status_codes.get(type(e).__name__, 0) + 1
+                        errors += 1
+                    elapsed = time.perf_counter() - start
+                    busy_s += elapsed
+                    histogram.record(elapsed * 1000)
+                    endpoint_histogram.record(elapsed * 1000)
+                    sent += 1
+                    sent_bytes += len(payload)
+                endpoints.setdefault(f"{method} {path}", []).append({
+                    "size": size,
+                    "size_label": format_size(size),
+                    "body_bytes": actual_size,
+                    "status_codes": status_codes,
+                    "latency": endpoint_histogram.to_dict()
+                })
+            level = {
+                "value": size,
+                "value_label": format_size(size),
+                "tests": sent,
+                "passed": passed,
+                "errors": errors,
+                "elapsed_s": round(busy_s, 3),
+                "throughput_rps": round(sent / busy_s, 2) if busy_s else 0.0,
+                "throughput_mbps": round(sent_bytes / busy_s / 1024 ** 2, 2) if busy_s else 0.0,
+                "latency": histogram.to_dict()
+            }
+            levels.append(level)
+            print(f"  {format_size(size):>8}: {level['throughput_rps']:>8.1f} req/s, "
+                  f"{level['throughput_mbps']:>8.2f} MB/s, p50 {level['latency'].get('p50_ms')} ms, "
+                  f"p95 {level['latency'].get('p95_ms')} ms, {errors} errors", flush=True)
+
+    _, latency_climb = find_knee(levels)
+    return {
+        "parameter": "payload_size",
+        "tests": len(targets) * repeat,
+        "levels": levels,
+        "knee": None,
+        "latency_climb": latency_climb,
+        "latency_climb_label": format_size(latency_climb) if latency_climb else None,
+        "endpoints": endpoints
+    }
@@ -0,0 +1,273 @@
+import gzip
+import json
+import os
+import sys
+from collections.abc import MutableMapping
+
+# First line of a compact suite file (see save_suite)
+SUITE_FORMAT = "api-tester/compact-suite"
+SUITE_VERSION = 1
+
+# Fields every test has, in the order of a compact suite row
+FIELDS = ("id", "test_name", "method", "path", "endpoint", "expected_status", "auth")
+
+
+class FrozenHeaders(dict):
+    """
+    Read-only header dict shared by every test with the same headers
+    (see intern_headers). It is still a dict, so tests holding it serialize
+    as before; prepare_request copies it before adding auth headers.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Interned test headers are shared between tests; copy them with dict() to change them")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenHeaders, (dict(self),)
+
+
+_HEADER_SETS = {}
+
+
+def intern_headers(headers):
+    """The shared FrozenHeaders instance equal to headers (headers with non-string values are not shared)"""
+    if headers is None:
+        return None
+    if isinstance(headers, FrozenHeaders):
+        return headers
+    try:
+        key = tuple(sorted(headers.items()))
+        return _HEADER_SETS.setdefault(key, FrozenHeaders(headers))
+    except TypeError:
+        return dict(headers)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TestCase(MutableMapping):
+    """
+    Compact in-memory test case for very large (data-driven) suites.
+    It behaves like the test dicts the generators produce (test["endpoint"],
+    test.get("body"), dict(test), ...), but keeps the common fields in slots,
+    interns the strings shared between tests (method, auth, path, endpoint),
+    shares one FrozenHeaders instance per distinct header set and holds the
+    body as compact JSON bytes, decoded each time it is read. Keys beyond the
+    common ones (extract, retry, timeout, ...) go to a small extra dict.
+    """
+
+    __slots__ = FIELDS + ("headers", "_body", "extra")
+
+    def __init__(self, id, test_name, method, endpoint, expected_status, auth="valid", headers=None,
+                 path=None, extra=None):
+        self.id = id
+        self.test_name = test_name
+        self.method = _intern(method)
+        self.path = _intern(path)
+        self.endpoint = _intern(endpoint)
+        self.expected_status = expected_status
+        self.auth = _intern(auth)
+        self.headers = intern_headers(headers)
+        self._body = None
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """TestCase from a test dict (a TestCase is returned as is)"""
+        if isinstance(data, TestCase):
+            return data
+        extra = {key: value for key, value in data.items() if key not in _KNOWN}
+        test = cls(data.get("id"), data.get("test_name"), data.get("method"), data.get("endpoint"),
+                   data.get("expected_status"), data.get("auth"), data.get("headers"), data.get("path"), extra)
+        if "body" in data:
+            test["body"] = data["body"]
+        return test
+
+    def to_dict(self):
+        """Plain test dict, with the keys in the order the generators write them"""
+        return dict(self.items())
+
+    @property
+    def body_json(self):
+        """The body as compact JSON bytes without decoding it, or None if the test has no body"""
+        return self._body
+
+    def _keys(self):
+        for field in FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+        if self.headers is not None:
+            yield "headers"
+        if self.extra:
+            yield from self.extra
+        if self._body is not None:
+            yield "body"
+
+    def __getitem__(self, key):
+        if key in _SLOT_KEYS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if key == "body":
+            if self._body is None:
+                raise KeyError(key)
+            return json.loads(self._body)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == "body":
+            self._body = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        elif key == "headers":
+            self.headers = intern_headers(value)
+        elif key in _SLOT_KEYS:
+            setattr(self, key, _intern(value) if key in _INTERNED else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key == "body":
+            self._body = None
+        elif key in _SLOT_KEYS:
+            setattr(self, key, None)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        if key == "body":
+            return self._body is not None
+        if key in _SLOT_KEYS:
+            return getattr(self, key) is not None
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self):
+        return self._keys()
+
+    def __len__(self):
+        return sum(1 for _ in self._keys())
+
+    def __repr__(self):
+        return f"TestCase({self.id!r}, {self.method} {self.endpoint})"
+
+
+_SLOT_KEYS = frozenset(FIELDS + ("headers",))
+_KNOWN = _SLOT_KEYS | {"body"}
+_INTERNED = frozenset(("method", "path", "endpoint", "auth"))
+
+
+def as_dict(test):
+    """Plain dict of a test (TestCase or dict), for json.dump"""
+    return test.to_dict() if isinstance(test, TestCase) else test
+
+
+def _open(path, mode, gzipped):
+    if gzipped:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class CompactSuiteWriter:
+    """
+    Writes a compact suite: a format line, then JSON Lines of either a header
+    set (an object, numbered in order of appearance) or a test row (an array
+    of the FIELDS, the header set number, the body as a JSON string and the
+    extra keys). Header sets are written the first time a test uses them, so
+    suites can be written as they are generated.
+    """
+
+    def __init__(self, f):
+        self._file = f
+        self._headers = {}
+        f.write(json.dumps({"format": SUITE_FORMAT, "version": SUITE_VERSION, "fields": list(FIELDS)}) + "\n")
+
+    def write(self, test):
+        test = TestCase.from_dict(test)
+        header_ref = None
+        if test.headers is not None:
+            key = id(test.headers) if isinstance(test.headers, FrozenHeaders) else json.dumps(test.headers)
+            header_ref = self._headers.get(key)
+            if header_ref is None:
+                header_ref = self._headers[key] = len(self._headers)
+                self._file.write(json.dumps(test.headers, separators=(",", ":")) + "\n")
+        body = test.body_json.decode("utf-8") if test.body_json is not None else None
+        row = [getattr(test, field) for field in FIELDS] + [header_ref, body, test.extra]
+        self._file.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+
+def iter_compact_suite(lines):
+    """TestCases from the lines of a compact suite after its format line"""
+    header_sets = []
+    width = len(FIELDS)
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if isinstance(item, dict):
+            header_sets.append(intern_headers(item))
+            continue
+        test = TestCase(*item[:3], item[4], item[5], item[6],
+                        header_sets[item[width]] if item[width] is not None else None, item[3], item[width + 2])
+        if item[width + 1] is not None:
+            test._body = item[width + 1].encode("utf-8")
+        yield test
+
+
+def is_compact_header(line):
+    """True if a suite file's first line is a compact suite format line"""
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return False
+    if not isinstance(header, dict) or header.get("format") != SUITE_FORMAT:
+        return False
+    if header.get("version") != SUITE_VERSION:
+        raise ValueError(f"Unsupported compact suite version {header.get('version')}")
+    return True
+
+
+def save_suite(tests, path, compact=False):
+    """
+    Write a suite as a JSON array (indent=2, as before) or, with compact=True,
+    as a compact suite (see CompactSuiteWriter); a .gz path is gzipped.
+    The file is replaced only once it is complete.
+    """
+    tmp = path + ".tmp"
+    with _open(tmp, "w", path.endswith(".gz")) as f:
+        if compact:
+            writer = CompactSuiteWriter(f)
+            for test in tests:
+                writer.write(test)
+        else:
+            json.dump([as_dict(test) for test in tests], f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_suite(path):
+    """
+    Every test of a suite file as TestCases: a JSON array, JSON Lines or a
+    compact suite (optionally gzipped), detected from the content
+    """
+    with _open(path, "r", path.endswith(".gz")) as f:
+        first = f.readline()
+        if is_compact_header(first):
+            return list(iter_compact_suite(f))
+        f.seek(0)
+        if first.lstrip().startswith("["):
+            return [TestCase.from_dict(test) for test in json.load(f)]
+        return [TestCase.from_dict(json.loads(line)) for line in f if line.strip()]
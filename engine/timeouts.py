@@ -0,0 +1,118 @@
+import json
+import os
+from threading import Lock
+
+from engine.circuit import circuit_key
+from engine.histogram import LatencyHistogram
+
+# Timeout (seconds) of a request with no per-test setting or usable history
+DEFAULT_TIMEOUT = 30.0
+
+# Where observed latencies are kept between runs
+DEFAULT_LATENCY_HISTORY = os.path.join("artifacts", "latency_history.json")
+
+
+def test_timeout(test, default=DEFAULT_TIMEOUT):
+    """
+    (connect, read) timeout in seconds for a test case.
+    A test may set "timeout" to a number (both phases) or to
+    {"connect": 3, "read": 120}; unset phases use default, which may itself
+    be a number or a (connect, read) tuple.
+    """
+    connect, read = default if isinstance(default, tuple) else (default, default)
+    timeout = test.get("timeout")
+    if isinstance(timeout, dict):
+        connect = timeout.get("connect", connect)
+        read = timeout.get("read", read)
+    elif isinstance(timeout, (int, float)) and not isinstance(timeout, bool):
+        connect = read = timeout
+    return float(connect), float(read)
+
+
+def _history_key(test):
+    return f"{test['method']} {circuit_key(test)}"
+
+
+class TimeoutPolicy:
+    """
+    Per-endpoint request timeouts derived from latency history.
+    Latencies of every response are recorded per endpoint (method + path
+    template) and saved to history_path between runs. Once an endpoint has
+    min_samples latencies, its read timeout is multiplier x its p99, clamped
+    to [floor, ceiling]; the connect timeout is connect_timeout, at most the
+    read timeout. Endpoints without enough history keep default. A test case's
+    own "timeout" always wins (see test_timeout).
+    """
+
+    def __init__(self, history_path=DEFAULT_LATENCY_HISTORY, multiplier=3.0, floor=1.0, ceiling=120.0,
+                 connect_timeout=10.0, default=DEFAULT_TIMEOUT, min_samples=20, max_samples=10000):
+        self.history_path = history_path
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.connect_timeout = connect_timeout
+        self.default = default
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._lock = Lock()
+        self._latency = {}
+        self.loaded_endpoints = 0
+        if history_path and os.path.exists(history_path):
+            with open(history_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self._latency = {key: LatencyHistogram.from_state(state)
+                             for key, state in saved.get("endpoints", {}).items()}
+            self.loaded_endpoints = len(self._latency)
+
+    def _derived(self, key):
+        histogram = self._latency.get(key)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        read = min(self.ceiling, max(self.floor, self.multiplier * histogram.percentile(99) / 1000))
+        return min(self.connect_timeout, read), read
+
+    def timeout_for(self, test):
+        """(connect, read) timeout in seconds for the next request of a test"""
+        with self._lock:
+            derived = self._derived(_history_key(test))
+        return test_timeout(test, derived or self.default)
+
+    def observe(self, test, elapsed_ms):
+        """Record the latency of a response from the test's endpoint"""
+        key = _history_key(test)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = LatencyHistogram()
+            histogram.record(elapsed_ms)
+
+    def save(self):
+        """Write the history back, keeping at most max_samples per endpoint (older samples weigh less)"""
+        if not self.history_path:
+            return
+        with self._lock:
+            for histogram in self._latency.values():
+                if histogram.count > self.max_samples:
+                    histogram.scale(self.max_samples / histogram.count)
+            saved = {"endpoints": {key: h.to_state() for key, h in sorted(self._latency.items()) if h.count}}
+        os.makedirs(os.path.dirname(self.history_path) or ".", exist_ok=True)
+        tmp_path = self.history_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f, separators=(",", ":"))
+        os.replace(tmp_path, self.history_path)
+
+    def stats(self):
+        """Derived timeouts for the run metadata"""
+        with self._lock:
+            endpoints = {}
+            for key in sorted(self._latency):
+                derived = self._derived(key)
+                if derived:
+                    endpoints[key] = round(derived[1], 3)
+        return {
+            "multiplier": self.multiplier,
+            "floor_s": self.floor,
+            "ceiling_s": self.ceiling,
+            "history_endpoints": self.loaded_endpoints,
+            "read_timeouts_s": endpoints
+        }
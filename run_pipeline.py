@@ -5,6 +5,7 @@ This script is called by Jenkins with command-line parameters
 """
 
 import argparse
+import asyncio
 import json
 import sys
 import os
@@ -19,23 +20,139 @@ if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from engine.swagger import load_swagger
-from engine.generator import generate_tests
-from engine.llm_generator import generate_tests_with_llm
-from engine.executor import execute_tests
-from engine.report import generate_html_report, generate_junit
+from engine.swagger import load_swagger, SpecIndex, DEFAULT_SPEC_CACHE
+from engine.generator import generate_tests, iter_tests
+from engine.llm_generator import generate_tests_with_llm, iter_tests_with_llm
+from engine.incremental import (diff_fingerprints, fingerprint_operations, iter_merged_tests, load_fingerprints,
+                                merge_tests, save_fingerprints, select_tests, test_operation)
+from engine.executor import execute_tests, login_endpoint_url
+from engine.async_executor import execute_tests_async
+from engine.report import generate_html_report, generate_junit, generate_load_report, generate_sweep_report
+from engine.loadtest import run_load_test
+from engine.sweep import run_concurrency_sweep, run_payload_sweep, parse_levels, parse_sizes
+from engine.ratelimit import parse_rate_rules
+from engine.streaming import iter_test_cases, ResultSink, TestFeed, write_test_cases
+from engine.testcase import load_suite, save_suite
+from engine.timeouts import DEFAULT_LATENCY_HISTORY
+from engine.auth import parse_credentials, TokenProvider
+from engine.budget import parse_failure_budget
 
 
 def main():
     parser = argparse.ArgumentParser(description='API AI Tester Pipeline Runner')
     parser.add_argument('--base-url', required=True, help='Base URL of the API')
-    parser.add_argument('--swagger-url', required=True, help='Swagger/OpenAPI spec URL')
+    parser.add_argument('--swagger-url', required=True, help='Swagger/OpenAPI spec URL or file path (JSON or YAML, optionally .gz)')
     parser.add_argument('--api-key', default='', help='API Key for authentication')
+    parser.add_argument('--spec-cache', default=DEFAULT_SPEC_CACHE,
+                        help='Directory caching the downloaded spec (revalidated with ETag/If-Modified-Since)')
+    parser.add_argument('--no-spec-cache', action='store_true', help='Always download and parse the spec')
+    parser.add_argument('--spec-offline-ttl', type=float, default=None,
+                        help='Use a cached spec validated less than this many seconds ago without contacting the server')
     parser.add_argument('--use-ai', action='store_true', help='Use AI for test generation')
     parser.add_argument('--llm-model', default='llama3.2:3b', help='LLM model to use')
     parser.add_argument('--reuse-tests', action='store_true', help='Reuse existing test cases')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only regenerate tests of operations whose fingerprint (path, method, parameters, resolved '
+                             'schemas) changed since test_cases.json was generated; keep the others')
+    parser.add_argument('--only-changed', action='store_true',
+                        help='Incremental generation that also executes only the tests of changed and added operations')
+    parser.add_argument('--overlap', action='store_true',
+                        help='Execute tests while they are being generated (background generator, bounded queue) '
+                             'instead of generating the whole suite first; implies a --window')
+    parser.add_argument('--overlap-queue', type=int, default=1000,
+                        help='Generated tests buffered ahead of execution in --overlap mode')
+    parser.add_argument('--suite-format', choices=['json', 'compact'], default='json',
+                        help='How generated tests are saved to test_cases.json: an indented JSON array, or compact rows '
+                             'with shared header sets (much smaller for large data-driven suites; read back transparently)')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                        help='Execution engine: thread pool (default) or asyncio event loop')
+    parser.add_argument('--max-workers', type=int, default=10,
+                        help='Worker threads for the thread engine (upper bound in adaptive mode)')
+    parser.add_argument('--http2', action='store_true',
+                        help='Thread engine: multiplex all workers over HTTP/2 connections (needs httpx[http2])')
+    parser.add_argument('--adaptive-concurrency', action='store_true',
+                        help='Tune in-flight requests from observed latency and error/429 rates (AIMD)')
+    parser.add_argument('--min-concurrency', type=int, default=1,
+                        help='Lower bound on in-flight requests in adaptive mode')
+    parser.add_argument('--max-concurrency', type=int, default=500,
+                        help='Max in-flight requests for the async engine')
+    parser.add_argument('--per-host-limit', type=int, default=100,
+                        help='Max connections per host for the async engine')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Max requests per second across all workers')
+    parser.add_argument('--rate-limit-rule', action='append', default=[],
+                        help='Per host or path prefix limit, e.g. "/store=5" or "api.example.com=20" (repeatable)')
+    parser.add_argument('--max-requeues', type=int, default=3,
+                        help='Times a test answered with 429/503 + Retry-After is re-queued before it fails')
+    parser.add_argument('--stateful', action='store_true',
+                        help='Chain create -> read/update -> delete tests on the same resource using ids from the create response')
+    parser.add_argument('--stream', action='store_true',
+                        help='Bounded-memory mode for very large suites: read test_cases.json lazily (with --reuse-tests), '
+                             'stream results to artifacts/<run>/results.jsonl and write a summary instead of the HTML/JUnit reports')
+    parser.add_argument('--window', type=int, default=None,
+                        help='Max tests submitted at once in --stream and --overlap modes (default: 4x workers / 2x max concurrency)')
+    parser.add_argument('--circuit-threshold', type=int, default=5,
+                        help='Consecutive connection errors/timeouts that open an endpoint\'s circuit and skip its tests (0 = off)')
+    parser.add_argument('--circuit-reset', type=float, default=30.0,
+                        help='Seconds an open circuit waits before a probe request is let through')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='Retry connection errors/timeouts and unexpected 502/503/504 up to N times with backoff '
+                             '(GET/HEAD/OPTIONS/PUT/DELETE, or tests with "retry": true)')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Send a duplicate of a GET still unanswered after its endpoint\'s observed p95 and keep the first response')
+    parser.add_argument('--adaptive-timeouts', action='store_true',
+                        help='Derive each endpoint\'s timeout from its p99 latency in --latency-history (updated every run)')
+    parser.add_argument('--latency-history', default=DEFAULT_LATENCY_HISTORY,
+                        help='JSON file keeping per-endpoint latency histograms between runs')
+    parser.add_argument('--timeout-multiplier', type=float, default=3.0,
+                        help='Adaptive timeout = this multiple of the endpoint\'s p99 latency')
+    parser.add_argument('--timeout-floor', type=float, default=1.0,
+                        help='Lowest adaptive timeout in seconds')
+    parser.add_argument('--timeout-ceiling', type=float, default=120.0,
+                        help='Highest adaptive timeout in seconds')
+    parser.add_argument('--login-endpoint', default=None,
+                        help='Login path or URL; its bearer token is shared by all workers and refreshed on expiry/401')
+    parser.add_argument('--login-body', default=None,
+                        help='JSON credentials POSTed to --login-endpoint, or @file.json')
+    parser.add_argument('--token-field', default=None,
+                        help='Dotted path of the token in the login response (default: access_token, token, ...)')
+    parser.add_argument('--failure-budget', default=None, metavar='N|PCT%',
+                        help='Abort the run once N tests have failed, or more than PCT%% of them '
+                             '(after --failure-budget-min-sample); partial reports are marked aborted')
+    parser.add_argument('--failure-budget-min-sample', type=int, default=20,
+                        help='Completed tests before a percentage failure budget applies')
+    parser.add_argument('--capture-limit-kb', type=int, default=1024,
+                        help='KB of each response body kept in artifacts; larger bodies are still hashed (SHA-256) and counted')
+    parser.add_argument('--load-rate', type=float, default=None,
+                        help='After the functional run, replay the suite as a traffic mix at this many requests/sec')
+    parser.add_argument('--load-duration', type=float, default=60.0,
+                        help='Steady-state seconds of the load test')
+    parser.add_argument('--load-ramp-up', type=float, default=10.0,
+                        help='Seconds over which the load test ramps up to --load-rate')
+    parser.add_argument('--load-max-in-flight', type=int, default=1000,
+                        help='Outstanding requests above which load test arrivals are dropped')
+    parser.add_argument('--sweep-concurrency', nargs='?', const='1-256', default=None, metavar='LEVELS',
+                        help='After the functional run, rerun the suite at each concurrency level '
+                             '("1,2,4,8" or "1-256" for powers of two; default 1-256) to find the throughput knee')
+    parser.add_argument('--sweep-payload', nargs='?', const='1KB,10KB,100KB,1MB,10MB', default=None, metavar='SIZES',
+                        help='After the functional run, send POST/PUT/PATCH bodies scaled from the schema to each size '
+                             '(default 1KB,10KB,100KB,1MB,10MB) and report latency/throughput against body size')
+    parser.add_argument('--sweep-repeat', type=int, default=5,
+                        help='Requests per endpoint and payload size in --sweep-payload')
+    parser.add_argument('--artifact-format', choices=['jsonl', 'jsonl.gz', 'files'], default='jsonl',
+                        help='Artifact layout: single JSONL file (default), gzipped JSONL, or per-test files')
     
     args = parser.parse_args()
+    if args.http2 and args.engine != 'thread':
+        parser.error('--http2 is only supported by the thread engine')
+    if args.reuse_tests and (args.incremental or args.only_changed or args.overlap):
+        parser.error('--incremental/--only-changed/--overlap generate tests and cannot be combined with --reuse-tests')
+    if args.stateful and (args.stream or args.overlap):
+        parser.error('--stateful needs every test up front and cannot be combined with --stream/--overlap')
+    try:
+        max_failures, max_failure_rate = parse_failure_budget(args.failure_budget)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Start overall timer
     pipeline_start_time = datetime.now()
@@ -49,6 +166,12 @@ def main():
     print(f"Use AI: {args.use_ai}")
     print(f"LLM Model: {args.llm_model}")
     print(f"Reuse Tests: {args.reuse_tests}")
+    print(f"Incremental: {'only changed' if args.only_changed else args.incremental}")
+    print(f"Overlap Generation/Execution: {args.overlap}")
+    print(f"Suite Format: {args.suite_format}")
+    print(f"Engine: {args.engine}")
+    print(f"Adaptive Concurrency: {args.adaptive_concurrency}")
+    print(f"Rate Limit: {args.rate_limit or 'None'} req/s {' '.join(args.rate_limit_rule)}")
     print("=" * 80)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -60,43 +183,184 @@ def main():
         # Step 1: Load Swagger/OpenAPI specification
         step_start = datetime.now()
         print("\n[Step 1/5] Loading API specification...")
-        swagger_doc = load_swagger(args.swagger_url)
+        # Indexed once; the generators, the scheduler and the sweeps all look operations up in it
+        swagger_doc = SpecIndex(load_swagger(args.swagger_url,
+                                             cache_dir=None if args.no_spec_cache else args.spec_cache,
+                                             offline_ttl=args.spec_offline_ttl))
         timings['swagger_load'] = (datetime.now() - step_start).total_seconds()
-        print(f"SUCCESS: Loaded specification with {len(swagger_doc.get('paths', {}))} endpoints (took {timings['swagger_load']:.1f}s)")
+        print(f"SUCCESS: Loaded specification with {len(swagger_doc.paths)} endpoints (took {timings['swagger_load']:.1f}s)")
         
         # Step 2: Generate or load test cases
         step_start = datetime.now()
-        if args.reuse_tests and os.path.exists('test_cases.json'):
+        if args.reuse_tests and os.path.exists('test_cases.json') and args.stream:
+            print("\n[Step 2/5] Streaming existing test cases from test_cases.json...")
+            test_cases = iter_test_cases('test_cases.json')
+            timings['test_generation'] = 0
+            generation_method = "Reused Existing Tests (streamed)"
+        elif args.reuse_tests and os.path.exists('test_cases.json'):
             print("\n[Step 2/5] Loading existing test cases...")
-            with open('test_cases.json', 'r') as f:
-                test_cases = json.load(f)
+            test_cases = load_suite('test_cases.json')
             timings['test_generation'] = (datetime.now() - step_start).total_seconds()
             generation_method = "Reused Existing Tests"
             print(f"SUCCESS: Loaded {len(test_cases)} existing test cases (took {timings['test_generation']:.1f}s)")
         else:
-            if args.use_ai:
+            # Operation fingerprints decide what --incremental regenerates and --only-changed runs
+            fingerprints = fingerprint_operations(swagger_doc)
+            generator = {"llm_model": args.llm_model if args.use_ai else None, "login_endpoint": args.login_endpoint}
+            previous = None
+            if args.incremental or args.only_changed:
+                previous = load_fingerprints('test_cases.json', generator)
+                if previous is None:
+                    print("\n[Step 2/5] No fingerprints of a suite generated with these settings, generating all tests")
+            diff = diff_fingerprints(previous, fingerprints)
+            operations = diff.changed | diff.added if previous is not None else None
+            if previous is not None:
+                print(f"\n[Step 2/5] Spec diff: {len(diff.changed)} changed, {len(diff.added)} added, "
+                      f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged operations")
+            if args.overlap:
+                # Tests are generated on a background thread, saved and executed as they come
+                if args.use_ai:
+                    print(f"\n[Step 2/5] Generating tests with AI (Model: {args.llm_model}) while executing them...")
+                    generated = (iter_tests_with_llm(swagger_doc, args.login_endpoint, args.llm_model, operations=operations)
+                                 if operations != set() else iter(()))
+                    generation_method = f"LLM-based ({args.llm_model}), overlapped"
+                else:
+                    print("\n[Step 2/5] Generating tests with rule-based generator while executing them...")
+                    generated = iter_tests(swagger_doc, args.login_endpoint, operations=operations)
+                    generation_method = "Rule-based (Swagger), overlapped"
+                if previous is not None:
+                    generated = iter_merged_tests(load_suite('test_cases.json'), generated, diff, swagger_doc.paths)
+                    generation_method += " (incremental)"
+                generated = write_test_cases(generated, 'test_cases.json', compact=args.suite_format == 'compact')
+                if args.only_changed:
+                    generated = (t for t in generated
+                                 if test_operation(t, swagger_doc.paths) in diff.changed | diff.added)
+                test_cases = TestFeed(generated, maxsize=args.overlap_queue)
+            elif args.use_ai:
                 print(f"\n[Step 2/5] Generating tests with AI (Model: {args.llm_model})...")
-                test_cases = generate_tests_with_llm(swagger_doc, args.base_url, args.llm_model)
+                test_cases = (generate_tests_with_llm(swagger_doc, args.login_endpoint, args.llm_model, operations=operations)
+                              if operations != set() else [])
                 generation_method = f"LLM-based ({args.llm_model})"
             else:
                 print("\n[Step 2/5] Generating tests with rule-based generator...")
-                test_cases = generate_tests(swagger_doc, args.base_url)
+                test_cases = generate_tests(swagger_doc, args.login_endpoint, operations=operations)
                 generation_method = "Rule-based (Swagger)"
             
-            timings['test_generation'] = (datetime.now() - step_start).total_seconds()
-            print(f"SUCCESS: Generated {len(test_cases)} test cases (took {timings['test_generation']:.1f}s)")
-            
-            # Save test cases
-            with open('test_cases.json', 'w') as f:
-                json.dump(test_cases, f, indent=2)
-            print("SUCCESS: Test cases saved to test_cases.json")
+            if not args.overlap:
+                timings['test_generation'] = (datetime.now() - step_start).total_seconds()
+                print(f"SUCCESS: Generated {len(test_cases)} test cases (took {timings['test_generation']:.1f}s)")
+                if previous is not None:
+                    test_cases = merge_tests(load_suite('test_cases.json'), test_cases, diff, swagger_doc.paths)
+                    generation_method += " (incremental)"
+                    print(f"SUCCESS: Merged into {len(test_cases)} test cases")
+                
+                # Save test cases
+                save_suite(test_cases, 'test_cases.json', compact=args.suite_format == 'compact')
+                save_fingerprints('test_cases.json', fingerprints, generator)
+                print("SUCCESS: Test cases saved to test_cases.json")
+                
+                if args.only_changed:
+                    test_cases = select_tests(test_cases, diff.changed | diff.added, swagger_doc.paths)
+                    print(f"SUCCESS: --only-changed selected {len(test_cases)} tests of changed/added operations")
         
         # Step 3: Execute tests
         step_start = datetime.now()
         print("\n[Step 3/5] Executing API tests...")
-        results = execute_tests(test_cases, args.api_key, args.base_url, timestamp)
+        execution_stats = {}
+        rate_limit_rules = parse_rate_rules(args.rate_limit_rule)
+        # One shared token for the functional run, the load test and the sweeps
+        auth_provider = None
+        if args.login_endpoint:
+            auth_provider = TokenProvider(login_endpoint_url(args.login_endpoint, args.base_url),
+                                          parse_credentials(args.login_body), args.token_field)
+        result_sink = ResultSink(os.path.join("artifacts", timestamp, "results.jsonl")) if args.stream else None
+        window = None
+        if args.stream or args.overlap:
+            window = args.window or (2 * args.max_concurrency if args.engine == 'async' else 4 * args.max_workers)
+        if args.engine == 'async':
+            results = asyncio.run(execute_tests_async(
+                test_cases, args.api_key, args.base_url, timestamp,
+                max_concurrency=args.max_concurrency,
+                per_host_limit=args.per_host_limit,
+                stats=execution_stats,
+                artifact_format=args.artifact_format,
+                adaptive=args.adaptive_concurrency,
+                min_concurrency=args.min_concurrency,
+                rate_limit=args.rate_limit,
+                rate_limit_rules=rate_limit_rules,
+                max_requeues=args.max_requeues,
+                dependencies=args.stateful,
+                swagger=swagger_doc,
+                window=window,
+                result_sink=result_sink,
+                capture_limit=args.capture_limit_kb * 1024,
+                circuit_threshold=args.circuit_threshold,
+                circuit_reset=args.circuit_reset,
+                retries=args.retries,
+                hedge=args.hedge,
+                adaptive_timeouts=args.adaptive_timeouts,
+                latency_history=args.latency_history,
+                timeout_multiplier=args.timeout_multiplier,
+                timeout_floor=args.timeout_floor,
+                timeout_ceiling=args.timeout_ceiling,
+                auth_provider=auth_provider,
+                max_failures=max_failures,
+                max_failure_rate=max_failure_rate,
+                failure_min_sample=args.failure_budget_min_sample
+            ))
+        else:
+            results = execute_tests(test_cases, args.api_key, args.base_url, timestamp,
+                                    max_workers=args.max_workers,
+                                    stats=execution_stats,
+                                    artifact_format=args.artifact_format,
+                                    adaptive=args.adaptive_concurrency,
+                                    min_workers=args.min_concurrency,
+                                    rate_limit=args.rate_limit,
+                                    rate_limit_rules=rate_limit_rules,
+                                    max_requeues=args.max_requeues,
+                                    dependencies=args.stateful,
+                                    swagger=swagger_doc,
+                                    window=window,
+                                    result_sink=result_sink,
+                                    capture_limit=args.capture_limit_kb * 1024,
+                                    circuit_threshold=args.circuit_threshold,
+                                    circuit_reset=args.circuit_reset,
+                                    retries=args.retries,
+                                    hedge=args.hedge,
+                                    adaptive_timeouts=args.adaptive_timeouts,
+                                    latency_history=args.latency_history,
+                                    timeout_multiplier=args.timeout_multiplier,
+                                    timeout_floor=args.timeout_floor,
+                                    timeout_ceiling=args.timeout_ceiling,
+                                    auth_provider=auth_provider,
+                                    http2=args.http2,
+                                    max_failures=max_failures,
+                                    max_failure_rate=max_failure_rate,
+                                    failure_min_sample=args.failure_budget_min_sample)
         timings['test_execution'] = (datetime.now() - step_start).total_seconds()
-        print(f"SUCCESS: Executed {len(results)} tests (took {timings['test_execution']:.1f}s)")
+        if isinstance(test_cases, TestFeed):
+            feed = test_cases
+            timings['test_generation'] = feed.generation_s or 0
+            timings['first_test'] = feed.first_test_s or 0
+            if feed.exhausted:
+                save_fingerprints('test_cases.json', fingerprints, generator)
+                print(f"SUCCESS: Generated tests alongside execution, {feed.produced} executed "
+                      f"(first test after {timings['first_test']:.1f}s, generation took {timings['test_generation']:.1f}s)")
+                print("SUCCESS: Test cases saved to test_cases.json")
+            else:
+                feed.close()  # aborted: stop generating, test_cases.json keeps the previous suite
+            # The load test and sweeps read the saved suite
+            test_cases = iter_test_cases('test_cases.json')
+            if args.only_changed:
+                test_cases = select_tests(test_cases, diff.changed | diff.added, swagger_doc.paths)
+        if result_sink:
+            result_sink.close()
+        executed = result_sink.total if result_sink else len(results)
+        aborted = execution_stats.get('aborted')
+        if aborted:
+            print(f"ABORTED: {aborted['reason']} after {executed} tests (took {timings['test_execution']:.1f}s)")
+        else:
+            print(f"SUCCESS: Executed {executed} tests (took {timings['test_execution']:.1f}s)")
         
         # Step 4: Generate reports
         step_start = datetime.now()
@@ -111,43 +375,123 @@ def main():
             'generation_method': generation_method,
             'llm_model': args.llm_model if args.use_ai else None,
             'base_url': args.base_url,
-            'total_tests': len(test_cases)
+            'total_tests': executed,
+            'execution_stats': execution_stats
         }
         
-        # HTML Report
-        html_report_path = f"reports/report_{timestamp}.html"
-        generate_html_report(results, html_report_path, metadata)
-        print(f"SUCCESS: HTML report: {html_report_path}")
-        
-        # JUnit XML Report
-        junit_report_path = f"reports/junit_{timestamp}.xml"
-        generate_junit(results, junit_report_path)
-        print(f"SUCCESS: JUnit report: {junit_report_path}")
+        if result_sink:
+            # The HTML/JUnit reports need every result in memory; write the aggregates instead
+            os.makedirs("reports", exist_ok=True)
+            summary_path = f"reports/summary_{timestamp}.json"
+            with open(summary_path, 'w') as f:
+                json.dump(dict(metadata, summary=result_sink.summary()), f, indent=2)
+            print(f"SUCCESS: Results: {result_sink.path}")
+            print(f"SUCCESS: Summary report: {summary_path}")
+        else:
+            # HTML Report
+            html_report_path = f"reports/report_{timestamp}.html"
+            generate_html_report(results, html_report_path, metadata)
+            print(f"SUCCESS: HTML report: {html_report_path}")
+            
+            # JUnit XML Report
+            junit_report_path = f"reports/junit_{timestamp}.xml"
+            generate_junit(results, junit_report_path, aborted)
+            print(f"SUCCESS: JUnit report: {junit_report_path}")
         
         timings['report_generation'] = (datetime.now() - step_start).total_seconds()
         print(f"Report generation took {timings['report_generation']:.1f}s")
         
+        if aborted and (args.load_rate or args.sweep_concurrency or args.sweep_payload):
+            print("\nSkipping the load test and sweeps of the aborted run")
+            args.load_rate = args.sweep_concurrency = args.sweep_payload = None
+        
+        # Optional load test: open-model replay of the suite at a target arrival rate
+        if args.load_rate:
+            step_start = datetime.now()
+            print(f"\n[Load Test] Replaying the suite at {args.load_rate:g} req/s...")
+            load_tests = test_cases if isinstance(test_cases, list) else list(iter_test_cases('test_cases.json'))
+            load_summary = asyncio.run(run_load_test(
+                load_tests, args.api_key, args.base_url, args.load_rate, args.load_duration,
+                ramp_up=args.load_ramp_up,
+                max_in_flight=args.load_max_in_flight,
+                auth_provider=auth_provider
+            ))
+            load_report_path = f"reports/load_{timestamp}.html"
+            generate_load_report(load_summary, load_report_path)
+            with open(f"reports/load_{timestamp}.json", 'w') as f:
+                json.dump(load_summary, f, indent=2)
+            timings['load_test'] = (datetime.now() - step_start).total_seconds()
+            print(f"SUCCESS: Load test report: {load_report_path} (took {timings['load_test']:.1f}s)")
+        
+        # Optional concurrency sweep: same suite at increasing in-flight limits
+        if args.sweep_concurrency:
+            step_start = datetime.now()
+            sweep_tests = test_cases if isinstance(test_cases, list) else list(iter_test_cases('test_cases.json'))
+            sweep_summary = run_concurrency_sweep(
+                sweep_tests, args.api_key, args.base_url, timestamp,
+                levels=parse_levels(args.sweep_concurrency),
+                engine=args.engine,
+                artifact_format=args.artifact_format,
+                capture_limit=args.capture_limit_kb * 1024,
+                auth_provider=auth_provider
+            )
+            sweep_report_path = f"reports/sweep_{timestamp}.html"
+            generate_sweep_report(sweep_summary, sweep_report_path)
+            with open(f"reports/sweep_{timestamp}.json", 'w') as f:
+                json.dump(sweep_summary, f, indent=2)
+            timings['concurrency_sweep'] = (datetime.now() - step_start).total_seconds()
+            print(f"SUCCESS: Concurrency sweep report: {sweep_report_path} (took {timings['concurrency_sweep']:.1f}s)")
+        
+        # Optional payload-size sweep: request bodies scaled from the schema
+        if args.sweep_payload:
+            step_start = datetime.now()
+            sweep_tests = test_cases if isinstance(test_cases, list) else iter_test_cases('test_cases.json')
+            payload_summary = run_payload_sweep(
+                sweep_tests, swagger_doc, args.api_key, args.base_url,
+                parse_sizes(args.sweep_payload),
+                repeat=args.sweep_repeat,
+                auth_provider=auth_provider
+            )
+            payload_report_path = f"reports/payload_sweep_{timestamp}.html"
+            generate_sweep_report(payload_summary, payload_report_path)
+            with open(f"reports/payload_sweep_{timestamp}.json", 'w') as f:
+                json.dump(payload_summary, f, indent=2)
+            timings['payload_sweep'] = (datetime.now() - step_start).total_seconds()
+            print(f"SUCCESS: Payload sweep report: {payload_report_path} (took {timings['payload_sweep']:.1f}s)")
+        
         # Step 5: Print summary
         print("\n" + "=" * 80)
         print("[Step 5/5] Test Execution Summary")
         print("=" * 80)
-        
-        passed = sum(1 for r in results if r.get('status') == 'PASS')
-        failed = sum(1 for r in results if r.get('status') == 'FAIL')
-        skipped = sum(1 for r in results if r.get('status') == 'SKIP')
+
+        if executed == 0 and not aborted:
+            # e.g. --only-changed on an unchanged spec: nothing to run is not a failure
+            print("\nSUCCESS: No changed operations, nothing to run" if args.only_changed
+                  else "\nSUCCESS: No tests to run")
+            sys.exit(0)
+
+        if result_sink:
+            passed, failed, skipped = result_sink.passed, result_sink.failed, 0
+        else:
+            passed = sum(1 for r in results if r.get('status') == 'PASS')
+            failed = sum(1 for r in results if r.get('status') == 'FAIL')
+            skipped = sum(1 for r in results if r.get('status') == 'SKIP')
         
         print(f"PASSED: {passed}")
         print(f"FAILED: {failed}")
         print(f"SKIPPED: {skipped}")
-        print(f"TOTAL: {len(results)}")
-        print(f"Success Rate: {(passed/len(results)*100):.1f}%")
+        print(f"TOTAL: {executed}")
+        print(f"Success Rate: {(passed/executed*100):.1f}%")
         print("=" * 80)
         print(f"TOTAL EXECUTION TIME: {timings['total_execution']:.1f} seconds")
         print("=" * 80)
         print("=" * 80)
         
         # Exit with appropriate code
-        if failed > 0:
+        if aborted:
+            print(f"\nABORTED: {aborted['reason']}. Reports are partial.")
+            sys.exit(1)
+        elif failed > 0:
             print("\nWARNING: Some tests failed. Check reports for details.")
             sys.exit(1)
         else:
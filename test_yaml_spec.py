@@ -0,0 +1,64 @@
+"""
+Test that YAML specs load as JSON-compatible data: unquoted dates such as
+`example: 2020-01-01` stay strings, so the spec can be cached and the
+generated tests serialized
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from engine.generator import generate_tests
+from engine.swagger import load_swagger
+
+SPEC = """\
+openapi: 3.0.3
+paths:
+  /order:
+    post:
+      requestBody:
+        content:
+          application/json:
+            schema:
+              $ref: '#/components/schemas/Order'
+      responses:
+        '201':
+          description: created
+components:
+  schemas:
+    Order:
+      type: object
+      required: [shipDate, createdAt]
+      properties:
+        shipDate:
+          type: string
+          format: date
+          example: 2020-01-01
+        createdAt:
+          type: string
+          format: date-time
+          example: 2020-01-01T10:00:00Z
+"""
+
+
+def test_yaml_date_example():
+    directory = tempfile.mkdtemp(prefix="yaml_spec_")
+    try:
+        path = os.path.join(directory, "openapi.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(SPEC)
+        cache_dir = os.path.join(directory, "cache")
+        for cache in (None, cache_dir, cache_dir):  # no cache, cold cache, warm cache
+            spec = load_swagger(path, cache_dir=cache)
+            example = spec["components"]["schemas"]["Order"]["properties"]["shipDate"]["example"]
+            assert example == "2020-01-01", example
+            tests = generate_tests(spec)
+            body = json.loads(json.dumps(tests))[0]["body"]
+            assert body == {"shipDate": "2020-01-01", "createdAt": "2020-01-01T10:00:00Z"}, body
+        print("✓ YAML date examples stay strings (no cache, cold and warm cache)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_yaml_date_example()